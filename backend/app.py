@@ -5,13 +5,12 @@ from datetime import datetime
 from typing import Optional
 
 from flask import Flask, g, request
-from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
-from flask_jwt_extended.exceptions import NoAuthorizationError
 
+from backend.common.auth import verify_request_identity
 from backend.common.errors import register_error_handlers
 from backend.config import get_config
 from backend.extensions import init_extensions, init_logging
-from backend.modules import register_blueprints
+from backend.modules import register_blueprints, register_jobs
 
 
 def create_app(config_name: Optional[str] = None) -> Flask:
@@ -24,20 +23,16 @@ def create_app(config_name: Optional[str] = None) -> Flask:
     init_logging(app)
     init_extensions(app)
     register_blueprints(app)
+    register_jobs(app)
     register_error_handlers(app)
 
     @app.before_request
     def _inject_request_context():
         g.request_id = str(uuid.uuid4())
         g.current_user_id = None
-        try:
-            verify_jwt_in_request()
-            g.current_user_id = get_jwt_identity()
-        except NoAuthorizationError:
-            g.current_user_id = None
-        except Exception:
-            g.current_user_id = None
         g.request_started_at = datetime.utcnow()
+        # Only views declared with jwt_required are verified, and the view reuses the result.
+        verify_request_identity()
 
     @app.after_request
     def _log_request(response):
@@ -0,0 +1,84 @@
+"""Related-entry index: signature build time, matrix memory and query latency.
+
+Run from the repository root::
+
+    python -m backend.benchmarks.bench_related_entries --entries 50000 --queries 200
+"""
+import argparse
+import logging
+import random
+import time
+
+import numpy as np
+from sqlalchemy import insert
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.modules.auth.service import create_user
+from backend.modules.knowledge import related
+from backend.modules.knowledge.models import KnowledgeEntry
+
+_WORDS = (
+    "graph tree heap stack queue hash sort merge binary search index cache vector matrix "
+    "verb noun tense grammar history war empire trade river mountain cell protein enzyme "
+    "energy force mass wave light sound integral limit series proof lemma theorem"
+).split()
+
+
+def _seed(user_id: int, count: int, rng: random.Random) -> None:
+    batch = []
+    for i in range(count):
+        words = rng.choices(_WORDS, k=40)
+        batch.append(
+            {
+                "user_id": user_id,
+                "title": " ".join(words[:4]),
+                "content": " ".join(words),
+                "tags": rng.sample(_WORDS, k=2),
+                "links": [],
+            }
+        )
+        if len(batch) == 5000 or i == count - 1:
+            db.session.execute(insert(KnowledgeEntry), batch)
+            db.session.commit()
+            batch = []
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    app = create_app("testing")
+    logging.getLogger().setLevel(logging.WARNING)
+    app.logger.setLevel(logging.WARNING)
+    rng = random.Random(7)
+    with app.app_context():
+        db.create_all()
+        user = create_user("bench-related@example.com", "Secret123!")
+        _seed(user.id, args.entries, rng)
+
+        started = time.perf_counter()
+        related.rebuild_signatures(batch_size=2000)
+        build = time.perf_counter() - started
+
+        started = time.perf_counter()
+        ids, matrix = related._user_index(user.id)
+        load = time.perf_counter() - started
+
+        samples = []
+        for entry_id in rng.choices(ids.tolist(), k=args.queries):
+            started = time.perf_counter()
+            related.related_entries(user.id, entry_id, args.k)
+            samples.append((time.perf_counter() - started) * 1000)
+
+        print(f"entries: {ids.size}")
+        print(f"build:   {build:.2f} s ({build / ids.size * 1e6:.0f} us/entry)")
+        print(f"load:    {load * 1000:.1f} ms, matrix {(matrix.nbytes + ids.nbytes) / 2**20:.1f} MiB")
+        print(f"query:   p50 {np.percentile(samples, 50):.2f} ms, p95 {np.percentile(samples, 95):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Review forecast: projection time over a large schedule, cold and cached.
+
+Run from the repository root::
+
+    python -m backend.benchmarks.bench_review_forecast --entries 100000 --days 90
+"""
+import argparse
+import logging
+import random
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.modules.auth.service import create_user
+from backend.modules.knowledge.models import KnowledgeEntry
+from backend.modules.review import service as review_service
+from backend.modules.review.models import ReviewState
+
+
+def _seed(user_id: int, count: int, rng: random.Random) -> None:
+    today = date.today()
+    for start in range(0, count, 10000):
+        size = min(10000, count - start)
+        db.session.execute(
+            insert(KnowledgeEntry),
+            [{"user_id": user_id, "title": f"card {start + i}", "content": "c", "tags": [], "links": []} for i in range(size)],
+        )
+    entry_ids = [i for (i,) in db.session.query(KnowledgeEntry.id).filter_by(user_id=user_id)]
+    rows = []
+    for entry_id in entry_ids:
+        repetitions = rng.randint(1, 8)
+        interval = int(review_service.interval_table(repetitions)[repetitions])
+        last = today - timedelta(days=rng.randint(0, interval))
+        rows.append(
+            {
+                "user_id": user_id,
+                "entry_id": entry_id,
+                "repetitions": repetitions,
+                "stability": review_service.DEFAULT_STABILITY,
+                "interval_days": interval,
+                "last_review_on": last,
+                "next_review_at": last + timedelta(days=interval),
+            }
+        )
+    db.session.execute(insert(ReviewState), rows)
+    db.session.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app("testing")
+    logging.getLogger().setLevel(logging.WARNING)
+    app.logger.setLevel(logging.WARNING)
+    with app.app_context():
+        db.create_all()
+        user = create_user("bench-forecast@example.com", "Secret123!")
+        _seed(user.id, args.entries, random.Random(11))
+
+        cold = []
+        for _ in range(args.repeat):
+            review_service.bump_generation(user.id)
+            started = time.perf_counter()
+            payload = review_service.forecast(user.id, args.days)
+            cold.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        review_service.forecast(user.id, args.days)
+        warm = time.perf_counter() - started
+
+        print(f"entries: {args.entries}, horizon: {args.days} days, projected reviews: {payload['total']}")
+        print(f"cold:    best {min(cold) * 1000:.1f} ms, worst {max(cold) * 1000:.1f} ms (load + projection)")
+        print(f"cached:  {warm * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Blocklist queries per authenticated request, with and without the revocation cache.
+
+Run from the repository root::
+
+    python -m backend.benchmarks.bench_token_revocation --requests 500
+"""
+import argparse
+import logging
+import time
+
+from sqlalchemy import event
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.modules.auth import service as auth_service
+
+
+def _run(client, headers, requests: int, clear_cache: bool) -> tuple[int, int, float]:
+    counts = {"all": 0, "blocklist": 0}
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        counts["all"] += 1
+        if "auth_tokens" in statement:
+            counts["blocklist"] += 1
+
+    event.listen(db.engine, "before_cursor_execute", _record)
+    started = time.perf_counter()
+    try:
+        for _ in range(requests):
+            if clear_cache:
+                auth_service._local_cache().clear()
+            resp = client.get("/api/user/profile", headers=headers)
+            assert resp.status_code == 200, resp.json
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _record)
+    return counts["all"], counts["blocklist"], time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    app = create_app("testing")
+    logging.getLogger().setLevel(logging.WARNING)
+    app.logger.setLevel(logging.WARNING)
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        reg = client.post("/api/auth/register", json={"email": "bench@example.com", "password": "Secret123!"})
+        headers = {"Authorization": f"Bearer {reg.json['data']['tokens']['access']}"}
+
+        for label, clear_cache in (("uncached", True), ("cached", False)):
+            total, blocklist, elapsed = _run(client, headers, args.requests, clear_cache)
+            print(
+                f"{label:>9}: {blocklist / args.requests:.2f} blocklist queries/request, "
+                f"{total / args.requests:.2f} total queries/request, "
+                f"{elapsed / args.requests * 1000:.3f} ms/request"
+            )
+
+
+if __name__ == "__main__":
+    main()
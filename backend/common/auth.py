@@ -0,0 +1,40 @@
+from functools import wraps
+
+from flask import current_app, g, request
+from flask_jwt_extended import verify_jwt_in_request
+
+
+def jwt_required(optional: bool = False, fresh: bool = False, refresh: bool = False, verify_type: bool = True):
+    """Drop-in for ``flask_jwt_extended.jwt_required`` that verifies once per request.
+
+    The options are attached to the view so the ``before_request`` hook can verify the
+    token up front; the decorator then reuses that result instead of decoding again.
+    """
+    options = {"optional": optional, "fresh": fresh, "refresh": refresh, "verify_type": verify_type}
+
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            if g.get("_jwt_verified_with") != options:
+                _verify(options)
+            return current_app.ensure_sync(fn)(*args, **kwargs)
+
+        decorator.jwt_options = options
+        return decorator
+
+    return wrapper
+
+
+def verify_request_identity() -> None:
+    """Verify the JWT for views declared with :func:`jwt_required`; skip all others."""
+    view = current_app.view_functions.get(request.endpoint) if request.endpoint else None
+    options = getattr(view, "jwt_options", None)
+    if options is None:
+        return
+    _verify(options)
+
+
+def _verify(options: dict) -> None:
+    verify_jwt_in_request(**options)
+    g._jwt_verified_with = options
+    g.current_user_id = (g.get("_jwt_extended_jwt") or {}).get("sub")
@@ -0,0 +1,113 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from redis import RedisError
+
+from backend.extensions import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCache:
+    """Thread-safe in-process LRU cache with per-key expiry.
+
+    Used as a stand-in for Redis when ``REDIS_URL`` is not configured.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        """Store ``value``; with ``nx=True`` only when no live value exists."""
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            if nx and key in self._data:
+                _, current_expiry = self._data[key]
+                if current_expiry is None or current_expiry > time.monotonic():
+                    return False
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return True
+
+    def incr(self, key: Hashable, amount: int = 1) -> int:
+        """Increment a counter in place, keeping its expiry; missing keys start at 0."""
+        with self._lock:
+            value, expires_at = self._data.get(key, (0, None))
+            if expires_at is not None and expires_at <= time.monotonic():
+                value, expires_at = 0, None
+            self._data[key] = (value + amount, expires_at)
+            self._data.move_to_end(key)
+            return value + amount
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SharedCache:
+    """JSON key/value cache on Redis that degrades to a :class:`LocalCache`.
+
+    Without Redis every worker has its own copy; pass ``local_ttl`` to :meth:`set` to
+    cap how stale a value another worker has invalidated can get.
+    """
+
+    def __init__(self, local_maxsize: int = 10000):
+        self.local = LocalCache(maxsize=local_maxsize)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        redis = get_redis()
+        if redis is None:
+            return self.local.get(key, default)
+        try:
+            raw = redis.get(key)
+        except RedisError:
+            logger.warning("cache read failed for %s", key, exc_info=True)
+            return default
+        return default if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, local_ttl: Optional[float] = None) -> None:
+        redis = get_redis()
+        if redis is None:
+            self.local.set(key, value, ttl=local_ttl if local_ttl is not None else ttl)
+            return
+        try:
+            redis.set(key, json.dumps(value, ensure_ascii=False), ex=int(ttl) if ttl else None)
+        except RedisError:
+            logger.warning("cache write failed for %s", key, exc_info=True)
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        redis = get_redis()
+        if redis is None:
+            return self.local.incr(key, amount)
+        try:
+            return int(redis.incrby(key, amount))
+        except RedisError:
+            logger.warning("cache incr failed for %s", key, exc_info=True)
+            return 0
@@ -0,0 +1,42 @@
+import hashlib
+from functools import wraps
+from typing import Any, Callable
+
+from flask import current_app, g, request
+
+
+def conditional(version_fn: Callable[..., Any]):
+    """Serve ``304 Not Modified`` when the client's ``If-None-Match`` is current.
+
+    ``version_fn`` receives the view's URL arguments and must cheaply return a value
+    that changes whenever the response would (e.g. ``updated_at`` or a collection
+    version), or ``None`` to skip the check (the view then handles e.g. 404). The
+    strong ETag also covers the user and the query string, so it is only computed,
+    never stored. Place it below ``jwt_required`` so the identity is known.
+    """
+
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            version = version_fn(**kwargs)
+            if version is None:
+                return current_app.ensure_sync(fn)(*args, **kwargs)
+            etag = _make_etag(version)
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(current_app.ensure_sync(fn)(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+
+        return decorator
+
+    return wrapper
+
+
+def _make_etag(version: Any) -> str:
+    raw = f"{g.get('current_user_id')}|{request.full_path}|{version}"
+    return hashlib.sha1(raw.encode()).hexdigest()
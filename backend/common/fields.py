@@ -0,0 +1,20 @@
+from typing import Iterable, Optional
+
+from backend.common.errors import AppError
+
+
+def parse_fields(value: Optional[str], allowed: Iterable[str], always: Iterable[str] = ("id",)) -> Optional[list[str]]:
+    """Parse a ``fields=a,b`` sparse fieldset; ``None`` means "all fields"."""
+    if not value:
+        return None
+    allowed = set(allowed)
+    requested = [f.strip() for f in value.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise AppError(code=1001, message=f"invalid_fields:{','.join(unknown)}", status_code=400)
+    return list(dict.fromkeys([*always, *requested]))
+
+
+def serialize(obj, serializers: dict, fields: Optional[Iterable[str]] = None) -> dict:
+    """Build a dict from per-field serializers, touching only the requested attributes."""
+    return {name: serializers[name](obj) for name in (fields or serializers)}
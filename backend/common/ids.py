@@ -0,0 +1,8 @@
+# Primary keys are 32-bit INTEGER columns; larger numbers cannot name a row and
+# overflow the database driver if they reach a query.
+MAX_ID = 2**31 - 1
+
+
+def is_valid_id(value) -> bool:
+    """True for an ``int`` (not ``bool``) that fits a primary key column."""
+    return isinstance(value, int) and not isinstance(value, bool) and 0 < value <= MAX_ID
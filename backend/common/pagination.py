@@ -0,0 +1,29 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Optional, Union
+
+from backend.common.errors import AppError
+
+
+def encode_cursor(sort_value: Union[date, datetime], row_id: int) -> str:
+    """Opaque keyset cursor for a ``(date or datetime, id)`` position."""
+    raw = json.dumps([sort_value.isoformat(), row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[tuple[datetime, int]]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (ValueError, TypeError):
+        raise AppError(code=1001, message="invalid_cursor", status_code=400)
+
+
+def parse_bool(value: Optional[str], default: bool = True) -> bool:
+    if value is None:
+        return default
+    return value.strip().lower() not in {"0", "false", "no", "off"}
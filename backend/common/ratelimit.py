@@ -0,0 +1,91 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from flask import current_app
+from redis import RedisError
+
+from backend.extensions import get_redis
+
+
+class MemoryWindowStore:
+    """In-process sliding-window log; stands in for Redis in tests and single-node setups.
+
+    Keys are kept in least-recently-hit order. Keys whose window has fully expired are
+    dropped as newer hits arrive, and at most ``maxsize`` keys are kept; evicting a
+    live key only forgets its history, so the limiter errs towards allowing.
+    """
+
+    def __init__(self, maxsize: int = 100000):
+        self.maxsize = maxsize
+        # key -> (window, hit timestamps)
+        self._hits: "OrderedDict[str, tuple[float, deque]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, now: float, window: float) -> int:
+        with self._lock:
+            _, hits = self._hits.pop(key, (window, deque()))
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            hits.append(now)
+            self._hits[key] = (window, hits)
+            self._evict(now)
+            return len(hits)
+
+    def _evict(self, now: float) -> None:
+        while self._hits:
+            key, (window, hits) = next(iter(self._hits.items()))
+            if len(self._hits) <= self.maxsize and hits[-1] > now - window:
+                break
+            del self._hits[key]
+
+    def __len__(self) -> int:
+        return len(self._hits)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._hits.clear()
+
+
+class RedisWindowStore:
+    """Sliding-window log kept in a Redis sorted set scored by timestamp."""
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    def hit(self, key: str, now: float, window: float) -> int:
+        pipe = self.redis.pipeline()
+        pipe.zremrangebyscore(key, 0, now - window)
+        pipe.zadd(key, {f"{now}:{uuid.uuid4().hex}": now})
+        pipe.zcard(key)
+        pipe.expire(key, int(window) + 1)
+        return pipe.execute()[2]
+
+
+_memory_store = MemoryWindowStore()
+
+
+class SlidingWindowLimiter:
+    """Allow at most ``limit`` hits per key within any ``window`` seconds."""
+
+    def __init__(self, prefix: str, limit: int, window: float):
+        self.prefix = prefix
+        self.limit = limit
+        self.window = window
+
+    def hit(self, key: str) -> bool:
+        """Record an attempt for ``key``; return ``False`` when it exceeds the limit."""
+        redis = get_redis()
+        store = RedisWindowStore(redis) if redis is not None else _memory_store
+        try:
+            count = store.hit(f"{self.prefix}:{key}", time.time(), self.window)
+        except RedisError:
+            # Fail open: losing the limiter is better than locking everybody out.
+            current_app.logger.warning("rate limiter unavailable", exc_info=True)
+            return True
+        return count <= self.limit
+
+
+def reset_memory_store() -> None:
+    _memory_store.clear()
@@ -1,9 +1,76 @@
-from werkzeug.security import check_password_hash, generate_password_hash
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from flask import current_app
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+from backend.common.errors import AppError
+
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_hash_slots: Optional[threading.BoundedSemaphore] = None
+_pool_lock = threading.Lock()
 
 
 def hash_password(password: str) -> str:
-    return generate_password_hash(password)
+    return _run_hashing(generate_password_hash, password, method=current_app.config["PASSWORD_HASH_METHOD"])
 
 
 def verify_password(password_hash: str, password: str) -> bool:
-    return check_password_hash(password_hash, password)
+    return _run_hashing(check_password_hash, password_hash, password)
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """True when ``password_hash`` was produced with a different method/cost than configured."""
+    stored = _normalize_method(password_hash.split("$", 1)[0])
+    return stored != _normalize_method(current_app.config["PASSWORD_HASH_METHOD"])
+
+
+def _normalize_method(method: str) -> tuple:
+    """``(name, *params)`` with werkzeug's defaults filled in, e.g. ``pbkdf2:sha256``
+    -> ``("pbkdf2", "sha256", 1000000)``, so configured and stored methods compare."""
+    name, *args = method.split(":")
+    try:
+        if name == "scrypt":
+            n, r, p = map(int, args) if args else (2**15, 8, 1)
+            return name, n, r, p
+        if name == "pbkdf2":
+            hash_name = args[0] if args else "sha256"
+            iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+            return name, hash_name, iterations
+    except ValueError:
+        pass
+    return (method,)
+
+
+def _run_hashing(fn: Callable, *args, **kwargs):
+    """Run a CPU-heavy hash on the bounded hashing pool.
+
+    At most ``PASSWORD_HASH_WORKERS`` hashes run at once and at most
+    ``PASSWORD_HASH_MAX_PENDING`` more may wait; beyond that we fail fast with 429
+    instead of letting a burst starve the worker.
+
+    The pool is per process and only helps when a process serves requests on several
+    threads (gunicorn ``gthread`` with ``--threads``, or the threaded dev server):
+    logins then cannot occupy every request thread. A sync worker handles one
+    request at a time, so there it only adds a thread hop; size
+    ``PASSWORD_HASH_WORKERS`` below the worker's thread count.
+    """
+    executor, slots = _hash_pool()
+    if not slots.acquire(blocking=False):
+        raise AppError(code=2005, message="server_busy", status_code=429)
+    try:
+        return executor.submit(fn, *args, **kwargs).result()
+    finally:
+        slots.release()
+
+
+def _hash_pool() -> tuple[ThreadPoolExecutor, threading.BoundedSemaphore]:
+    global _hash_executor, _hash_slots
+    if _hash_executor is None:
+        with _pool_lock:
+            if _hash_executor is None:
+                workers = current_app.config["PASSWORD_HASH_WORKERS"]
+                _hash_slots = threading.BoundedSemaphore(workers + current_app.config["PASSWORD_HASH_MAX_PENDING"])
+                _hash_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+    return _hash_executor, _hash_slots
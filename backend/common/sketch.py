@@ -0,0 +1,32 @@
+from typing import Hashable, Iterable
+
+
+class SpaceSaving:
+    """Top-k heavy hitters in ``capacity`` counters (Metwally et al. Space-Saving).
+
+    Memory stays fixed however many distinct items are offered; any item whose true
+    count exceeds ``total / capacity`` is guaranteed to be tracked, and reported
+    counts overestimate by at most the count of the counter they replaced.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: dict[Hashable, int] = {}
+
+    def add(self, item: Hashable, count: int = 1) -> None:
+        if item in self.counts or len(self.counts) < self.capacity:
+            self.counts[item] = self.counts.get(item, 0) + count
+            return
+        victim = min(self.counts, key=self.counts.__getitem__)
+        floor = self.counts.pop(victim)
+        self.counts[item] = floor + count
+
+    def update(self, items: Iterable[Hashable]) -> None:
+        for item in items:
+            self.add(item)
+
+    def top(self, k: int) -> list[tuple[Hashable, int]]:
+        return sorted(self.counts.items(), key=lambda kv: (-kv[1], kv[0]))[:k]
+
+    def __len__(self) -> int:
+        return len(self.counts)
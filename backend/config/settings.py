@@ -11,7 +11,8 @@ class BaseConfig:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ENGINE_OPTIONS = {"pool_pre_ping": True}
 
-    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    # Unset means "no Redis": caches fall back to in-process stores.
+    REDIS_URL = os.getenv("REDIS_URL")
 
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     LOG_FORMAT = "[%(asctime)s] %(levelname)s in %(module)s: %(message)s"
@@ -19,6 +20,75 @@ class BaseConfig:
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "dev-jwt-secret-change-me")
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=int(os.getenv("JWT_ACCESS_MINUTES", 30)))
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=int(os.getenv("JWT_REFRESH_DAYS", 14)))
+    # Revoked-token cache: local LRU size and how long a "not revoked" answer may be
+    # trusted by a single worker when Redis is unavailable.
+    TOKEN_REVOCATION_CACHE_SIZE = int(os.getenv("TOKEN_REVOCATION_CACHE_SIZE", 10000))
+    TOKEN_REVOCATION_LOCAL_TTL = int(os.getenv("TOKEN_REVOCATION_LOCAL_TTL", 30))
+    # Lifetime of a "not revoked" answer in Redis; bounds how long a revocation whose
+    # cache write failed can go unnoticed.
+    TOKEN_REVOCATION_NEGATIVE_TTL = int(os.getenv("TOKEN_REVOCATION_NEGATIVE_TTL", 300))
+    TOKEN_PURGE_INTERVAL_MINUTES = int(os.getenv("TOKEN_PURGE_INTERVAL_MINUTES", 60))
+    TOKEN_PURGE_BATCH_SIZE = int(os.getenv("TOKEN_PURGE_BATCH_SIZE", 1000))
+
+    # Password hashing: werkzeug method string (changing it rehashes on next login),
+    # bounded hashing pool, and login attempt limits per sliding window. The pool is
+    # per process and assumes threaded workers (gunicorn gthread); keep
+    # PASSWORD_HASH_WORKERS below the worker's --threads.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 8))
+    LOGIN_WINDOW_SECONDS = int(os.getenv("LOGIN_WINDOW_SECONDS", 300))
+    LOGIN_MAX_ATTEMPTS_PER_ACCOUNT = int(os.getenv("LOGIN_MAX_ATTEMPTS_PER_ACCOUNT", 10))
+    LOGIN_MAX_ATTEMPTS_PER_IP = int(os.getenv("LOGIN_MAX_ATTEMPTS_PER_IP", 50))
+
+    # Page size cap for GET /api/knowledge/entries.
+    KNOWLEDGE_MAX_PAGE_SIZE = int(os.getenv("KNOWLEDGE_MAX_PAGE_SIZE", 100))
+    # Knowledge search result cache (seconds); the local TTL applies without Redis.
+    KNOWLEDGE_SEARCH_CACHE_TTL = int(os.getenv("KNOWLEDGE_SEARCH_CACHE_TTL", 300))
+    KNOWLEDGE_SEARCH_CACHE_LOCAL_TTL = int(os.getenv("KNOWLEDGE_SEARCH_CACHE_LOCAL_TTL", 10))
+    # Bulk import/export: rows per INSERT batch / fetch, and per-row errors reported.
+    KNOWLEDGE_IMPORT_BATCH_SIZE = int(os.getenv("KNOWLEDGE_IMPORT_BATCH_SIZE", 500))
+    KNOWLEDGE_IMPORT_MAX_ERRORS = int(os.getenv("KNOWLEDGE_IMPORT_MAX_ERRORS", 100))
+    KNOWLEDGE_BATCH_MAX_IDS = int(os.getenv("KNOWLEDGE_BATCH_MAX_IDS", 100))
+    # Per-process related-entry matrices; bounds staleness when Redis is not shared.
+    KNOWLEDGE_RELATED_INDEX_TTL = int(os.getenv("KNOWLEDGE_RELATED_INDEX_TTL", 60))
+    KNOWLEDGE_RELATED_MAX_K = int(os.getenv("KNOWLEDGE_RELATED_MAX_K", 50))
+    # Autocomplete: per-process prefix index lifetime and maximum suggestions per request.
+    KNOWLEDGE_SUGGEST_INDEX_TTL = int(os.getenv("KNOWLEDGE_SUGGEST_INDEX_TTL", 60))
+    KNOWLEDGE_SUGGEST_MAX_LIMIT = int(os.getenv("KNOWLEDGE_SUGGEST_MAX_LIMIT", 50))
+    # Search hot words: counters kept per daily bucket, recording queue size, term length cap.
+    KNOWLEDGE_HOT_USER_CAPACITY = int(os.getenv("KNOWLEDGE_HOT_USER_CAPACITY", 50))
+    KNOWLEDGE_HOT_GLOBAL_CAPACITY = int(os.getenv("KNOWLEDGE_HOT_GLOBAL_CAPACITY", 500))
+    KNOWLEDGE_HOT_QUEUE_SIZE = int(os.getenv("KNOWLEDGE_HOT_QUEUE_SIZE", 10000))
+    KNOWLEDGE_HOT_MAX_TERM_LEN = int(os.getenv("KNOWLEDGE_HOT_MAX_TERM_LEN", 64))
+    KNOWLEDGE_HOT_MAX_LIMIT = int(os.getenv("KNOWLEDGE_HOT_MAX_LIMIT", 50))
+    # Link graph walks: maximum hops and nodes returned.
+    KNOWLEDGE_GRAPH_MAX_DEPTH = int(os.getenv("KNOWLEDGE_GRAPH_MAX_DEPTH", 3))
+    KNOWLEDGE_GRAPH_MAX_NODES = int(os.getenv("KNOWLEDGE_GRAPH_MAX_NODES", 200))
+
+    # Review schedule: longest interval between reviews, and page cap for the due list.
+    REVIEW_MAX_INTERVAL_DAYS = int(os.getenv("REVIEW_MAX_INTERVAL_DAYS", 365))
+    REVIEW_DUE_MAX_LIMIT = int(os.getenv("REVIEW_DUE_MAX_LIMIT", 200))
+    # Forecast horizon cap and cache lifetime (seconds); the local TTL applies without Redis.
+    REVIEW_FORECAST_MAX_DAYS = int(os.getenv("REVIEW_FORECAST_MAX_DAYS", 365))
+    REVIEW_FORECAST_CACHE_TTL = int(os.getenv("REVIEW_FORECAST_CACHE_TTL", 3600))
+    REVIEW_FORECAST_CACHE_LOCAL_TTL = int(os.getenv("REVIEW_FORECAST_CACHE_LOCAL_TTL", 30))
+
+    # Page size cap for GET /api/study/logs.
+    STUDY_LOG_MAX_PAGE_SIZE = int(os.getenv("STUDY_LOG_MAX_PAGE_SIZE", 50))
+    # Most logs accepted by one POST /api/study/logs:batch.
+    STUDY_LOG_BATCH_MAX_ITEMS = int(os.getenv("STUDY_LOG_BATCH_MAX_ITEMS", 100))
+    # Longest date range one study stats request may cover.
+    STUDY_STATS_MAX_DAYS = int(os.getenv("STUDY_STATS_MAX_DAYS", 731))
+
+    # Most task changes accepted by one PATCH /api/plans/<id>/tasks.
+    PLAN_TASK_BATCH_MAX_ITEMS = int(os.getenv("PLAN_TASK_BATCH_MAX_ITEMS", 200))
+    # Task rank keys: plans with a key longer than this are respaced by the periodic job.
+    PLAN_RANK_REBALANCE_LEN = int(os.getenv("PLAN_RANK_REBALANCE_LEN", 16))
+    PLAN_RANK_REBALANCE_INTERVAL_MINUTES = int(os.getenv("PLAN_RANK_REBALANCE_INTERVAL_MINUTES", 60))
+    # Overdue job: how often open tasks/plans past their dates are marked delayed, rows per UPDATE.
+    PLAN_OVERDUE_INTERVAL_MINUTES = int(os.getenv("PLAN_OVERDUE_INTERVAL_MINUTES", 60))
+    PLAN_OVERDUE_BATCH_SIZE = int(os.getenv("PLAN_OVERDUE_BATCH_SIZE", 1000))
 
     API_PREFIX = "/api"
     SCHEDULER_ENABLED = False
@@ -40,4 +110,6 @@ class TestingConfig(BaseConfig):
     TESTING = True
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    REDIS_URL = None
+    PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"
     SCHEDULER_ENABLED = False
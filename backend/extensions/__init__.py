@@ -1,3 +1,4 @@
+import atexit
 import logging
 import logging.config
 from logging.handlers import RotatingFileHandler
@@ -20,6 +21,11 @@ redis_client: Optional[Redis] = None
 scheduler = BackgroundScheduler()
 
 
+def get_redis() -> Optional[Redis]:
+    """Return the shared Redis client, or ``None`` when ``REDIS_URL`` is unset."""
+    return redis_client
+
+
 def init_logging(app: Flask) -> None:
     level = getattr(logging, app.config.get("LOG_LEVEL", "INFO"), logging.INFO)
     log_dir = Path(app.root_path).parent / "logs"
@@ -59,9 +65,11 @@ def init_extensions(app: Flask) -> None:
     if app.config.get("SCHEDULER_ENABLED") and not app.config.get("TESTING"):
         if not scheduler.running:
             scheduler.start()
+            # Shut down with the process, not with each app context (i.e. every request).
+            atexit.register(_shutdown_scheduler)
         app.extensions["scheduler"] = scheduler
 
-    @app.teardown_appcontext
-    def _shutdown_scheduler(exception=None):
-        if scheduler.running and app.config.get("SCHEDULER_ENABLED"):
-            scheduler.shutdown(wait=False)
+
+def _shutdown_scheduler() -> None:
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
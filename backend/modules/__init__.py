@@ -1,10 +1,13 @@
 from flask import Flask
 
+from backend.modules.auth.jobs import register_jobs as register_auth_jobs
 from backend.modules.auth.views import auth_bp
 from backend.modules.health.views import health_bp
+from backend.modules.plan.jobs import register_jobs as register_plan_jobs
 from backend.modules.plan.views import plan_bp
 from backend.modules.user.views import user_bp
 from backend.modules.knowledge.views import knowledge_bp
+from backend.modules.review.views import review_bp
 from backend.modules.study_log.views import study_log_bp
 
 
@@ -15,3 +18,12 @@ def register_blueprints(app: Flask) -> None:
     app.register_blueprint(plan_bp)
     app.register_blueprint(knowledge_bp)
     app.register_blueprint(study_log_bp)
+    app.register_blueprint(review_bp)
+
+
+def register_jobs(app: Flask) -> None:
+    """Add periodic jobs to the shared scheduler when it is enabled."""
+    if "scheduler" not in app.extensions:
+        return
+    register_auth_jobs(app)
+    register_plan_jobs(app)
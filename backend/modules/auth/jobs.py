@@ -0,0 +1,28 @@
+import time
+
+from flask import Flask
+
+from backend.extensions import scheduler
+from backend.modules.auth.service import purge_expired_tokens
+
+
+def register_jobs(app: Flask) -> None:
+    scheduler.add_job(
+        _purge_tokens_job,
+        "interval",
+        minutes=app.config["TOKEN_PURGE_INTERVAL_MINUTES"],
+        id="auth.purge_tokens",
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1,
+        args=[app],
+    )
+
+
+def _purge_tokens_job(app: Flask) -> None:
+    with app.app_context():
+        started = time.perf_counter()
+        deleted = purge_expired_tokens(batch_size=app.config["TOKEN_PURGE_BATCH_SIZE"])
+        app.logger.info(
+            "purged expired tokens deleted=%s duration_ms=%.1f", deleted, (time.perf_counter() - started) * 1000
+        )
@@ -31,7 +31,7 @@ class TokenBlocklist(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     revoked = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    expires_at = db.Column(db.DateTime, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=True, index=True)
 
     def __repr__(self) -> str:
         return f"<Token {self.jti} revoked={self.revoked}>"
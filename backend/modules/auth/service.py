@@ -1,14 +1,22 @@
+import time
 from datetime import datetime
 from typing import Optional
 
 from flask import current_app
 from flask_jwt_extended import create_access_token, create_refresh_token
+from redis import RedisError
 
+from backend.common.cache import LocalCache
 from backend.common.errors import AppError
-from backend.common.security import hash_password, verify_password
-from backend.extensions import db
+from backend.common.ratelimit import SlidingWindowLimiter
+from backend.common.security import hash_password, needs_rehash, verify_password
+from backend.extensions import db, get_redis
 from backend.modules.auth.models import TokenBlocklist, User
 
+REVOKED_KEY = "auth:revoked:{jti}"
+
+_local_revocations: Optional[LocalCache] = None
+
 
 def create_user(email: str, password: str, **kwargs) -> User:
     existing = User.query.filter_by(email=email).first()
@@ -20,15 +28,32 @@ def create_user(email: str, password: str, **kwargs) -> User:
     return user
 
 
-def authenticate(email_or_phone: str, password: str) -> User:
+def authenticate(email_or_phone: str, password: str, client_ip: Optional[str] = None) -> User:
+    _throttle_login(email_or_phone, client_ip)
     user = User.query.filter(
         (User.email == email_or_phone) | (User.phone == email_or_phone)
     ).first()
     if not user or not verify_password(user.password_hash, password):
         raise AppError(code=2002, message="invalid_credentials", status_code=401)
+    if needs_rehash(user.password_hash):
+        user.password_hash = hash_password(password)
+        db.session.commit()
     return user
 
 
+def _throttle_login(account: str, client_ip: Optional[str]) -> None:
+    """Reject the attempt before any hashing when the account or IP is over its window."""
+    config = current_app.config
+    window = config["LOGIN_WINDOW_SECONDS"]
+    account_limiter = SlidingWindowLimiter("auth:login:account", config["LOGIN_MAX_ATTEMPTS_PER_ACCOUNT"], window)
+    allowed = account_limiter.hit(account.strip().lower())
+    if client_ip:
+        ip_limiter = SlidingWindowLimiter("auth:login:ip", config["LOGIN_MAX_ATTEMPTS_PER_IP"], window)
+        allowed = ip_limiter.hit(client_ip) and allowed
+    if not allowed:
+        raise AppError(code=2004, message="too_many_attempts", status_code=429)
+
+
 def issue_tokens(user: User) -> dict:
     access_token = create_access_token(identity=str(user.id), fresh=True)
     refresh_token = create_refresh_token(identity=str(user.id))
@@ -45,8 +70,106 @@ def revoke_token(jti: str, token_type: str, user_id: int, expires_at: Optional[d
     )
     db.session.add(entry)
     db.session.commit()
+    _cache_revocation(jti, True, expires_at)
+
 
+def purge_expired_tokens(batch_size: int = 1000, now: Optional[datetime] = None) -> int:
+    """Delete expired blocklist rows in chunks of ``batch_size``, committing per chunk.
 
-def is_token_revoked(jti: str) -> bool:
+    Each chunk is a short transaction so the purge never holds long locks.
+    """
+    # expires_at is stored as naive local time (see the logout view).
+    now = now or datetime.now()
+    deleted = 0
+    while True:
+        ids = [
+            row.id
+            for row in db.session.query(TokenBlocklist.id)
+            .filter(TokenBlocklist.expires_at < now)
+            .order_by(TokenBlocklist.expires_at)
+            .limit(batch_size)
+        ]
+        if not ids:
+            break
+        TokenBlocklist.query.filter(TokenBlocklist.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        deleted += len(ids)
+        if len(ids) < batch_size:
+            break
+    return deleted
+
+
+def is_token_revoked(jti: str, expires_at: Optional[datetime] = None) -> bool:
+    """Return whether ``jti`` is revoked, consulting the revocation cache first.
+
+    A revocation is cached until the token expires; a "not revoked" answer for
+    ``TOKEN_REVOCATION_NEGATIVE_TTL`` seconds, so the blocklist table is read at most
+    that often per live token.
+    """
+    cached = _cached_revocation(jti)
+    if cached is not None:
+        return cached
     record = TokenBlocklist.query.filter_by(jti=jti).first()
-    return bool(record and record.revoked)
+    revoked = bool(record and record.revoked)
+    _cache_revocation(jti, revoked, expires_at)
+    return revoked
+
+
+def _cached_revocation(jti: str) -> Optional[bool]:
+    redis = get_redis()
+    if redis is not None:
+        try:
+            value = redis.get(REVOKED_KEY.format(jti=jti))
+        except RedisError:
+            current_app.logger.warning("revocation cache read failed, falling back to db", exc_info=True)
+            return None
+        return None if value is None else value == b"1"
+    return _local_cache().get(jti)
+
+
+def _cache_revocation(jti: str, revoked: bool, expires_at: Optional[datetime]) -> None:
+    ttl = _remaining_lifetime(expires_at)
+    if ttl <= 0:
+        return
+    redis = get_redis()
+    if redis is not None:
+        key = REVOKED_KEY.format(jti=jti)
+        # "revoked" always overwrites; "not revoked" never clobbers a concurrent revocation.
+        try:
+            if revoked:
+                redis.set(key, b"1", ex=ttl)
+            else:
+                redis.set(key, b"0", ex=min(ttl, current_app.config["TOKEN_REVOCATION_NEGATIVE_TTL"]), nx=True)
+        except RedisError:
+            current_app.logger.warning("revocation cache write failed", exc_info=True)
+            if revoked:
+                _forget_revocation(redis, key)
+        return
+    if revoked:
+        _local_cache().set(jti, True, ttl=ttl)
+    else:
+        # Other workers cannot invalidate this process, so negative answers are short-lived.
+        local_ttl = min(ttl, current_app.config["TOKEN_REVOCATION_LOCAL_TTL"])
+        _local_cache().set(jti, False, ttl=local_ttl, nx=True)
+
+
+def _forget_revocation(redis, key: str) -> None:
+    """Drop a cached "not revoked" answer that a failed revocation write left behind."""
+    try:
+        redis.delete(key)
+    except RedisError:
+        # The stale entry expires within TOKEN_REVOCATION_NEGATIVE_TTL.
+        current_app.logger.error("revocation cache delete failed for %s", key, exc_info=True)
+
+
+def _remaining_lifetime(expires_at: Optional[datetime]) -> int:
+    if expires_at is None:
+        return int(current_app.config["JWT_REFRESH_TOKEN_EXPIRES"].total_seconds())
+    return int(expires_at.timestamp() - time.time())
+
+
+def _local_cache() -> LocalCache:
+    global _local_revocations
+    if _local_revocations is None:
+        _local_revocations = LocalCache(maxsize=current_app.config["TOKEN_REVOCATION_CACHE_SIZE"])
+    return _local_revocations
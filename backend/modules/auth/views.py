@@ -1,15 +1,16 @@
 from datetime import datetime
 
-from flask import Blueprint, request
+import click
+from flask import Blueprint, current_app, request
 from flask_jwt_extended import (
     create_access_token,
     create_refresh_token,
     get_jwt,
     get_jwt_identity,
-    jwt_required,
     unset_jwt_cookies,
 )
 
+from backend.common.auth import jwt_required
 from backend.common.errors import AppError
 from backend.common.response import response_error, response_ok
 from backend.extensions import jwt
@@ -18,6 +19,7 @@ from backend.modules.auth.service import (
     authenticate,
     create_user,
     is_token_revoked,
+    purge_expired_tokens,
     revoke_token,
 )
 
@@ -26,7 +28,7 @@ auth_bp = Blueprint("auth", __name__, url_prefix="/api/auth")
 
 @jwt.token_in_blocklist_loader
 def check_if_token_revoked(jwt_header, jwt_payload):
-    return is_token_revoked(jwt_payload["jti"])
+    return is_token_revoked(jwt_payload["jti"], datetime.fromtimestamp(jwt_payload["exp"]))
 
 
 @jwt.revoked_token_loader
@@ -71,7 +73,7 @@ def register():
 @auth_bp.post("/login")
 def login():
     data = _parse_json(["account", "password"])
-    user = authenticate(data["account"], data["password"])
+    user = authenticate(data["account"], data["password"], client_ip=request.remote_addr)
     tokens = {
         "access": create_access_token(identity=str(user.id), fresh=True),
         "refresh": create_refresh_token(identity=str(user.id)),
@@ -83,9 +85,6 @@ def login():
 @jwt_required(refresh=True)
 def refresh():
     identity = get_jwt_identity()
-    jti = get_jwt()["jti"]
-    if is_token_revoked(jti):
-        raise AppError(code=2003, message="token_revoked", status_code=401)
     new_access = create_access_token(identity=str(identity), fresh=False)
     return response_ok({"access": new_access}, "refreshed")
 
@@ -102,3 +101,11 @@ def logout():
     resp = response_ok(message="logged_out")
     unset_jwt_cookies(resp[0])
     return resp
+
+
+@auth_bp.cli.command("purge-tokens")
+@click.option("--batch-size", type=int, default=None, help="Rows deleted per transaction.")
+def purge_tokens_command(batch_size):
+    """Delete expired rows from the token blocklist."""
+    deleted = purge_expired_tokens(batch_size=batch_size or current_app.config["TOKEN_PURGE_BATCH_SIZE"])
+    click.echo(f"purged {deleted} expired tokens")
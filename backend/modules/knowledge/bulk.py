@@ -0,0 +1,187 @@
+"""Streaming bulk import/export of knowledge entries.
+
+Imports read the request body line by line, validate each row on its own and insert
+valid rows in multi-row ``INSERT`` batches, so neither the upload nor the result set
+is ever held in memory as a whole.
+"""
+import csv
+import json
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+
+from flask import current_app
+from sqlalchemy import insert, select
+
+from backend.common.errors import AppError
+from backend.extensions import db
+from backend.modules.knowledge.cache import bump_generation
+from backend.modules.knowledge.models import KnowledgeEntry, Topic
+from backend.modules.knowledge.links import store_links
+from backend.modules.knowledge.related import store_signatures
+from backend.modules.knowledge.suggest import invalidate as invalidate_suggestions
+from backend.modules.tag.models import TAG_NAME_MAX_LEN, knowledge_entry_tags
+from backend.modules.tag.service import normalize_tags, resolve_tags
+
+IMPORT_FORMATS = {
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+# CSV cells holding lists use this separator, e.g. "math;algebra".
+CSV_LIST_SEPARATOR = ";"
+
+
+def resolve_format(mimetype: str) -> str:
+    fmt = IMPORT_FORMATS.get(mimetype)
+    if not fmt:
+        raise AppError(code=1001, message="unsupported_import_format", status_code=415)
+    return fmt
+
+
+def parse_rows(lines: Iterable[bytes], fmt: str) -> Iterator[tuple[int, Optional[dict], Optional[str]]]:
+    """Yield ``(line_no, row, error)`` for every record in an NDJSON or CSV stream.
+
+    Lines that are not valid UTF-8 are reported as ``invalid_encoding`` and skipped.
+    """
+    bad_lines: list[int] = []
+    text_lines = _decode_lines(lines, bad_lines)
+    if fmt == "ndjson":
+        for line_no, line in enumerate(text_lines, start=1):
+            if bad_lines:
+                yield bad_lines.pop(), None, "invalid_encoding"
+                continue
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield line_no, None, "invalid_json"
+                continue
+            if not isinstance(row, dict):
+                yield line_no, None, "invalid_row"
+                continue
+            yield line_no, row, None
+        return
+    reader = csv.DictReader(text_lines)
+    for row in reader:
+        # Undecodable lines read so far; they reached the reader as blank lines.
+        while bad_lines:
+            yield bad_lines.pop(0), None, "invalid_encoding"
+        for key in ("tags", "links"):
+            if isinstance(row.get(key), str):
+                row[key] = [v for v in row[key].split(CSV_LIST_SEPARATOR) if v.strip()]
+        # line_num is the last physical line of the record; header is line 1.
+        yield reader.line_num, row, None
+    while bad_lines:
+        yield bad_lines.pop(0), None, "invalid_encoding"
+
+
+def _decode_lines(lines: Iterable[bytes], bad_lines: list[int]) -> Iterator[str]:
+    """Decode each line, substituting an empty line (and noting its number) on bad bytes."""
+    for line_no, line in enumerate(lines, start=1):
+        try:
+            yield line.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            bad_lines.append(line_no)
+            yield ""
+
+
+def import_entries(user_id: int, rows: Iterable[tuple[int, Optional[dict], Optional[str]]]) -> dict:
+    """Validate and insert rows in batches; returns counts plus per-row errors."""
+    batch_size = current_app.config["KNOWLEDGE_IMPORT_BATCH_SIZE"]
+    max_errors = current_app.config["KNOWLEDGE_IMPORT_MAX_ERRORS"]
+    topic_ids = {tid for (tid,) in db.session.query(Topic.id).filter(Topic.user_id == user_id)}
+    imported, failed, errors, batch = 0, 0, [], []
+
+    try:
+        for line_no, row, error in rows:
+            values = None
+            if error is None:
+                values, error = _validate_row(user_id, row, topic_ids)
+            if error:
+                failed += 1
+                if len(errors) < max_errors:
+                    errors.append({"line": line_no, "error": error})
+                continue
+            batch.append(values)
+            if len(batch) >= batch_size:
+                imported += _insert_batch(user_id, batch)
+                batch = []
+        if batch:
+            imported += _insert_batch(user_id, batch)
+    finally:
+        if imported:
+            bump_generation(user_id)
+            invalidate_suggestions(user_id)
+    return {"imported": imported, "failed": failed, "errors": errors, "errors_truncated": failed > len(errors)}
+
+
+def export_entries(user_id: int) -> Iterator[str]:
+    """Yield the user's entries as NDJSON lines, streamed from a server-side cursor."""
+    stmt = (
+        select(KnowledgeEntry)
+        .where(KnowledgeEntry.user_id == user_id)
+        .order_by(KnowledgeEntry.id)
+        .execution_options(yield_per=current_app.config["KNOWLEDGE_IMPORT_BATCH_SIZE"])
+    )
+    for entry in db.session.scalars(stmt):
+        yield json.dumps(entry.as_dict(), ensure_ascii=False) + "\n"
+
+
+def _validate_row(user_id: int, row: dict, topic_ids: set[int]) -> tuple[Optional[dict], Optional[str]]:
+    title = str(row.get("title") or "").strip()
+    content = str(row.get("content") or "").strip()
+    if not title or not content:
+        return None, "missing_title_or_content"
+    if len(title) > 255:
+        return None, "title_too_long"
+    topic_id = row.get("topic_id") or None
+    if topic_id is not None:
+        try:
+            topic_id = int(topic_id)
+        except (TypeError, ValueError):
+            return None, "invalid_topic_id"
+        if topic_id not in topic_ids:
+            return None, "topic_not_found"
+    tags, links = row.get("tags") or [], row.get("links") or []
+    if not all(isinstance(values, list) and all(isinstance(v, str) for v in values) for values in (tags, links)):
+        return None, "invalid_tags_or_links"
+    tags = normalize_tags(tags)
+    if any(len(tag) > TAG_NAME_MAX_LEN for tag in tags):
+        return None, "tag_too_long"
+    now = datetime.utcnow()
+    return {
+        "user_id": user_id,
+        "topic_id": topic_id,
+        "title": title,
+        "content": content,
+        "tags": tags,
+        "links": [link.strip() for link in links if link.strip()],
+        "created_at": now,
+        "updated_at": now,
+    }, None
+
+
+def _insert_batch(user_id: int, batch: list[dict]) -> int:
+    """Insert one batch as a multi-row INSERT plus its tag links, signatures and entry links, in one transaction."""
+    ids = db.session.scalars(
+        insert(KnowledgeEntry).returning(KnowledgeEntry.id, sort_by_parameter_order=True), batch
+    ).all()
+    names = normalize_tags(tag for values in batch for tag in values["tags"])
+    if names:
+        tags = resolve_tags(user_id, names)
+        db.session.flush()
+        tag_ids = {tag.name: tag.id for tag in tags}
+        links = [
+            {"entry_id": entry_id, "tag_id": tag_ids[name]}
+            for entry_id, values in zip(ids, batch)
+            for name in values["tags"]
+        ]
+        db.session.execute(insert(knowledge_entry_tags), links)
+    store_signatures(
+        KnowledgeEntry(id=entry_id, user_id=user_id, title=v["title"], content=v["content"], tags=v["tags"])
+        for entry_id, v in zip(ids, batch)
+    )
+    store_links(user_id, [(entry_id, values["links"]) for entry_id, values in zip(ids, batch)])
+    db.session.commit()
+    return len(ids)
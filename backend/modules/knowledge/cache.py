@@ -0,0 +1,72 @@
+"""Read-through cache for knowledge search results.
+
+Keys embed a per-user generation counter that every knowledge write bumps, so
+invalidation is a single INCR and stale pages simply age out.
+"""
+import hashlib
+import json
+from typing import Callable
+
+from flask import current_app
+from sqlalchemy import func
+
+from backend.common.cache import SharedCache
+from backend.extensions import db, get_redis
+from backend.modules.knowledge.models import KnowledgeEntry
+
+GENERATION_KEY = "knowledge:gen:{user_id}"
+SEARCH_KEY = "knowledge:search:{user_id}:{digest}"
+STATS_KEY = "knowledge:search:stats:{outcome}"
+
+_cache = SharedCache(local_maxsize=2000)
+
+
+def get_generation(user_id: int) -> int:
+    return int(_cache.get(GENERATION_KEY.format(user_id=user_id), 0))
+
+
+def bump_generation(user_id: int) -> int:
+    """Invalidate every cached search page of ``user_id``; returns the new generation."""
+    return _cache.incr(GENERATION_KEY.format(user_id=user_id))
+
+
+def collection_version(user_id: int) -> str:
+    """Version of a user's entry collection, for ETags on list responses.
+
+    With Redis the generation counter is shared and authoritative. Without it each
+    worker only sees its own bumps, so derive the version from the table instead
+    (count + max(updated_at), served by the (user_id, updated_at, id) index).
+    """
+    if get_redis() is not None:
+        return f"gen:{get_generation(user_id)}"
+    count, latest = (
+        db.session.query(func.count(KnowledgeEntry.id), func.max(KnowledgeEntry.updated_at))
+        .filter(KnowledgeEntry.user_id == user_id)
+        .one()
+    )
+    return f"rows:{count}:{latest}"
+
+
+def cached_search(user_id: int, params: dict, loader: Callable[[], dict], bypass: bool = False) -> tuple[dict, str]:
+    """Return ``(payload, outcome)`` where outcome is ``HIT``, ``MISS`` or ``BYPASS``."""
+    if bypass:
+        return loader(), "BYPASS"
+    generation = get_generation(user_id)
+    normalized = json.dumps({"gen": generation, **params}, sort_keys=True, ensure_ascii=False, default=str)
+    key = SEARCH_KEY.format(user_id=user_id, digest=hashlib.sha1(normalized.encode()).hexdigest())
+    payload = _cache.get(key)
+    outcome = "HIT" if payload is not None else "MISS"
+    _cache.incr(STATS_KEY.format(outcome=outcome.lower()))
+    if payload is None:
+        payload = loader()
+        _cache.set(
+            key,
+            payload,
+            ttl=current_app.config["KNOWLEDGE_SEARCH_CACHE_TTL"],
+            local_ttl=current_app.config["KNOWLEDGE_SEARCH_CACHE_LOCAL_TTL"],
+        )
+    return payload, outcome
+
+
+def cache_stats() -> dict:
+    return {outcome: int(_cache.get(STATS_KEY.format(outcome=outcome), 0)) for outcome in ("hit", "miss")}
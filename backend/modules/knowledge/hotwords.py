@@ -0,0 +1,169 @@
+"""Search hot words per user and across all users.
+
+Keyword searches are normalized and pushed onto a bounded in-process queue; a daemon
+thread drains it in batches so the search path only pays for a ``put_nowait`` (events
+are dropped, not waited on, when the queue is full). Counts live in one bucket per
+scope and UTC day: a Redis sorted set trimmed to a fixed size, or without Redis a
+:class:`~backend.common.sketch.SpaceSaving` sketch. Windows sum the last N buckets.
+"""
+import logging
+import queue
+import threading
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from flask import current_app
+from redis import RedisError
+
+from backend.common.cache import LocalCache
+from backend.common.sketch import SpaceSaving
+from backend.extensions import get_redis
+
+logger = logging.getLogger(__name__)
+
+HOT_WINDOWS = (1, 7, 30)
+HOT_KEY = "knowledge:hot:{scope}:{day}"
+GLOBAL_SCOPE = "global"
+# Redis buckets keep this many times the reported capacity so new terms can climb.
+_REDIS_TRIM_FACTOR = 2
+_BUCKET_TTL = timedelta(days=max(HOT_WINDOWS) + 1)
+_DRAIN_BATCH = 500
+# Counters kept per bucket, keyed by "is the global scope".
+_CAPACITY_KEYS = {True: "KNOWLEDGE_HOT_GLOBAL_CAPACITY", False: "KNOWLEDGE_HOT_USER_CAPACITY"}
+
+_queue: Optional[queue.Queue] = None
+_worker_lock = threading.Lock()
+_settings: dict = {}
+_dropped = 0
+# (scope, day) -> SpaceSaving; the LRU bounds how many buckets a worker keeps.
+_buckets = LocalCache(maxsize=20000)
+_buckets_lock = threading.Lock()
+
+
+def normalize_term(keyword: Optional[str], max_len: int) -> Optional[str]:
+    term = " ".join((keyword or "").casefold().split())[:max_len]
+    return term or None
+
+
+def record_search(user_id: int, keyword: Optional[str]) -> None:
+    """Queue a keyword search for counting; never blocks the caller."""
+    global _dropped
+    term = normalize_term(keyword, current_app.config["KNOWLEDGE_HOT_MAX_TERM_LEN"])
+    if term is None:
+        return
+    try:
+        _ensure_worker().put_nowait((user_id, term, datetime.utcnow().date()))
+    except queue.Full:
+        _dropped += 1
+
+
+def hot_terms(user_id: Optional[int], window: int, limit: int) -> list[tuple[str, int]]:
+    """Top ``limit`` terms over the last ``window`` UTC days, for one user or globally."""
+    scope = _scope(user_id)
+    capacity = _capacity(scope, current_app.config)
+    today = datetime.utcnow().date()
+    days = [today - timedelta(days=offset) for offset in range(window)]
+    totals: Counter = Counter()
+    redis = get_redis()
+    if redis is not None:
+        pipe = redis.pipeline()
+        for day in days:
+            pipe.zrevrange(_key(scope, day), 0, capacity - 1, withscores=True)
+        try:
+            for rows in pipe.execute():
+                for term, score in rows:
+                    totals[term.decode() if isinstance(term, bytes) else term] += int(score)
+        except RedisError:
+            logger.warning("hot words read failed for %s", scope, exc_info=True)
+            return []
+    else:
+        with _buckets_lock:
+            for day in days:
+                sketch = _buckets.get((scope, day))
+                if sketch is not None:
+                    totals.update(sketch.counts)
+    return sorted(totals.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]
+
+
+def flush() -> None:
+    """Block until every queued search has been counted."""
+    if _queue is not None:
+        _queue.join()
+
+
+def _ensure_worker() -> queue.Queue:
+    global _queue
+    if _queue is None:
+        with _worker_lock:
+            if _queue is None:
+                config = current_app.config
+                # The worker has no app context; it reads capacities from this snapshot.
+                _settings.update({key: config[key] for key in _CAPACITY_KEYS.values()})
+                events = queue.Queue(maxsize=config["KNOWLEDGE_HOT_QUEUE_SIZE"])
+                threading.Thread(target=_drain, args=(events,), name="hot-words", daemon=True).start()
+                _queue = events
+    return _queue
+
+
+def _drain(events: queue.Queue) -> None:
+    global _dropped
+    while True:
+        batch = [events.get()]
+        while len(batch) < _DRAIN_BATCH:
+            try:
+                batch.append(events.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            _write(batch)
+        except Exception:  # the worker must outlive any single bad batch
+            logger.exception("hot words batch of %d failed", len(batch))
+        finally:
+            for _ in batch:
+                events.task_done()
+        if _dropped:
+            logger.warning("hot words queue full, dropped %d searches", _dropped)
+            _dropped = 0
+
+
+def _write(batch: list[tuple[int, str, date]]) -> None:
+    counts: Counter = Counter()
+    for user_id, term, day in batch:
+        counts[(_scope(user_id), day, term)] += 1
+        counts[(GLOBAL_SCOPE, day, term)] += 1
+    redis = get_redis()
+    if redis is not None:
+        pipe = redis.pipeline(transaction=False)
+        buckets = set()
+        for (scope, day, term), count in counts.items():
+            pipe.zincrby(_key(scope, day), count, term)
+            buckets.add((scope, day))
+        for scope, day in buckets:
+            key = _key(scope, day)
+            pipe.zremrangebyrank(key, 0, -(_capacity(scope, _settings) * _REDIS_TRIM_FACTOR) - 1)
+            pipe.expire(key, _BUCKET_TTL)
+        try:
+            pipe.execute()
+        except RedisError:
+            logger.warning("hot words write failed, %d searches lost", len(batch), exc_info=True)
+        return
+    with _buckets_lock:
+        for (scope, day, term), count in counts.items():
+            sketch = _buckets.get((scope, day))
+            if sketch is None:
+                sketch = SpaceSaving(_capacity(scope, _settings))
+                _buckets.set((scope, day), sketch, ttl=_BUCKET_TTL.total_seconds())
+            sketch.add(term, count)
+
+
+def _scope(user_id: Optional[int]) -> str:
+    return GLOBAL_SCOPE if user_id is None else f"u{user_id}"
+
+
+def _capacity(scope: str, settings) -> int:
+    return settings[_CAPACITY_KEYS[scope == GLOBAL_SCOPE]]
+
+
+def _key(scope: str, day: date) -> str:
+    return HOT_KEY.format(scope=scope, day=day.strftime("%Y%m%d"))
@@ -0,0 +1,132 @@
+"""Backlink index over ``KnowledgeEntry.links``.
+
+Links stay free-form strings in the JSON column; the ones that point at another entry
+of the same user are mirrored into ``entry_links`` when an entry is written, so
+"what links here" and graph views are index lookups instead of scans.
+"""
+import re
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, insert, or_, select
+
+from backend.extensions import db
+from backend.modules.knowledge.models import KnowledgeEntry, entry_links
+
+# "42", "entry:42" or any URL/path ending in /knowledge/entries/42 (query/fragment allowed).
+# Ids beyond the 32-bit INTEGER range cannot name an entry; they are treated as external.
+MAX_ENTRY_ID = 2**31 - 1
+_ENTRY_REF = re.compile(r"^\s*(?:entry:)?(\d+)\s*$|/knowledge/entries/(\d+)/?(?:[?#].*)?\s*$")
+
+
+def parse_entry_ref(link) -> Optional[int]:
+    """Entry id referenced by ``link``, or ``None`` for external links."""
+    if isinstance(link, bool):
+        return None
+    if isinstance(link, int):
+        entry_id = link
+    else:
+        match = _ENTRY_REF.search(str(link))
+        if not match:
+            return None
+        entry_id = int(match.group(1) or match.group(2))
+    return entry_id if 0 < entry_id <= MAX_ENTRY_ID else None
+
+
+def store_links(user_id: int, sources: Iterable[tuple[int, Iterable]]) -> None:
+    """Replace the outgoing edges of each ``(source_id, links)`` pair in the current transaction.
+
+    Targets are checked against the user's entries with one ``IN`` query; dangling and
+    self references are dropped.
+    """
+    targets_by_source = {}
+    for source_id, links in sources:
+        refs = {parse_entry_ref(link) for link in links or []}
+        targets_by_source[source_id] = refs - {None, source_id}
+    if not targets_by_source:
+        return
+    db.session.execute(delete(entry_links).where(entry_links.c.source_id.in_(list(targets_by_source))))
+    candidates = set().union(*targets_by_source.values())
+    if not candidates:
+        return
+    owned = set(
+        db.session.scalars(
+            select(KnowledgeEntry.id).where(KnowledgeEntry.user_id == user_id, KnowledgeEntry.id.in_(candidates))
+        )
+    )
+    rows = [
+        {"source_id": source_id, "target_id": target_id}
+        for source_id, targets in targets_by_source.items()
+        for target_id in sorted(targets & owned)
+    ]
+    if rows:
+        db.session.execute(insert(entry_links), rows)
+
+
+def delete_links(entry_id: int) -> None:
+    """Drop every edge from or to ``entry_id``."""
+    db.session.execute(
+        delete(entry_links).where(or_(entry_links.c.source_id == entry_id, entry_links.c.target_id == entry_id))
+    )
+
+
+def backlink_ids(entry_id: int) -> list[int]:
+    return list(
+        db.session.scalars(
+            select(entry_links.c.source_id).where(entry_links.c.target_id == entry_id).order_by(entry_links.c.source_id)
+        )
+    )
+
+
+def neighbourhood(entry_id: int, depth: int, max_nodes: int) -> tuple[list[int], list[tuple[int, int]], bool]:
+    """Breadth-first walk over links in both directions, one indexed query per level.
+
+    Returns ``(node_ids, edges, truncated)`` where ``edges`` are all links among the
+    returned nodes; ``truncated`` is set when ``max_nodes`` cut the walk short.
+    """
+    seen = {entry_id}
+    frontier = {entry_id}
+    truncated = False
+    for _ in range(depth):
+        if not frontier:
+            break
+        rows = db.session.execute(
+            select(entry_links.c.source_id, entry_links.c.target_id).where(
+                or_(entry_links.c.source_id.in_(frontier), entry_links.c.target_id.in_(frontier))
+            )
+        ).all()
+        frontier = set()
+        for node in sorted({node for row in rows for node in row} - seen):
+            if len(seen) >= max_nodes:
+                truncated = True
+                break
+            seen.add(node)
+            frontier.add(node)
+    edges = db.session.execute(
+        select(entry_links.c.source_id, entry_links.c.target_id)
+        .where(entry_links.c.source_id.in_(seen), entry_links.c.target_id.in_(seen))
+        .order_by(entry_links.c.source_id, entry_links.c.target_id)
+    ).all()
+    return sorted(seen), [tuple(edge) for edge in edges], truncated
+
+
+def rebuild_links(batch_size: int = 500) -> int:
+    """Re-derive every edge from the JSON ``links`` column in id-ordered batches."""
+    processed, last_id = 0, 0
+    while True:
+        rows = db.session.execute(
+            select(KnowledgeEntry.id, KnowledgeEntry.user_id, KnowledgeEntry.links)
+            .where(KnowledgeEntry.id > last_id)
+            .order_by(KnowledgeEntry.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        by_user: dict[int, list] = {}
+        for entry_id, user_id, links in rows:
+            by_user.setdefault(user_id, []).append((entry_id, links))
+        for user_id, sources in by_user.items():
+            store_links(user_id, sources)
+        db.session.commit()
+        processed += len(rows)
+        last_id = rows[-1].id
+    return processed
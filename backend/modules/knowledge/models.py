@@ -1,6 +1,19 @@
 from datetime import datetime
+from typing import Iterable, Optional
 
+from backend.common.fields import serialize
 from backend.extensions import db
+from backend.modules.tag.models import Tag, knowledge_entry_tags
+
+
+# Entry -> entry references parsed from ``KnowledgeEntry.links``; see ``knowledge.links``.
+entry_links = db.Table(
+    "entry_links",
+    db.Column("source_id", db.Integer, db.ForeignKey("knowledge_entries.id", ondelete="CASCADE"), primary_key=True),
+    db.Column("target_id", db.Integer, db.ForeignKey("knowledge_entries.id", ondelete="CASCADE"), primary_key=True),
+    # target -> sources (backlinks); the primary key serves source -> targets.
+    db.Index("ix_entry_links_target_source", "target_id", "source_id"),
+)
 
 
 class Topic(db.Model):
@@ -15,6 +28,10 @@ class Topic(db.Model):
 
 class KnowledgeEntry(db.Model):
     __tablename__ = "knowledge_entries"
+    __table_args__ = (
+        # Serves the default listing order and keyset pagination.
+        db.Index("ix_knowledge_entries_user_updated", "user_id", "updated_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
@@ -27,15 +44,37 @@ class KnowledgeEntry(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     topic = db.relationship("Topic", backref="entries")
+    # Normalized mirror of ``tags`` used for indexed filtering and counts.
+    tag_refs = db.relationship(Tag, secondary=knowledge_entry_tags, lazy="select")
+    # Populated only by queries that ask for it, e.g. SUBSTR(content) on list pages.
+    snippet = db.query_expression()
+
+    def as_dict(self, fields: Optional[Iterable[str]] = None) -> dict:
+        """Serialize the entry; with ``fields`` only those attributes are read."""
+        return serialize(self, _ENTRY_SERIALIZERS, fields or ENTRY_FIELDS)
+
+
+_ENTRY_SERIALIZERS = {
+    "id": lambda e: e.id,
+    "title": lambda e: e.title,
+    "content": lambda e: e.content,
+    "tags": lambda e: e.tags or [],
+    "links": lambda e: e.links or [],
+    "topic_id": lambda e: e.topic_id,
+    "created_at": lambda e: e.created_at.isoformat(),
+    "updated_at": lambda e: e.updated_at.isoformat(),
+}
+# Selectable through ``fields=``; "snippet" is added when ``snippet_len`` is given.
+ENTRY_FIELDS = tuple(_ENTRY_SERIALIZERS)
+_ENTRY_SERIALIZERS["snippet"] = lambda e: e.snippet
 
-    def as_dict(self) -> dict:
-        return {
-            "id": self.id,
-            "title": self.title,
-            "content": self.content,
-            "tags": self.tags or [],
-            "links": self.links or [],
-            "topic_id": self.topic_id,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat(),
-        }
+
+class EntrySignature(db.Model):
+    """MinHash signature of an entry, maintained on write for related-entry lookups."""
+
+    __tablename__ = "knowledge_entry_signatures"
+
+    entry_id = db.Column(db.Integer, db.ForeignKey("knowledge_entries.id", ondelete="CASCADE"), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    # NUM_PERM little-endian uint32 values, see ``knowledge.related``.
+    signature = db.Column(db.LargeBinary, nullable=False)
@@ -0,0 +1,132 @@
+"""Related-entry suggestions from MinHash signatures.
+
+Each entry gets a fixed-size MinHash signature over character trigrams of its title
+and content plus its tags, computed with NumPy when the entry is written and stored
+in ``knowledge_entry_signatures``. Workers load a user's signatures into one matrix
+(cached per process, keyed by the knowledge generation) and answer "related to X"
+with a single vectorized comparison, so nothing is re-hashed on startup.
+"""
+import zlib
+from typing import Iterable, Optional
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import delete, insert, select
+
+from backend.common.cache import LocalCache
+from backend.extensions import db
+from backend.modules.knowledge.cache import get_generation
+from backend.modules.knowledge.models import EntrySignature, KnowledgeEntry
+
+NUM_PERM = 64
+SHINGLE_SIZE = 3
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.RandomState(20240601)
+# Fixed seeds: signatures must stay comparable across processes and restarts.
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERM).astype(np.uint64)
+_EMPTY = np.full(NUM_PERM, np.iinfo(np.uint32).max, dtype=np.uint32)
+# Features hashed per step; bounds the NUM_PERM x chunk temporaries (~2 MiB each).
+_FEATURE_CHUNK = 4096
+
+# user_id -> (generation, entry ids, signature matrix)
+_indexes = LocalCache(maxsize=64)
+
+
+def compute_signature(title: str, content: str, tags: Iterable[str]) -> np.ndarray:
+    shingles = _shingle_hashes(f"{title}\n{content}")
+    tag_hashes = np.array([zlib.crc32(f"tag:{t.lower()}".encode()) for t in tags or []], dtype=np.uint64)
+    features = np.unique(np.concatenate([shingles, tag_hashes]))
+    if features.size == 0:
+        return _EMPTY.copy()
+    # (a * x + b) mod p for every permutation x feature, then the min per permutation,
+    # kept as a running minimum over chunks so long notes never build the full matrix.
+    minima = np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+    for start in range(0, features.size, _FEATURE_CHUNK):
+        chunk = features[None, start : start + _FEATURE_CHUNK]
+        hashed = (_PERM_A[:, None] * chunk + _PERM_B[:, None]) % _MERSENNE_PRIME
+        np.minimum(minima, hashed.min(axis=1), out=minima)
+    return (minima & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+def store_signatures(entries: Iterable[KnowledgeEntry]) -> None:
+    """Upsert signatures for ``entries`` in the current transaction."""
+    rows = [
+        {
+            "entry_id": e.id,
+            "user_id": e.user_id,
+            "signature": compute_signature(e.title, e.content, e.tags).tobytes(),
+        }
+        for e in entries
+    ]
+    if not rows:
+        return
+    db.session.execute(delete(EntrySignature).where(EntrySignature.entry_id.in_([r["entry_id"] for r in rows])))
+    db.session.execute(insert(EntrySignature), rows)
+
+
+def delete_signature(entry_id: int) -> None:
+    db.session.execute(delete(EntrySignature).where(EntrySignature.entry_id == entry_id))
+
+
+def related_entries(user_id: int, entry_id: int, k: int) -> list[tuple[int, float]]:
+    """Top ``k`` ``(entry_id, similarity)`` pairs for ``entry_id``, most similar first."""
+    ids, matrix = _user_index(user_id)
+    positions = np.flatnonzero(ids == entry_id)
+    if positions.size == 0 or ids.size <= 1:
+        return []
+    scores = (matrix == matrix[positions[0]]).mean(axis=1)
+    scores[positions[0]] = -1.0
+    k = min(k, ids.size - 1)
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return [(int(ids[i]), round(float(scores[i]), 4)) for i in top if scores[i] > 0]
+
+
+def rebuild_signatures(batch_size: int = 500, user_id: Optional[int] = None) -> int:
+    """Recompute every stored signature (or one user's) in id-ordered batches."""
+    processed, last_id = 0, 0
+    while True:
+        stmt = select(KnowledgeEntry).where(KnowledgeEntry.id > last_id).order_by(KnowledgeEntry.id).limit(batch_size)
+        if user_id is not None:
+            stmt = stmt.where(KnowledgeEntry.user_id == user_id)
+        entries = db.session.scalars(stmt).all()
+        if not entries:
+            break
+        store_signatures(entries)
+        db.session.commit()
+        processed += len(entries)
+        last_id = entries[-1].id
+    _indexes.clear()
+    return processed
+
+
+def _user_index(user_id: int) -> tuple[np.ndarray, np.ndarray]:
+    generation = get_generation(user_id)
+    cached = _indexes.get(user_id)
+    if cached is not None and cached[0] == generation:
+        return cached[1], cached[2]
+    rows = db.session.execute(
+        select(EntrySignature.entry_id, EntrySignature.signature)
+        .where(EntrySignature.user_id == user_id)
+        .order_by(EntrySignature.entry_id)
+    ).all()
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    matrix = np.frombuffer(b"".join(r[1] for r in rows), dtype=np.uint32).reshape(len(rows), NUM_PERM)
+    # Without Redis other workers' writes do not bump our generation; the TTL bounds staleness.
+    _indexes.set(user_id, (generation, ids, matrix), ttl=current_app.config["KNOWLEDGE_RELATED_INDEX_TTL"])
+    return ids, matrix
+
+
+def _shingle_hashes(text: str) -> np.ndarray:
+    """Vectorized hashes of all character trigrams of the normalized text."""
+    normalized = " ".join(text.lower().split())
+    codes = np.frombuffer(normalized.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if codes.size < SHINGLE_SIZE:
+        return codes
+    # Polynomial hash over a sliding window, kept within 32 bits.
+    base = np.uint64(1_000_003)
+    hashes = np.zeros(codes.size - SHINGLE_SIZE + 1, dtype=np.uint64)
+    for offset in range(SHINGLE_SIZE):
+        hashes = (hashes * base + codes[offset : offset + hashes.size]) & np.uint64(0xFFFFFFFF)
+    return hashes
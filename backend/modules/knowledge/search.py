@@ -0,0 +1,110 @@
+"""Full-text search over knowledge entries.
+
+SQLite keeps an FTS5 shadow table (trigram tokenizer, so substring and CJK matches
+behave like the old ``ILIKE '%kw%'``) synced by triggers. Postgres keeps a generated
+``tsvector`` column with a GIN index. Other dialects, and keywords too short for a
+trigram, fall back to ``ILIKE``.
+"""
+from typing import Optional
+
+from flask import current_app
+from sqlalchemy import event, func, inspect, literal_column, or_, select, text
+
+from backend.extensions import db
+from backend.modules.knowledge.models import KnowledgeEntry
+
+FTS_TABLE = "knowledge_entries_fts"
+TSVECTOR_COLUMN = "search_vector"
+# bm25() weights for (title, content); title hits rank higher.
+FTS_WEIGHTS = (10.0, 1.0)
+
+_SQLITE_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "title, content, content='knowledge_entries', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON knowledge_entries BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON knowledge_entries BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); "
+    "END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, content ON knowledge_entries BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+]
+
+_POSTGRES_DDL = [
+    f"ALTER TABLE knowledge_entries ADD COLUMN IF NOT EXISTS {TSVECTOR_COLUMN} tsvector "
+    "GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(content, '')), 'B')) STORED",
+    f"CREATE INDEX IF NOT EXISTS ix_knowledge_entries_{TSVECTOR_COLUMN} "
+    f"ON knowledge_entries USING GIN ({TSVECTOR_COLUMN})",
+]
+
+# engine url -> backend name ("fts5", "tsvector" or None), resolved once per process.
+_backends: dict[str, Optional[str]] = {}
+
+
+@event.listens_for(KnowledgeEntry.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    install_search_index(connection)
+
+
+def install_search_index(connection) -> None:
+    """Create the dialect's search structures if missing (idempotent)."""
+    statements = {"sqlite": _SQLITE_DDL, "postgresql": _POSTGRES_DDL}.get(connection.dialect.name, [])
+    for statement in statements:
+        connection.execute(text(statement))
+    _backends.pop(str(connection.engine.url), None)
+
+
+def rebuild_search_index() -> None:
+    """Install the index on an existing database and re-index every entry."""
+    with db.engine.begin() as connection:
+        install_search_index(connection)
+        if connection.dialect.name == "sqlite":
+            connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def apply_keyword_filter(query, keyword: str):
+    """Restrict ``query`` to entries matching ``keyword``.
+
+    Returns ``(query, rank)`` where ``rank`` is an ORDER BY clause for relevance
+    ranking, or ``None`` when the fallback matcher cannot rank.
+    """
+    backend = _search_backend()
+    if backend == "fts5" and len(keyword) >= 3:
+        match = select(
+            literal_column("rowid").label("entry_id"),
+            func.bm25(literal_column(FTS_TABLE), *FTS_WEIGHTS).label("rank"),
+        ).select_from(text(FTS_TABLE)).where(literal_column(FTS_TABLE).op("MATCH")(_fts_phrase(keyword)))
+        hits = match.subquery()
+        return query.join(hits, hits.c.entry_id == KnowledgeEntry.id), hits.c.rank.asc()
+    if backend == "tsvector":
+        vector = literal_column(f"knowledge_entries.{TSVECTOR_COLUMN}")
+        ts_query = func.plainto_tsquery("simple", keyword)
+        return query.filter(vector.op("@@")(ts_query)), func.ts_rank(vector, ts_query).desc()
+    like = f"%{keyword}%"
+    return query.filter(or_(KnowledgeEntry.title.ilike(like), KnowledgeEntry.content.ilike(like))), None
+
+
+def _fts_phrase(keyword: str) -> str:
+    # A quoted phrase is matched literally; with the trigram tokenizer that is a substring match.
+    return '"' + keyword.replace('"', '""') + '"'
+
+
+def _search_backend() -> Optional[str]:
+    engine = db.engine
+    key = str(engine.url)
+    if key not in _backends:
+        inspector = inspect(engine)
+        backend = None
+        if engine.dialect.name == "sqlite" and inspector.has_table(FTS_TABLE):
+            backend = "fts5"
+        elif engine.dialect.name == "postgresql" and any(
+            c["name"] == TSVECTOR_COLUMN for c in inspector.get_columns("knowledge_entries")
+        ):
+            backend = "tsvector"
+        if backend is None:
+            current_app.logger.warning("full-text index missing, keyword search falls back to ILIKE")
+        _backends[key] = backend
+    return _backends[key]
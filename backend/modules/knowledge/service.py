@@ -1,12 +1,27 @@
 from datetime import datetime
 from typing import Iterable, Optional
 
-from flask import abort
-from sqlalchemy import or_
+from flask import abort, current_app
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import load_only, with_expression
 
 from backend.common.errors import AppError
+from backend.common.pagination import decode_cursor, encode_cursor
 from backend.extensions import db
-from backend.modules.knowledge.models import KnowledgeEntry, Topic
+from backend.modules.knowledge.cache import bump_generation, cached_search
+from backend.modules.knowledge.hotwords import HOT_WINDOWS, hot_terms, record_search
+from backend.modules.knowledge.models import ENTRY_FIELDS, KnowledgeEntry, Topic
+from backend.modules.knowledge.links import backlink_ids, delete_links, neighbourhood, store_links
+from backend.modules.knowledge.related import delete_signature, related_entries, store_signatures
+from backend.modules.knowledge.search import apply_keyword_filter
+from backend.modules.knowledge.suggest import SUGGEST_KINDS, entry_changed, snapshot, suggest, topic_changed
+from backend.modules.review.service import bump_generation as bump_review_generation, delete_review_state
+from backend.modules.tag.models import knowledge_entry_tags
+from backend.modules.tag.service import entry_tag_counts, parse_tags, resolve_tags, tag_filter
+
+ENTRY_SORTS = {"updated_at", "relevance"}
+MAX_SNIPPET_LEN = 2000
+GRAPH_NODE_FIELDS = ("id", "title", "topic_id", "updated_at")
 
 
 def list_topics(user_id: int) -> Iterable[Topic]:
@@ -20,6 +35,7 @@ def create_topic(user_id: int, payload: dict) -> Topic:
     topic = Topic(user_id=user_id, name=name, desc=payload.get("desc"))
     db.session.add(topic)
     db.session.commit()
+    topic_changed(user_id, bump_generation(user_id), topic.id, topic.name)
     return topic
 
 
@@ -33,6 +49,7 @@ def update_topic(user_id: int, topic_id: int, payload: dict) -> Topic:
     if "desc" in payload:
         topic.desc = payload.get("desc")
     db.session.commit()
+    topic_changed(user_id, bump_generation(user_id), topic.id, topic.name)
     return topic
 
 
@@ -40,28 +57,154 @@ def delete_topic(user_id: int, topic_id: int) -> None:
     topic = _get_topic(user_id, topic_id)
     db.session.delete(topic)
     db.session.commit()
+    topic_changed(user_id, bump_generation(user_id), topic_id, None)
+
+
+def list_entries(
+    user_id: int,
+    filters: dict,
+    page: int,
+    page_size: int,
+    sort: str = "updated_at",
+    cursor: Optional[str] = None,
+    with_total: bool = True,
+    fields: Optional[list[str]] = None,
+    snippet_len: Optional[int] = None,
+):
+    """Return ``(total, items, next_cursor)``.
 
+    With ``cursor`` the page starts after that ``(updated_at, id)`` position instead
+    of at ``OFFSET``; ``next_cursor`` is ``None`` on the last page or when ranking by
+    relevance. ``total`` is ``None`` when ``with_total`` is false.
 
-def list_entries(user_id: int, filters: dict, page: int, page_size: int):
+    ``fields`` limits the columns read from the database; ``snippet_len`` loads the
+    first N characters of ``content`` into ``entry.snippet`` without reading the rest.
+    """
+    if sort not in ENTRY_SORTS:
+        raise AppError(code=1001, message="invalid_sort", status_code=400)
+    if not 1 <= page_size <= current_app.config["KNOWLEDGE_MAX_PAGE_SIZE"]:
+        raise AppError(code=1001, message="invalid_page_size", status_code=400)
+    position = decode_cursor(cursor)
+    if position and sort == "relevance":
+        raise AppError(code=1001, message="cursor_requires_updated_at_sort", status_code=400)
     query = KnowledgeEntry.query.filter_by(user_id=user_id)
-    keyword = filters.get("keyword")
+    rank = None
+    keyword = (filters.get("keyword") or "").strip()
     if keyword:
-        like = f"%{keyword}%"
-        query = query.filter(or_(KnowledgeEntry.title.ilike(like), KnowledgeEntry.content.ilike(like)))
+        query, rank = apply_keyword_filter(query, keyword)
     tag = filters.get("tag")
     if tag:
-        query = query.filter(KnowledgeEntry.tags.contains([tag]))
+        query = tag_filter(query, knowledge_entry_tags, KnowledgeEntry.id, user_id, tag)
     topic_id = filters.get("topic_id")
     if topic_id:
         query = query.filter(KnowledgeEntry.topic_id == topic_id)
-    total = query.count()
-    items = (
-        query.order_by(KnowledgeEntry.updated_at.desc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
-    )
-    return total, items
+    total = query.count() if with_total else None
+    order_by = [KnowledgeEntry.updated_at.desc(), KnowledgeEntry.id.desc()]
+    if sort == "relevance" and rank is not None:
+        order_by.insert(0, rank)
+    query = query.order_by(*order_by)
+    # id/updated_at are always needed for ordering and the next cursor.
+    query = _select_fields(query, fields, snippet_len, required=("id", "updated_at"))
+    if position:
+        query = query.filter(tuple_(KnowledgeEntry.updated_at, KnowledgeEntry.id) < tuple_(*position))
+    else:
+        query = query.offset((page - 1) * page_size)
+    # One extra row tells us whether another page exists without counting.
+    items = query.limit(page_size + 1).all()
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        if sort == "updated_at":
+            next_cursor = encode_cursor(items[-1].updated_at, items[-1].id)
+    return total, items, next_cursor
+
+
+def search_entries(
+    user_id: int,
+    filters: dict,
+    page: int,
+    page_size: int,
+    sort: str = "updated_at",
+    cursor: Optional[str] = None,
+    with_total: bool = True,
+    fields: Optional[list[str]] = None,
+    snippet_len: Optional[int] = None,
+    bypass_cache: bool = False,
+) -> tuple[dict, str]:
+    """Serialized :func:`list_entries` page behind the versioned search cache.
+
+    Returns ``(payload, cache_outcome)``.
+    """
+    params = {
+        "keyword": (filters.get("keyword") or "").strip().lower() or None,
+        "tag": filters.get("tag") or None,
+        "topic_id": filters.get("topic_id") or None,
+        "page": page,
+        "page_size": page_size,
+        "sort": sort,
+        "cursor": cursor,
+        "with_total": with_total,
+        "fields": fields,
+        "snippet_len": snippet_len,
+    }
+    output_fields = list(fields or ENTRY_FIELDS) + (["snippet"] if snippet_len else [])
+    if params["keyword"] and page == 1 and not cursor:
+        # Only a search's first page counts; paging through results is not a new search.
+        record_search(user_id, params["keyword"])
+
+    def _load() -> dict:
+        total, items, next_cursor = list_entries(
+            user_id,
+            filters,
+            page,
+            page_size,
+            sort=sort,
+            cursor=cursor,
+            with_total=with_total,
+            fields=fields,
+            snippet_len=snippet_len,
+        )
+        return {
+            "items": [e.as_dict(output_fields) for e in items],
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "next_cursor": next_cursor,
+        }
+
+    return cached_search(user_id, params, _load, bypass=bypass_cache)
+
+
+def get_entries_batch(
+    user_id: int, ids: list[int], fields: Optional[list[str]] = None, snippet_len: Optional[int] = None
+) -> tuple[list[KnowledgeEntry], list[int]]:
+    """Load many entries with one ``IN`` query; returns ``(found_in_request_order, missing_ids)``."""
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise AppError(code=1001, message="missing_ids", status_code=400)
+    if len(ids) > current_app.config["KNOWLEDGE_BATCH_MAX_IDS"]:
+        raise AppError(code=1001, message="too_many_ids", status_code=400)
+    query = KnowledgeEntry.query.filter(KnowledgeEntry.user_id == user_id, KnowledgeEntry.id.in_(ids))
+    by_id = {entry.id: entry for entry in _select_fields(query, fields, snippet_len)}
+    return [by_id[i] for i in ids if i in by_id], [i for i in ids if i not in by_id]
+
+
+def _select_fields(query, fields: Optional[list[str]], snippet_len: Optional[int], required=("id",)):
+    """Restrict loaded columns to ``fields`` and optionally load a content snippet."""
+    if snippet_len is not None and not 0 < snippet_len <= MAX_SNIPPET_LEN:
+        raise AppError(code=1001, message="invalid_snippet_len", status_code=400)
+    if fields:
+        columns = set(fields) | set(required)
+        query = query.options(load_only(*(getattr(KnowledgeEntry, c) for c in columns)))
+    if snippet_len:
+        query = query.options(
+            with_expression(KnowledgeEntry.snippet, func.substr(KnowledgeEntry.content, 1, snippet_len))
+        )
+    return query
+
+
+def list_tag_counts(user_id: int) -> list[tuple[str, int]]:
+    return entry_tag_counts(user_id)
 
 
 def create_entry(user_id: int, payload: dict) -> KnowledgeEntry:
@@ -72,21 +215,28 @@ def create_entry(user_id: int, payload: dict) -> KnowledgeEntry:
     topic_id = payload.get("topic_id")
     if topic_id:
         _get_topic(user_id, topic_id)
+    tags = parse_tags(payload.get("tags"))
     entry = KnowledgeEntry(
         user_id=user_id,
         topic_id=topic_id,
         title=title,
         content=content,
-        tags=payload.get("tags") or [],
+        tags=tags,
         links=payload.get("links") or [],
     )
+    entry.tag_refs = resolve_tags(user_id, tags)
     db.session.add(entry)
+    db.session.flush()
+    store_signatures([entry])
+    store_links(user_id, [(entry.id, entry.links)])
     db.session.commit()
+    entry_changed(user_id, bump_generation(user_id), None, snapshot(entry))
     return entry
 
 
 def update_entry(user_id: int, entry_id: int, payload: dict) -> KnowledgeEntry:
     entry = _get_entry(user_id, entry_id)
+    before = snapshot(entry)
     if "title" in payload:
         title = (payload.get("title") or "").strip()
         if not title:
@@ -98,7 +248,8 @@ def update_entry(user_id: int, entry_id: int, payload: dict) -> KnowledgeEntry:
             raise AppError(code=3101, message="missing_title_or_content", status_code=400)
         entry.content = content
     if "tags" in payload:
-        entry.tags = payload.get("tags") or []
+        entry.tags = parse_tags(payload.get("tags"))
+        entry.tag_refs = resolve_tags(user_id, entry.tags)
     if "links" in payload:
         entry.links = payload.get("links") or []
     if "topic_id" in payload:
@@ -106,14 +257,106 @@ def update_entry(user_id: int, entry_id: int, payload: dict) -> KnowledgeEntry:
         if topic_id:
             _get_topic(user_id, topic_id)
         entry.topic_id = topic_id
+    if {"title", "content", "tags"} & payload.keys():
+        store_signatures([entry])
+    if "links" in payload:
+        store_links(user_id, [(entry.id, entry.links)])
     db.session.commit()
+    entry_changed(user_id, bump_generation(user_id), before, snapshot(entry))
     return entry
 
 
 def delete_entry(user_id: int, entry_id: int) -> None:
     entry = _get_entry(user_id, entry_id)
+    before = snapshot(entry)
+    delete_signature(entry.id)
+    delete_links(entry.id)
+    delete_review_state(entry.id)
     db.session.delete(entry)
     db.session.commit()
+    entry_changed(user_id, bump_generation(user_id), before, None)
+    bump_review_generation(user_id)
+
+
+def list_hot_terms(user_id: Optional[int], window: int, limit: int) -> list[dict]:
+    """Most searched keywords over the last ``window`` days, for one user or (``None``) everyone.
+
+    Global terms include other users' searches, so only the CLI asks for them.
+    """
+    if window not in HOT_WINDOWS:
+        raise AppError(code=1001, message="invalid_window", status_code=400)
+    if not 1 <= limit <= current_app.config["KNOWLEDGE_HOT_MAX_LIMIT"]:
+        raise AppError(code=1001, message="invalid_limit", status_code=400)
+    terms = hot_terms(user_id, window, limit)
+    return [{"term": term, "count": count} for term, count in terms]
+
+
+def suggest_values(user_id: int, prefix: str, kind: str, limit: int) -> list[dict]:
+    """Autocomplete ``prefix`` against the user's tags, entry titles or topic names."""
+    if kind not in SUGGEST_KINDS:
+        raise AppError(code=1001, message="invalid_kind", status_code=400)
+    if not 1 <= limit <= current_app.config["KNOWLEDGE_SUGGEST_MAX_LIMIT"]:
+        raise AppError(code=1001, message="invalid_limit", status_code=400)
+    return suggest(user_id, prefix.strip(), kind, limit)
+
+
+def list_related_entries(user_id: int, entry_id: int, k: int) -> list[dict]:
+    """Entries most similar to ``entry_id`` by content and tags, with a 0..1 ``score``."""
+    if k < 1 or k > current_app.config["KNOWLEDGE_RELATED_MAX_K"]:
+        raise AppError(code=1001, message="invalid_k", status_code=400)
+    _get_entry(user_id, entry_id)
+    scored = related_entries(user_id, entry_id, k)
+    if not scored:
+        return []
+    rows = (
+        db.session.query(KnowledgeEntry)
+        .options(load_only(KnowledgeEntry.id, KnowledgeEntry.title, KnowledgeEntry.topic_id, KnowledgeEntry.tags))
+        .filter(KnowledgeEntry.user_id == user_id, KnowledgeEntry.id.in_([eid for eid, _ in scored]))
+    )
+    by_id = {e.id: e for e in rows}
+    return [
+        {**by_id[eid].as_dict(("id", "title", "topic_id", "tags")), "score": score}
+        for eid, score in scored
+        if eid in by_id
+    ]
+
+
+def list_backlinks(user_id: int, entry_id: int) -> list[KnowledgeEntry]:
+    """Entries whose ``links`` reference ``entry_id``."""
+    _get_entry(user_id, entry_id)
+    return _entries_by_ids(user_id, backlink_ids(entry_id))
+
+
+def entry_graph(user_id: int, entry_id: int, depth: int) -> dict:
+    """Entries within ``depth`` link hops of ``entry_id`` (either direction) and the edges between them."""
+    if not 1 <= depth <= current_app.config["KNOWLEDGE_GRAPH_MAX_DEPTH"]:
+        raise AppError(code=1001, message="invalid_depth", status_code=400)
+    _get_entry(user_id, entry_id)
+    node_ids, edges, truncated = neighbourhood(entry_id, depth, current_app.config["KNOWLEDGE_GRAPH_MAX_NODES"])
+    nodes = _entries_by_ids(user_id, node_ids)
+    return {
+        "nodes": [e.as_dict(GRAPH_NODE_FIELDS) for e in nodes],
+        "edges": [{"source": source, "target": target} for source, target in edges],
+        "truncated": truncated,
+    }
+
+
+def _entries_by_ids(user_id: int, ids: list[int]) -> list[KnowledgeEntry]:
+    if not ids:
+        return []
+    query = KnowledgeEntry.query.filter(KnowledgeEntry.user_id == user_id, KnowledgeEntry.id.in_(ids))
+    by_id = {e.id: e for e in query.options(load_only(*(getattr(KnowledgeEntry, f) for f in GRAPH_NODE_FIELDS)))}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def entry_version(user_id: int, entry_id: int) -> Optional[str]:
+    """``id:updated_at`` of an entry without loading the row, or ``None`` if missing."""
+    row = (
+        db.session.query(KnowledgeEntry.id, KnowledgeEntry.updated_at)
+        .filter_by(id=entry_id, user_id=user_id)
+        .first()
+    )
+    return f"{row.id}:{row.updated_at.isoformat()}" if row else None
 
 
 def _get_topic(user_id: int, topic_id: int) -> Topic:
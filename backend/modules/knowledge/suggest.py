@@ -0,0 +1,195 @@
+"""Prefix autocomplete for tags, entry titles and topic names.
+
+Each worker keeps, for its most recently active users, one sorted key list per kind
+and answers a prefix query with two bisects plus a top-k by usage weight (entries per
+tag/topic, study logs per title). The knowledge service applies its writes to the
+loaded index in place; an index whose generation falls behind (another worker wrote)
+is rebuilt from three aggregate queries on next use.
+"""
+import heapq
+import threading
+from bisect import bisect_left, insort
+from typing import Iterable, NamedTuple, Optional
+
+from flask import current_app
+from sqlalchemy import func
+
+from backend.common.cache import LocalCache
+from backend.extensions import db
+from backend.modules.knowledge.cache import get_generation
+from backend.modules.knowledge.models import KnowledgeEntry, Topic
+from backend.modules.study_log.models import StudyLog
+from backend.modules.tag.service import entry_tag_counts
+
+SUGGEST_KINDS = ("tag", "title", "topic")
+
+_indexes = LocalCache(maxsize=256)
+
+
+class EntrySnapshot(NamedTuple):
+    id: int
+    title: str
+    tags: tuple
+    topic_id: Optional[int]
+
+
+def snapshot(entry: KnowledgeEntry) -> EntrySnapshot:
+    return EntrySnapshot(entry.id, entry.title, tuple(entry.tags or ()), entry.topic_id)
+
+
+class PrefixIndex:
+    """Case-insensitive sorted index of ``ident -> (label, weight)``."""
+
+    def __init__(self):
+        self._keys: list[tuple[str, object]] = []
+        self._items: dict[object, tuple[str, int]] = {}
+
+    def set(self, ident, label: str, weight: Optional[int] = None) -> None:
+        """Insert or relabel ``ident``; ``weight=None`` keeps the current weight."""
+        current = self._items.get(ident)
+        if current is not None:
+            if weight is None:
+                weight = current[1]
+            self._keys.pop(bisect_left(self._keys, (current[0].casefold(), ident)))
+        insort(self._keys, (label.casefold(), ident))
+        self._items[ident] = (label, weight or 0)
+
+    def add(self, ident, delta: int, label: Optional[str] = None, drop_empty: bool = False) -> None:
+        current = self._items.get(ident)
+        if current is None:
+            if label is not None and delta > 0:
+                self.set(ident, label, delta)
+            return
+        weight = current[1] + delta
+        if weight <= 0 and drop_empty:
+            self.remove(ident)
+        else:
+            self._items[ident] = (current[0], max(weight, 0))
+
+    def remove(self, ident) -> None:
+        current = self._items.pop(ident, None)
+        if current is not None:
+            self._keys.pop(bisect_left(self._keys, (current[0].casefold(), ident)))
+
+    def search(self, prefix: str, limit: int) -> list[tuple[object, str, int]]:
+        """Heaviest ``limit`` items whose label starts with ``prefix``, then alphabetical."""
+        prefix = prefix.casefold()
+        lo = bisect_left(self._keys, (prefix,))
+        hi = bisect_left(self._keys, (prefix + "\U0010ffff",), lo)
+        top = heapq.nsmallest(
+            limit, self._keys[lo:hi], key=lambda key: (-self._items[key[1]][1], key[0])
+        )
+        return [(ident, self._items[ident][0], self._items[ident][1]) for _, ident in top]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class _UserIndex:
+    def __init__(self, generation: int):
+        self.generation = generation
+        self.lock = threading.Lock()
+        self.kinds = {kind: PrefixIndex() for kind in SUGGEST_KINDS}
+
+
+def suggest(user_id: int, prefix: str, kind: str, limit: int) -> list[dict]:
+    index = _user_index(user_id)
+    with index.lock:
+        hits = index.kinds[kind].search(prefix, limit)
+    if kind == "tag":
+        return [{"value": label, "count": weight} for _, label, weight in hits]
+    return [{"id": ident, "value": label, "count": weight} for ident, label, weight in hits]
+
+
+def entry_changed(
+    user_id: int, generation: int, before: Optional[EntrySnapshot], after: Optional[EntrySnapshot]
+) -> None:
+    """Apply an entry create (``before=None``), update or delete (``after=None``)."""
+
+    def apply(index: _UserIndex) -> None:
+        tags, titles, topics = (index.kinds[k] for k in ("tag", "title", "topic"))
+        if before is not None:
+            for tag in before.tags:
+                tags.add(tag, -1, drop_empty=True)
+            if before.topic_id is not None:
+                topics.add(before.topic_id, -1)
+        if after is not None:
+            for tag in after.tags:
+                tags.add(tag, 1, label=tag)
+            if after.topic_id is not None:
+                topics.add(after.topic_id, 1)
+            if before is None or before.title != after.title:
+                titles.set(after.id, after.title)
+        else:
+            titles.remove(before.id)
+
+    _apply(user_id, generation, apply)
+
+
+def topic_changed(user_id: int, generation: int, topic_id: int, name: Optional[str]) -> None:
+    """Apply a topic create/rename, or a delete when ``name`` is ``None``."""
+
+    def apply(index: _UserIndex) -> None:
+        if name is None:
+            index.kinds["topic"].remove(topic_id)
+        else:
+            index.kinds["topic"].set(topic_id, name)
+
+    _apply(user_id, generation, apply)
+
+
+def record_study(user_id: int, entry_ids: Iterable[int]) -> None:
+    """Count study logs towards title ranking; study logs do not bump the generation."""
+    index = _indexes.get(user_id)
+    if index is None:
+        return
+    with index.lock:
+        for entry_id in entry_ids:
+            index.kinds["title"].add(entry_id, 1)
+
+
+def invalidate(user_id: int) -> None:
+    _indexes.delete(user_id)
+
+
+def _apply(user_id: int, generation: int, apply) -> None:
+    """Patch the loaded index if it is exactly one write behind ``generation``, else drop it."""
+    index = _indexes.get(user_id)
+    if index is None:
+        return
+    with index.lock:
+        if index.generation == generation - 1:
+            apply(index)
+            index.generation = generation
+            return
+    _indexes.delete(user_id)
+
+
+def _user_index(user_id: int) -> _UserIndex:
+    generation = get_generation(user_id)
+    index = _indexes.get(user_id)
+    if index is not None and index.generation == generation:
+        return index
+    index = _UserIndex(generation)
+    tags, titles, topics = (index.kinds[k] for k in ("tag", "title", "topic"))
+    for name, count in entry_tag_counts(user_id):
+        tags.set(name, name, count)
+    topic_rows = (
+        db.session.query(Topic.id, Topic.name, func.count(KnowledgeEntry.id))
+        .outerjoin(KnowledgeEntry, KnowledgeEntry.topic_id == Topic.id)
+        .filter(Topic.user_id == user_id)
+        .group_by(Topic.id, Topic.name)
+    )
+    for topic_id, name, count in topic_rows:
+        topics.set(topic_id, name, count)
+    title_rows = (
+        db.session.query(KnowledgeEntry.id, KnowledgeEntry.title, func.count(StudyLog.id))
+        .outerjoin(StudyLog, StudyLog.entry_id == KnowledgeEntry.id)
+        .filter(KnowledgeEntry.user_id == user_id)
+        .group_by(KnowledgeEntry.id, KnowledgeEntry.title)
+    )
+    for entry_id, title, count in title_rows:
+        titles.set(entry_id, title, count)
+    # Without Redis other workers' writes never reach this generation; the TTL bounds staleness.
+    _indexes.set(user_id, index, ttl=current_app.config["KNOWLEDGE_SUGGEST_INDEX_TTL"])
+    return index
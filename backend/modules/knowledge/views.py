@@ -1,14 +1,38 @@
-from flask import Blueprint, request
-from flask_jwt_extended import get_jwt_identity, jwt_required
+import click
+from flask import Blueprint, Response, request, stream_with_context
+from flask_jwt_extended import get_jwt_identity
 
+from backend.common.auth import jwt_required
+from backend.common.errors import AppError
+from backend.common.etag import conditional
+from backend.common.fields import parse_fields
+from backend.common.ids import is_valid_id
+from backend.common.pagination import parse_bool
 from backend.common.response import response_ok
+from backend.modules.knowledge.bulk import export_entries, import_entries, parse_rows, resolve_format
+from backend.modules.knowledge.cache import cache_stats, collection_version
+from backend.modules.knowledge.hotwords import HOT_WINDOWS
+from backend.modules.knowledge.links import rebuild_links
+from backend.modules.knowledge.models import ENTRY_FIELDS
+from backend.modules.knowledge.related import rebuild_signatures
+from backend.modules.knowledge.search import rebuild_search_index
+from backend.modules.tag.service import backfill_tags
 from backend.modules.knowledge.service import (
+    GRAPH_NODE_FIELDS,
     create_entry,
     create_topic,
     delete_entry,
     delete_topic,
-    list_entries,
+    entry_graph,
+    entry_version,
+    get_entries_batch,
+    list_hot_terms,
+    list_backlinks,
+    list_related_entries,
+    list_tag_counts,
     list_topics,
+    search_entries,
+    suggest_values,
     update_entry,
     update_topic,
 )
@@ -56,8 +80,47 @@ def topic_delete(topic_id: int):
     return response_ok(message="topic_deleted")
 
 
+@knowledge_bp.get("/tags")
+@jwt_required()
+def tags_list():
+    user_id = int(get_jwt_identity())
+    data = [{"name": name, "count": count} for name, count in list_tag_counts(user_id)]
+    return response_ok({"items": data, "total": len(data)})
+
+
+@knowledge_bp.get("/suggest")
+@jwt_required()
+def suggest_list():
+    user_id = int(get_jwt_identity())
+    items = suggest_values(
+        user_id,
+        request.args.get("prefix", default=""),
+        request.args.get("kind", default="tag"),
+        request.args.get("limit", default=10, type=int),
+    )
+    return response_ok({"items": items})
+
+
+@knowledge_bp.get("/search/hot")
+@jwt_required()
+def search_hot():
+    user_id = int(get_jwt_identity())
+    window = request.args.get("window", default=7, type=int)
+    items = list_hot_terms(user_id, window, request.args.get("limit", default=10, type=int))
+    return response_ok({"window": window, "items": items})
+
+
+def _entries_version():
+    return collection_version(int(get_jwt_identity()))
+
+
+def _entry_version(entry_id: int):
+    return entry_version(int(get_jwt_identity()), entry_id)
+
+
 @knowledge_bp.get("/entries")
 @jwt_required()
+@conditional(_entries_version)
 def entries_list():
     user_id = int(get_jwt_identity())
     filters = {
@@ -67,21 +130,21 @@ def entries_list():
     }
     page = request.args.get("page", default=1, type=int)
     page_size = request.args.get("page_size", default=20, type=int)
-    total, items = list_entries(user_id, filters, page, page_size)
-    data = [
-        {
-            "id": e.id,
-            "title": e.title,
-            "content": e.content,
-            "tags": e.tags or [],
-            "links": e.links or [],
-            "topic_id": e.topic_id,
-            "created_at": e.created_at.isoformat(),
-            "updated_at": e.updated_at.isoformat(),
-        }
-        for e in items
-    ]
-    return response_ok({"items": data, "total": total, "page": page, "page_size": page_size})
+    payload, outcome = search_entries(
+        user_id,
+        filters,
+        page,
+        page_size,
+        sort=request.args.get("sort", default="updated_at"),
+        cursor=request.args.get("cursor"),
+        with_total=parse_bool(request.args.get("with_total")),
+        fields=parse_fields(request.args.get("fields"), ENTRY_FIELDS),
+        snippet_len=request.args.get("snippet_len", type=int),
+        bypass_cache=parse_bool(request.headers.get("X-Cache-Bypass"), default=False),
+    )
+    resp = response_ok(payload)
+    resp[0].headers["X-Cache"] = outcome
+    return resp
 
 
 @knowledge_bp.post("/entries")
@@ -93,8 +156,62 @@ def entry_create():
     return response_ok(entry.as_dict(), "entry_created")
 
 
+@knowledge_bp.route("/entries:batch", methods=["GET", "POST"])
+@jwt_required()
+def entries_batch():
+    user_id = int(get_jwt_identity())
+    if request.method == "POST":
+        body = request.get_json() or {}
+        raw_ids = body.get("ids") or []
+        if not isinstance(raw_ids, list):
+            raise AppError(code=1001, message="invalid_ids", status_code=400)
+        fields = body.get("fields")
+        if fields is not None and not (
+            isinstance(fields, str) or (isinstance(fields, list) and all(isinstance(f, str) for f in fields))
+        ):
+            raise AppError(code=1001, message="invalid_fields", status_code=400)
+        fields = parse_fields(",".join(fields) if isinstance(fields, list) else fields, ENTRY_FIELDS)
+        snippet_len = body.get("snippet_len")
+        if snippet_len is not None and (isinstance(snippet_len, bool) or not isinstance(snippet_len, int)):
+            raise AppError(code=1001, message="invalid_snippet_len", status_code=400)
+    else:
+        raw_ids = [v for v in (request.args.get("ids") or "").split(",") if v.strip()]
+        fields = parse_fields(request.args.get("fields"), ENTRY_FIELDS)
+        snippet_len = request.args.get("snippet_len", type=int)
+    try:
+        ids = [int(v) for v in raw_ids]
+    except (TypeError, ValueError):
+        raise AppError(code=1001, message="invalid_ids", status_code=400)
+    if not all(is_valid_id(i) for i in ids):
+        raise AppError(code=1001, message="invalid_ids", status_code=400)
+    found, missing = get_entries_batch(user_id, ids, fields=fields, snippet_len=snippet_len)
+    output_fields = list(fields or ENTRY_FIELDS) + (["snippet"] if snippet_len else [])
+    return response_ok({"items": [e.as_dict(output_fields) for e in found], "missing": missing})
+
+
+@knowledge_bp.post("/entries/import")
+@jwt_required()
+def entries_import():
+    user_id = int(get_jwt_identity())
+    fmt = resolve_format(request.mimetype)
+    result = import_entries(user_id, parse_rows(request.stream, fmt))
+    return response_ok(result, "entries_imported")
+
+
+@knowledge_bp.get("/entries/export")
+@jwt_required()
+def entries_export():
+    user_id = int(get_jwt_identity())
+    return Response(
+        stream_with_context(export_entries(user_id)),
+        mimetype="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=knowledge-entries.ndjson"},
+    )
+
+
 @knowledge_bp.get("/entries/<int:entry_id>")
 @jwt_required()
+@conditional(_entry_version)
 def entry_detail(entry_id: int):
     user_id = int(get_jwt_identity())
     from backend.modules.knowledge.service import _get_entry  # lazy import to avoid circular import in minimal env
@@ -103,6 +220,29 @@ def entry_detail(entry_id: int):
     return response_ok(entry.as_dict())
 
 
+@knowledge_bp.get("/entries/<int:entry_id>/related")
+@jwt_required()
+def entry_related(entry_id: int):
+    user_id = int(get_jwt_identity())
+    items = list_related_entries(user_id, entry_id, request.args.get("k", default=10, type=int))
+    return response_ok({"items": items})
+
+
+@knowledge_bp.get("/entries/<int:entry_id>/backlinks")
+@jwt_required()
+def entry_backlinks(entry_id: int):
+    user_id = int(get_jwt_identity())
+    items = [e.as_dict(GRAPH_NODE_FIELDS) for e in list_backlinks(user_id, entry_id)]
+    return response_ok({"items": items, "total": len(items)})
+
+
+@knowledge_bp.get("/entries/<int:entry_id>/graph")
+@jwt_required()
+def entry_graph_view(entry_id: int):
+    user_id = int(get_jwt_identity())
+    return response_ok(entry_graph(user_id, entry_id, request.args.get("depth", default=1, type=int)))
+
+
 @knowledge_bp.put("/entries/<int:entry_id>")
 @jwt_required()
 def entry_update(entry_id: int):
@@ -118,3 +258,55 @@ def entry_delete(entry_id: int):
     user_id = int(get_jwt_identity())
     delete_entry(user_id, entry_id)
     return response_ok(message="entry_deleted")
+
+
+@knowledge_bp.cli.command("rebuild-search")
+def rebuild_search_command():
+    """Create the full-text index if missing and re-index all entries."""
+    rebuild_search_index()
+    click.echo("knowledge search index rebuilt")
+
+
+@knowledge_bp.cli.command("backfill-tags")
+@click.option("--batch-size", type=int, default=500, help="Rows processed per transaction.")
+def backfill_tags_command(batch_size):
+    """Populate the normalized tag index from the JSON tags of entries and plans."""
+    result = backfill_tags(batch_size=batch_size)
+    click.echo(f"indexed tags for {result['entries']} entries and {result['plans']} plans")
+    if result["skipped"]:
+        click.echo(f"skipped {result['skipped']} tags longer than the index allows")
+
+
+@knowledge_bp.cli.command("rebuild-related")
+@click.option("--batch-size", type=int, default=500, help="Rows processed per transaction.")
+@click.option("--user-id", type=int, default=None, help="Only rebuild this user's entries.")
+def rebuild_related_command(batch_size, user_id):
+    """Recompute the MinHash signatures behind related-entry suggestions."""
+    count = rebuild_signatures(batch_size=batch_size, user_id=user_id)
+    click.echo(f"rebuilt related-entry signatures for {count} entries")
+
+
+@knowledge_bp.cli.command("rebuild-links")
+@click.option("--batch-size", type=int, default=500, help="Rows processed per transaction.")
+def rebuild_links_command(batch_size):
+    """Re-derive the backlink index from the links of every entry."""
+    count = rebuild_links(batch_size=batch_size)
+    click.echo(f"rebuilt entry links for {count} entries")
+
+
+@knowledge_bp.cli.command("hot-terms")
+@click.option("--window", type=click.Choice([str(w) for w in HOT_WINDOWS]), default="7", help="Days to cover.")
+@click.option("--limit", type=int, default=20, help="Terms to print.")
+def hot_terms_command(window, limit):
+    """Print the most searched keywords across all users."""
+    for item in list_hot_terms(None, int(window), limit):
+        click.echo(f"{item['count']}\t{item['term']}")
+
+
+@knowledge_bp.cli.command("cache-stats")
+def cache_stats_command():
+    """Print search cache hit/miss counters."""
+    stats = cache_stats()
+    total = stats["hit"] + stats["miss"]
+    ratio = stats["hit"] / total if total else 0.0
+    click.echo(f"hits={stats['hit']} misses={stats['miss']} hit_ratio={ratio:.2%}")
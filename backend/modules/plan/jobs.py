@@ -0,0 +1,48 @@
+import time
+
+from flask import Flask
+
+from backend.extensions import scheduler
+from backend.modules.plan.rank import rebalance_ranks
+from backend.modules.plan.service import mark_overdue
+
+
+def register_jobs(app: Flask) -> None:
+    scheduler.add_job(
+        _rebalance_ranks_job,
+        "interval",
+        minutes=app.config["PLAN_RANK_REBALANCE_INTERVAL_MINUTES"],
+        id="plan.rebalance_ranks",
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1,
+        args=[app],
+    )
+    scheduler.add_job(
+        _mark_overdue_job,
+        "interval",
+        minutes=app.config["PLAN_OVERDUE_INTERVAL_MINUTES"],
+        id="plan.mark_overdue",
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1,
+        args=[app],
+    )
+
+
+def _rebalance_ranks_job(app: Flask) -> None:
+    with app.app_context():
+        started = time.perf_counter()
+        plans = rebalance_ranks(app.config["PLAN_RANK_REBALANCE_LEN"])
+        app.logger.info(
+            "rebalanced task ranks plans=%s duration_ms=%.1f", plans, (time.perf_counter() - started) * 1000
+        )
+
+
+def _mark_overdue_job(app: Flask) -> None:
+    with app.app_context():
+        started = time.perf_counter()
+        tasks, plans = mark_overdue(batch_size=app.config["PLAN_OVERDUE_BATCH_SIZE"])
+        app.logger.info(
+            "marked overdue tasks=%s plans=%s duration_ms=%.1f", tasks, plans, (time.perf_counter() - started) * 1000
+        )
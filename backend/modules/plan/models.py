@@ -1,10 +1,16 @@
 from datetime import datetime
+from typing import Iterable, Optional
 
+from backend.common.fields import serialize
 from backend.extensions import db
+from backend.modules.tag.models import Tag, plan_tags
+
+RANK_MAX_LEN = 255
 
 
 class Plan(db.Model):
     __tablename__ = "plans"
+    __table_args__ = (db.Index("ix_plans_status_deadline", "status", "deadline"),)
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
@@ -15,14 +21,31 @@ class Plan(db.Model):
     tags = db.Column(db.JSON, default=list)
     status = db.Column(db.String(32), default="not_started")
     progress = db.Column(db.Float, default=0.0)
+    # Maintained by atomic increments on task changes; progress/status derive from them.
+    task_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    done_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     tasks = db.relationship("Task", backref="plan", cascade="all, delete-orphan", lazy="select")
+    # Normalized mirror of ``tags`` used for indexed filtering.
+    tag_refs = db.relationship(Tag, secondary=plan_tags, lazy="select")
 
 
 class Task(db.Model):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Matches list_plan_tasks' ORDER BY (rank NULLS FIRST, order_no, id). PostgreSQL
+        # sorts NULLs last by default so needs it spelled out; SQLite already puts them
+        # first in ascending order and rejects NULLS FIRST in an index.
+        db.Index("ix_tasks_plan_rank", "plan_id", db.text("rank NULLS FIRST"), "order_no", "id").ddl_if(
+            dialect="postgresql"
+        ),
+        db.Index("ix_tasks_plan_rank", "plan_id", "rank", "order_no", "id").ddl_if(
+            callable_=lambda ddl, target, bind, dialect=None, **kw: dialect.name != "postgresql"
+        ),
+        db.Index("ix_tasks_status_due_date", "status", "due_date"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     plan_id = db.Column(db.Integer, db.ForeignKey("plans.id"), nullable=False, index=True)
@@ -35,23 +58,31 @@ class Task(db.Model):
     due_date = db.Column(db.Date, nullable=True)
     tags = db.Column(db.JSON, default=list)
     order_no = db.Column(db.Integer, default=0)
+    # Display order within the plan; see backend.modules.plan.rank.
+    rank = db.Column(db.String(RANK_MAX_LEN), nullable=True)
     focus_minutes = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    def as_dict(self) -> dict:
-        return {
-            "id": self.id,
-            "plan_id": self.plan_id,
-            "title": self.title,
-            "desc": self.desc,
-            "estimate_minutes": self.estimate_minutes,
-            "priority": self.priority,
-            "status": self.status,
-            "due_date": self.due_date.isoformat() if self.due_date else None,
-            "tags": self.tags or [],
-            "order_no": self.order_no,
-            "focus_minutes": self.focus_minutes,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat(),
-        }
+    def as_dict(self, fields: Optional[Iterable[str]] = None) -> dict:
+        """Serialize the task; with ``fields`` only those attributes are read."""
+        return serialize(self, _TASK_SERIALIZERS, fields)
+
+
+_TASK_SERIALIZERS = {
+    "id": lambda t: t.id,
+    "plan_id": lambda t: t.plan_id,
+    "title": lambda t: t.title,
+    "desc": lambda t: t.desc,
+    "estimate_minutes": lambda t: t.estimate_minutes,
+    "priority": lambda t: t.priority,
+    "status": lambda t: t.status,
+    "due_date": lambda t: t.due_date.isoformat() if t.due_date else None,
+    "tags": lambda t: t.tags or [],
+    "order_no": lambda t: t.order_no,
+    "rank": lambda t: t.rank,
+    "focus_minutes": lambda t: t.focus_minutes,
+    "created_at": lambda t: t.created_at.isoformat(),
+    "updated_at": lambda t: t.updated_at.isoformat(),
+}
+TASK_FIELDS = tuple(_TASK_SERIALIZERS)
@@ -0,0 +1,102 @@
+"""Lexicographic ordering keys for tasks.
+
+``Task.rank`` is a base-36 string compared byte-wise (lowercase letters and digits
+sort the same under common collations). A key can always be generated strictly
+between two others, so moving a task rewrites only that task's rank. Keys never end
+in ``"0"``, which keeps a gap open below every key. Repeated inserts into the same
+gap lengthen keys; :func:`rebalance_ranks` respaces the plans whose keys grew long.
+"""
+from typing import Optional
+
+from sqlalchemy import func, or_, select, update
+
+from backend.extensions import db
+from backend.modules.plan.models import Task
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+_VALUE = {ch: i for i, ch in enumerate(DIGITS)}
+
+
+def rank_between(lo: Optional[str], hi: Optional[str]) -> str:
+    """A key sorting strictly after ``lo`` and before ``hi`` (``None`` is unbounded)."""
+    lo = lo or ""
+    if hi is not None and hi <= lo:
+        raise ValueError(f"rank bounds out of order: {lo!r} >= {hi!r}")
+    if hi is None:
+        # Appending: bump the first digit with room so keys stay short.
+        for i, ch in enumerate(lo):
+            if _VALUE[ch] < BASE - 1:
+                return lo[:i] + DIGITS[_VALUE[ch] + 1]
+        return lo + DIGITS[BASE // 2]
+    if not lo:
+        # Prepending: lower the first digit that stays above "0" once lowered.
+        for i, ch in enumerate(hi):
+            if _VALUE[ch] > 1:
+                return hi[:i] + DIGITS[_VALUE[ch] - 1]
+    key = []
+    for i in range(len(lo) + len(hi) + 1):
+        low = _VALUE[lo[i]] if i < len(lo) else 0
+        high = BASE if hi is None else (_VALUE[hi[i]] if i < len(hi) else 0)
+        if low == high:
+            key.append(DIGITS[low])
+            continue
+        mid = (low + high) // 2
+        if mid > low:
+            key.append(DIGITS[mid])
+            return "".join(key)
+        # Adjacent digits: keep ``low`` here and look for room after it.
+        key.append(DIGITS[low])
+        hi = None
+    raise AssertionError("unreachable")
+
+
+def spaced_ranks(count: int) -> list[str]:
+    """``count`` ascending keys spread over the lower half of the key space.
+
+    Gaps of at least ``BASE`` leave room for inserts between neighbours, and the
+    unused upper half keeps appends short.
+    """
+    width = 1
+    while BASE**width < 2 * BASE * (count + 1):
+        width += 1
+    step = BASE**width // (2 * (count + 1))
+    return [_encode(step * (i + 1), width).rstrip("0") for i in range(count)]
+
+
+def rebalance_plan(plan_id: int) -> int:
+    """Respace the ranks of one plan in its current order; returns tasks rewritten.
+
+    Tasks without a rank (created before ranks existed) keep their ``order_no``
+    order ahead of ranked ones.
+    """
+    rows = db.session.execute(select(Task.id, Task.rank, Task.order_no).where(Task.plan_id == plan_id)).all()
+    rows.sort(key=lambda r: (r.rank is not None, r.rank or "", r.order_no or 0, r.id))
+    ranks = spaced_ranks(len(rows))
+    db.session.execute(update(Task), [{"id": row.id, "rank": rank} for row, rank in zip(rows, ranks)])
+    return len(rows)
+
+
+def rebalance_ranks(max_len: int, all_plans: bool = False) -> int:
+    """Rebalance plans with a missing rank or one longer than ``max_len``; returns plans touched.
+
+    The scan reads only the ``(plan_id, rank)`` index; each plan commits on its own.
+    """
+    query = select(Task.plan_id).group_by(Task.plan_id)
+    if not all_plans:
+        query = query.having(
+            or_(func.max(func.length(Task.rank)) > max_len, func.count(Task.rank) < func.count(Task.id))
+        )
+    plan_ids = db.session.execute(query).scalars().all()
+    for plan_id in plan_ids:
+        rebalance_plan(plan_id)
+        db.session.commit()
+    return len(plan_ids)
+
+
+def _encode(value: int, width: int) -> str:
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    return "".join(reversed(digits))
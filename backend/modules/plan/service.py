@@ -1,31 +1,64 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Iterable, Optional
 
-from flask import abort
+from flask import abort, current_app
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import load_only
+from sqlalchemy.orm.attributes import set_committed_value
 
 from backend.common.errors import AppError
+from backend.common.ids import is_valid_id
 from backend.extensions import db
-from backend.modules.plan.models import Plan, Task
+from backend.modules.plan.models import RANK_MAX_LEN, Plan, Task
+from backend.modules.plan.rank import rank_between, rebalance_plan
+from backend.modules.tag.models import plan_tags
+from backend.modules.tag.service import parse_tags, resolve_tags, tag_filter
 
 PLAN_STATUSES = {"not_started", "in_progress", "completed", "delayed"}
 TASK_STATUSES = {"todo", "doing", "done", "blocked", "delayed"}
+TASK_PRIORITIES = {"low", "medium", "high"}
+# Statuses the overdue job moves to "delayed" once the due date/deadline has passed.
+OPEN_TASK_STATUSES = ("todo", "doing", "blocked")
+OPEN_PLAN_STATUSES = ("not_started", "in_progress")
+# Task fields a bulk PATCH may change, in the order their UPDATEs run.
+BATCH_TASK_FIELDS = ("status", "order_no", "due_date", "priority", "tags")
 
 
 def _validate_status(value: str, allowed: set[str], code: int):
-    if value not in allowed:
+    if not isinstance(value, str) or value not in allowed:
         raise AppError(code=code, message="invalid_status", status_code=400)
 
 
-def _recalc_progress(plan: Plan):
-    total = len(plan.tasks)
+def _bump_task_counts(plan: Plan, tasks: int = 0, done: int = 0) -> None:
+    """Atomically adjust the plan's task counters and re-derive progress/status.
+
+    The increment runs in SQL, so concurrent task changes never lose updates, and
+    the counts it returns drive progress without loading any tasks.
+    """
+    if not tasks and not done:
+        return
+    total, done_total = db.session.execute(
+        update(Plan)
+        .where(Plan.id == plan.id)
+        .values(task_count=Plan.task_count + tasks, done_count=Plan.done_count + done)
+        .returning(Plan.task_count, Plan.done_count)
+        .execution_options(synchronize_session=False)
+    ).one()
+    set_committed_value(plan, "task_count", total)
+    set_committed_value(plan, "done_count", done_total)
+    _apply_progress(plan, total, done_total)
+
+
+def _apply_progress(plan: Plan, total: int, done: int) -> None:
     if total == 0:
         plan.progress = 0.0
         plan.status = plan.status or "not_started"
     else:
-        done = len([t for t in plan.tasks if t.status == "done"])
         plan.progress = round(done / total, 4)
         if done == total:
             plan.status = "completed"
+        elif plan.status == "delayed":
+            pass  # set by the overdue job; cleared by completing every task or a later deadline
         elif done == 0:
             plan.status = "not_started"
         else:
@@ -42,10 +75,11 @@ def create_plan(user_id: int, payload: dict) -> Plan:
         goal=payload.get("goal"),
         deadline=_parse_date(payload.get("deadline")),
         priority=payload.get("priority", "medium"),
-        tags=payload.get("tags") or [],
+        tags=parse_tags(payload.get("tags")),
         status=payload.get("status", "not_started"),
     )
     _validate_status(plan.status, PLAN_STATUSES, 2102)
+    plan.tag_refs = resolve_tags(user_id, plan.tags)
     db.session.add(plan)
     db.session.commit()
     return plan
@@ -62,10 +96,15 @@ def update_plan(user_id: int, plan_id: int, payload: dict) -> Plan:
         plan.goal = payload.get("goal")
     if "deadline" in payload:
         plan.deadline = _parse_date(payload.get("deadline"))
+        if plan.status == "delayed" and "status" not in payload and not _is_overdue(plan):
+            # Back on schedule: derive the status from the task counters again.
+            plan.status = "not_started"
+            _apply_progress(plan, plan.task_count, plan.done_count)
     if "priority" in payload:
         plan.priority = payload.get("priority")
     if "tags" in payload:
-        plan.tags = payload.get("tags") or []
+        plan.tags = parse_tags(payload.get("tags"))
+        plan.tag_refs = resolve_tags(user_id, plan.tags)
     if "status" in payload:
         status = payload.get("status")
         _validate_status(status, PLAN_STATUSES, 2102)
@@ -80,8 +119,10 @@ def delete_plan(user_id: int, plan_id: int) -> None:
     db.session.commit()
 
 
-def list_plans(user_id: int, filters: dict) -> Iterable[Plan]:
+def list_plans(user_id: int, filters: dict, fields: Optional[list[str]] = None) -> Iterable[Plan]:
     query = Plan.query.filter_by(user_id=user_id)
+    if fields:
+        query = query.options(load_only(*(getattr(Plan, f) for f in set(fields) | {"id", "deadline"})))
     status = filters.get("status")
     if status:
         query = query.filter(Plan.status == status)
@@ -90,7 +131,7 @@ def list_plans(user_id: int, filters: dict) -> Iterable[Plan]:
         query = query.filter(Plan.priority == priority)
     tag = filters.get("tag")
     if tag:
-        query = query.filter(Plan.tags.contains([tag]))
+        query = tag_filter(query, plan_tags, Plan.id, user_id, tag)
     start_date = _parse_date(filters.get("start_date"))
     end_date = _parse_date(filters.get("end_date"))
     if start_date:
@@ -104,6 +145,30 @@ def get_plan_detail(user_id: int, plan_id: int) -> Plan:
     return _get_user_plan(user_id, plan_id)
 
 
+def plan_version(user_id: int, plan_id: int) -> Optional[str]:
+    """Version of a plan and its tasks from one aggregate query, or ``None`` if missing."""
+    row = (
+        db.session.query(Plan.id, Plan.updated_at, func.count(Task.id), func.max(Task.updated_at))
+        .outerjoin(Task, Task.plan_id == Plan.id)
+        .filter(Plan.id == plan_id, Plan.user_id == user_id)
+        .group_by(Plan.id, Plan.updated_at)
+        .first()
+    )
+    return ":".join(str(v) for v in row) if row else None
+
+
+def list_plan_tasks(plan_id: int, fields: Optional[list[str]] = None) -> Iterable[Task]:
+    """Tasks of a plan in rank order, reading only ``fields`` columns when given.
+
+    Tasks not yet ranked come first by ``order_no`` on every database, matching
+    the order :func:`~backend.modules.plan.rank.rebalance_plan` gives them.
+    """
+    query = Task.query.filter_by(plan_id=plan_id)
+    if fields:
+        query = query.options(load_only(*(getattr(Task, f) for f in set(fields) | {"id"})))
+    return query.order_by(Task.rank.asc().nulls_first(), Task.order_no, Task.id).all()
+
+
 def create_task(user_id: int, plan_id: int, payload: dict) -> Task:
     plan = _get_user_plan(user_id, plan_id)
     title = (payload.get("title") or "").strip()
@@ -122,16 +187,16 @@ def create_task(user_id: int, plan_id: int, payload: dict) -> Task:
         order_no=payload.get("order_no", 0),
     )
     _validate_status(task.status, TASK_STATUSES, 2202)
+    task.rank = _append_rank(plan.id)
     db.session.add(task)
-    db.session.flush()
-    _recalc_progress(plan)
+    _bump_task_counts(plan, tasks=1, done=int(task.status == "done"))
     db.session.commit()
     return task
 
 
 def update_task(user_id: int, task_id: int, payload: dict) -> Task:
     task = _get_user_task(user_id, task_id)
-    plan = _get_user_plan(user_id, task.plan_id)
+    was_done = task.status == "done"
     if "title" in payload:
         title = (payload.get("title") or "").strip()
         if not title:
@@ -149,33 +214,252 @@ def update_task(user_id: int, task_id: int, payload: dict) -> Task:
         task.status = status
     if "due_date" in payload:
         task.due_date = _parse_date(payload.get("due_date"))
+        if "status" not in payload and _reopens_delayed(task.status, task.due_date):
+            task.status = "todo"
     if "tags" in payload:
         task.tags = payload.get("tags") or []
     if "order_no" in payload:
         task.order_no = payload.get("order_no")
     if "focus_minutes" in payload:
         task.focus_minutes = payload.get("focus_minutes") or 0
-    _recalc_progress(plan)
+    if (task.status == "done") != was_done:
+        _bump_task_counts(_get_user_plan(user_id, task.plan_id), done=1 if task.status == "done" else -1)
     db.session.commit()
     return task
 
 
 def complete_task(user_id: int, task_id: int) -> Task:
     task = _get_user_task(user_id, task_id)
+    was_done = task.status == "done"
     task.status = "done"
     task.updated_at = datetime.utcnow()
-    plan = _get_user_plan(user_id, task.plan_id)
-    _recalc_progress(plan)
+    if not was_done:
+        _bump_task_counts(_get_user_plan(user_id, task.plan_id), done=1)
+    db.session.commit()
+    return task
+
+
+def move_task(user_id: int, task_id: int, after_id: Optional[int] = None, before_id: Optional[int] = None) -> Task:
+    """Place a task right after ``after_id`` and/or before ``before_id`` of the same plan.
+
+    Only the moved task's rank is written. If a neighbour has no rank yet or the new
+    key would not fit, the plan is rebalanced first.
+    """
+    task = _get_user_task(user_id, task_id)
+    neighbour_ids = [i for i in (after_id, before_id) if i is not None]
+    if (
+        not neighbour_ids
+        or not all(is_valid_id(i) for i in neighbour_ids)
+        or task.id in neighbour_ids
+    ):
+        raise AppError(code=1001, message="invalid_position", status_code=400)
+    rank = _rank_for_move(user_id, task, after_id, before_id)
+    if rank is None:
+        rebalance_plan(task.plan_id)
+        rank = _rank_for_move(user_id, task, after_id, before_id)
+    task.rank = rank
     db.session.commit()
     return task
 
 
+def update_tasks_batch(user_id: int, plan_id: int, items: list) -> tuple[Plan, list[Task]]:
+    """Apply partial updates to many tasks of one plan in a single transaction.
+
+    Ownership of every task is checked with one query and the batch fails as a
+    whole if any id is unknown. Each field is written with one UPDATE (a ``CASE``
+    on the task id when values differ; ``tags`` with one UPDATE per distinct
+    value), and plan progress is adjusted once by the net change in done tasks.
+    Later items win when the same task appears more than once.
+    """
+    plan = _get_user_plan(user_id, plan_id)
+    if not isinstance(items, list) or not items:
+        raise AppError(code=1001, message="missing_items", status_code=400)
+    if len(items) > current_app.config["PLAN_TASK_BATCH_MAX_ITEMS"]:
+        raise AppError(code=1001, message="too_many_items", status_code=400)
+
+    changes: dict[int, dict] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            raise AppError(code=1001, message="invalid_item", status_code=400)
+        task_id = item.get("id")
+        if not is_valid_id(task_id):
+            raise AppError(code=1001, message="invalid_task_id", status_code=400)
+        values = changes.setdefault(task_id, {})
+        if "status" in item:
+            _validate_status(item["status"], TASK_STATUSES, 2202)
+            values["status"] = item["status"]
+        if "order_no" in item:
+            order_no = item["order_no"]
+            if isinstance(order_no, bool) or not isinstance(order_no, int):
+                raise AppError(code=1001, message="invalid_order_no", status_code=400)
+            values["order_no"] = order_no
+        if "due_date" in item:
+            values["due_date"] = _parse_date(item["due_date"])
+        if "priority" in item:
+            if not isinstance(item["priority"], str) or item["priority"] not in TASK_PRIORITIES:
+                raise AppError(code=1001, message="invalid_priority", status_code=400)
+            values["priority"] = item["priority"]
+        if "tags" in item:
+            tags = item["tags"] or []
+            if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+                raise AppError(code=1001, message="invalid_tags", status_code=400)
+            values["tags"] = tags
+
+    statuses = dict(
+        db.session.execute(
+            select(Task.id, Task.status).where(
+                Task.plan_id == plan.id, Task.user_id == user_id, Task.id.in_(changes)
+            )
+        ).all()
+    )
+    if len(statuses) != len(changes):
+        raise AppError(code=2203, message="task_not_found", status_code=404)
+    for task_id, values in changes.items():
+        if "due_date" in values and "status" not in values and _reopens_delayed(statuses[task_id], values["due_date"]):
+            values["status"] = "todo"
+
+    for field in BATCH_TASK_FIELDS:
+        by_id = {task_id: values[field] for task_id, values in changes.items() if field in values}
+        if not by_id:
+            continue
+        column = getattr(Task, field)
+        if field == "tags":
+            groups: dict[str, tuple[list, list[int]]] = {}
+            for task_id, tags in by_id.items():
+                groups.setdefault(repr(tags), (tags, []))[1].append(task_id)
+            assignments = [(ids, tags) for tags, ids in groups.values()]
+        elif len(set(by_id.values())) == 1:
+            assignments = [(list(by_id), next(iter(by_id.values())))]
+        else:
+            assignments = [(list(by_id), case(by_id, value=Task.id, else_=column))]
+        for ids, value in assignments:
+            db.session.execute(
+                update(Task).where(Task.id.in_(ids)).values({field: value}).execution_options(synchronize_session=False)
+            )
+
+    done_delta = sum(
+        (values["status"] == "done") - (statuses[task_id] == "done")
+        for task_id, values in changes.items()
+        if "status" in values
+    )
+    _bump_task_counts(plan, done=done_delta)
+    db.session.commit()
+    tasks = Task.query.filter(Task.id.in_(changes)).order_by(Task.id).all()
+    return plan, tasks
+
+
+def mark_overdue(batch_size: int = 1000, today: Optional[date] = None) -> tuple[int, int]:
+    """Mark open tasks past their due date and open plans past their deadline as delayed.
+
+    Returns ``(tasks, plans)`` updated. Rows are found through the ``(status,
+    due_date)`` and ``(status, deadline)`` indexes and updated ``batch_size`` at a
+    time, each chunk in its own short transaction.
+    """
+    today = today or date.today()
+    tasks = _mark_delayed(Task, Task.due_date, OPEN_TASK_STATUSES, today, batch_size)
+    plans = _mark_delayed(Plan, Plan.deadline, OPEN_PLAN_STATUSES, today, batch_size)
+    return tasks, plans
+
+
+def _mark_delayed(model, due_column, statuses: tuple[str, ...], today: date, batch_size: int) -> int:
+    overdue = (model.status.in_(statuses), due_column < today)
+    touched = 0
+    while True:
+        ids = db.session.scalars(select(model.id).where(*overdue).limit(batch_size)).all()
+        if not ids:
+            break
+        # Re-check the predicate so rows changed since the SELECT are left alone.
+        touched += db.session.execute(
+            update(model)
+            .where(model.id.in_(ids), *overdue)
+            .values(status="delayed")
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        if len(ids) < batch_size:
+            break
+    return touched
+
+
+def repair_progress(batch_size: int = 500) -> int:
+    """Recompute task counters, progress and status of every plan from its tasks.
+
+    Returns how many plans had drifted counters.
+    """
+    repaired, last_id = 0, 0
+    while True:
+        plans = Plan.query.filter(Plan.id > last_id).order_by(Plan.id).limit(batch_size).all()
+        if not plans:
+            break
+        done = func.sum(db.case((Task.status == "done", 1), else_=0))
+        counts = {
+            plan_id: (total, int(done_total or 0))
+            for plan_id, total, done_total in db.session.execute(
+                select(Task.plan_id, func.count(Task.id), done)
+                .where(Task.plan_id.in_([p.id for p in plans]))
+                .group_by(Task.plan_id)
+            )
+        }
+        for plan in plans:
+            total, done_total = counts.get(plan.id, (0, 0))
+            if (plan.task_count, plan.done_count) != (total, done_total):
+                repaired += 1
+                plan.task_count, plan.done_count = total, done_total
+                _apply_progress(plan, total, done_total)
+        db.session.commit()
+        last_id = plans[-1].id
+    return repaired
+
+
+def _append_rank(plan_id: int) -> str:
+    last = db.session.scalar(select(func.max(Task.rank)).where(Task.plan_id == plan_id))
+    rank = rank_between(last, None)
+    if len(rank) > RANK_MAX_LEN:
+        rebalance_plan(plan_id)
+        rank = rank_between(db.session.scalar(select(func.max(Task.rank)).where(Task.plan_id == plan_id)), None)
+    return rank
+
+
+def _rank_for_move(user_id: int, task: Task, after_id: Optional[int], before_id: Optional[int]) -> Optional[str]:
+    """Rank between the requested neighbours, or ``None`` when the plan needs rebalancing."""
+    ids = {i for i in (after_id, before_id) if i is not None}
+    ranks = dict(
+        db.session.execute(
+            select(Task.id, Task.rank).where(Task.plan_id == task.plan_id, Task.user_id == user_id, Task.id.in_(ids))
+        ).all()
+    )
+    if len(ranks) != len(ids):
+        raise AppError(code=2203, message="task_not_found", status_code=404)
+    if None in ranks.values():
+        return None
+    lo, hi = ranks.get(after_id), ranks.get(before_id)
+    # With one neighbour given, the other bound is the adjacent rank (served by the index).
+    others = (Task.plan_id == task.plan_id, Task.id != task.id)
+    if hi is None:
+        hi = db.session.scalar(select(func.min(Task.rank)).where(*others, Task.rank > lo))
+    elif lo is None:
+        lo = db.session.scalar(select(func.max(Task.rank)).where(*others, Task.rank < hi))
+    if lo is not None and hi is not None and lo >= hi:
+        raise AppError(code=1001, message="invalid_position", status_code=400)
+    rank = rank_between(lo, hi)
+    return rank if len(rank) <= RANK_MAX_LEN else None
+
+
+def _is_overdue(plan: Plan) -> bool:
+    return plan.deadline is not None and plan.deadline < date.today()
+
+
+def _reopens_delayed(status: str, due_date: Optional[date]) -> bool:
+    """True when a delayed task's new due date is no longer past, so it goes back to ``todo``."""
+    return status == "delayed" and (due_date is None or due_date >= date.today())
+
+
 def _parse_date(value: Optional[str]):
     if not value:
         return None
     try:
         return datetime.fromisoformat(value).date()
-    except ValueError:
+    except (TypeError, ValueError):
         raise AppError(code=1001, message="invalid_date", status_code=400)
 
 
@@ -1,35 +1,52 @@
-from flask import Blueprint, request
-from flask_jwt_extended import get_jwt_identity, jwt_required
+import click
+from flask import Blueprint, current_app, request
+from flask_jwt_extended import get_jwt_identity
 
+from backend.common.auth import jwt_required
+from backend.common.etag import conditional
+from backend.common.fields import parse_fields, serialize
 from backend.common.response import response_ok
-from backend.modules.plan.models import Plan, Task
+from backend.modules.plan.models import TASK_FIELDS, Plan
+from backend.modules.plan.rank import rebalance_ranks
 from backend.modules.plan.service import (
     complete_task,
     create_plan,
     create_task,
     get_plan_detail,
+    list_plan_tasks,
     list_plans,
+    mark_overdue,
+    move_task,
+    plan_version,
+    repair_progress,
     update_plan,
     update_task,
+    update_tasks_batch,
     delete_plan,
 )
 
 plan_bp = Blueprint("plan", __name__, url_prefix="/api")
 
 
-def _plan_to_dict(plan: Plan) -> dict:
-    return {
-        "id": plan.id,
-        "title": plan.title,
-        "goal": plan.goal,
-        "deadline": plan.deadline.isoformat() if plan.deadline else None,
-        "priority": plan.priority,
-        "tags": plan.tags or [],
-        "status": plan.status,
-        "progress": plan.progress,
-        "created_at": plan.created_at.isoformat(),
-        "updated_at": plan.updated_at.isoformat(),
-    }
+_PLAN_SERIALIZERS = {
+    "id": lambda p: p.id,
+    "title": lambda p: p.title,
+    "goal": lambda p: p.goal,
+    "deadline": lambda p: p.deadline.isoformat() if p.deadline else None,
+    "priority": lambda p: p.priority,
+    "tags": lambda p: p.tags or [],
+    "status": lambda p: p.status,
+    "progress": lambda p: p.progress,
+    "task_count": lambda p: p.task_count,
+    "done_count": lambda p: p.done_count,
+    "created_at": lambda p: p.created_at.isoformat(),
+    "updated_at": lambda p: p.updated_at.isoformat(),
+}
+PLAN_FIELDS = tuple(_PLAN_SERIALIZERS)
+
+
+def _plan_to_dict(plan: Plan, fields=None) -> dict:
+    return serialize(plan, _PLAN_SERIALIZERS, fields)
 
 
 @plan_bp.post("/plans")
@@ -52,18 +69,25 @@ def list_plans_route():
         "start_date": request.args.get("start_date"),
         "end_date": request.args.get("end_date"),
     }
-    plans = list_plans(user_id, filters)
-    data = [_plan_to_dict(p) for p in plans]
+    fields = parse_fields(request.args.get("fields"), PLAN_FIELDS)
+    plans = list_plans(user_id, filters, fields=fields)
+    data = [_plan_to_dict(p, fields) for p in plans]
     return response_ok({"items": data, "total": len(data)})
 
 
+def _plan_version(plan_id: int):
+    return plan_version(int(get_jwt_identity()), plan_id)
+
+
 @plan_bp.get("/plans/<int:plan_id>")
 @jwt_required()
+@conditional(_plan_version)
 def plan_detail_route(plan_id: int):
     user_id = int(get_jwt_identity())
     plan = get_plan_detail(user_id, plan_id)
     plan_dict = _plan_to_dict(plan)
-    plan_dict["tasks"] = [t.as_dict() for t in plan.tasks]
+    task_fields = parse_fields(request.args.get("task_fields"), TASK_FIELDS)
+    plan_dict["tasks"] = [t.as_dict(task_fields) for t in list_plan_tasks(plan.id, task_fields)]
     return response_ok(plan_dict)
 
 
@@ -93,6 +117,19 @@ def create_task_route(plan_id: int):
     return response_ok(task.as_dict(), "task_created")
 
 
+@plan_bp.patch("/plans/<int:plan_id>/tasks")
+@jwt_required()
+def update_tasks_route(plan_id: int):
+    user_id = int(get_jwt_identity())
+    payload = request.get_json() or {}
+    plan, tasks = update_tasks_batch(user_id, plan_id, payload.get("items"))
+    data = {
+        "items": [t.as_dict() for t in tasks],
+        "plan": _plan_to_dict(plan, ["id", "status", "progress", "task_count", "done_count"]),
+    }
+    return response_ok(data, "tasks_updated")
+
+
 @plan_bp.put("/tasks/<int:task_id>")
 @jwt_required()
 def update_task_route(task_id: int):
@@ -102,9 +139,41 @@ def update_task_route(task_id: int):
     return response_ok(task.as_dict(), "task_updated")
 
 
+@plan_bp.post("/tasks/<int:task_id>/move")
+@jwt_required()
+def move_task_route(task_id: int):
+    user_id = int(get_jwt_identity())
+    payload = request.get_json() or {}
+    task = move_task(user_id, task_id, after_id=payload.get("after_id"), before_id=payload.get("before_id"))
+    return response_ok(task.as_dict(), "task_moved")
+
+
 @plan_bp.post("/tasks/<int:task_id>/complete")
 @jwt_required()
 def complete_task_route(task_id: int):
     user_id = int(get_jwt_identity())
     task = complete_task(user_id, task_id)
     return response_ok(task.as_dict(), "task_completed")
+
+
+@plan_bp.cli.command("repair-progress")
+@click.option("--batch-size", type=int, default=500, help="Plans processed per transaction.")
+def repair_progress_command(batch_size):
+    """Recompute task counters, progress and status of every plan from its tasks."""
+    repaired = repair_progress(batch_size=batch_size)
+    click.echo(f"repaired task counters of {repaired} plans")
+
+
+@plan_bp.cli.command("rebalance-ranks")
+@click.option("--all", "all_plans", is_flag=True, help="Respace every plan, not only those with long or missing keys.")
+def rebalance_ranks_command(all_plans):
+    """Respace task rank keys of plans whose keys grew long or are missing."""
+    rebalanced = rebalance_ranks(current_app.config["PLAN_RANK_REBALANCE_LEN"], all_plans=all_plans)
+    click.echo(f"rebalanced task ranks of {rebalanced} plans")
+
+
+@plan_bp.cli.command("mark-overdue")
+def mark_overdue_command():
+    """Mark open tasks and plans whose due date or deadline has passed as delayed."""
+    tasks, plans = mark_overdue(batch_size=current_app.config["PLAN_OVERDUE_BATCH_SIZE"])
+    click.echo(f"marked {tasks} tasks and {plans} plans as delayed")
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from backend.extensions import db
+
+
+class ReviewState(db.Model):
+    """Spaced-repetition schedule of one entry for its owner, derived from study logs.
+
+    ``repetitions`` counts distinct study days; ``stability`` is the factor the
+    interval grows by after the second review (SM-2 ease).
+    """
+
+    __tablename__ = "review_state"
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "entry_id", name="uq_review_state_user_entry"),
+        # "Due on or before <day>" is a range scan on this index.
+        db.Index("ix_review_state_user_next_review", "user_id", "next_review_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    entry_id = db.Column(db.Integer, db.ForeignKey("knowledge_entries.id", ondelete="CASCADE"), nullable=False)
+    repetitions = db.Column(db.Integer, nullable=False, default=0)
+    stability = db.Column(db.Float, nullable=False)
+    interval_days = db.Column(db.Integer, nullable=False)
+    last_review_on = db.Column(db.Date, nullable=False)
+    next_review_at = db.Column(db.Date, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def as_dict(self) -> dict:
+        return {
+            "entry_id": self.entry_id,
+            "repetitions": self.repetitions,
+            "stability": self.stability,
+            "interval_days": self.interval_days,
+            "last_review_on": self.last_review_on.isoformat(),
+            "next_review_at": self.next_review_at.isoformat(),
+        }
@@ -0,0 +1,220 @@
+"""Spaced-repetition schedule kept alongside study logs.
+
+The schedule only depends on how many distinct days an entry was studied and the
+last of those days: intervals run 1, 6, then grow by ``stability`` (SM-2 with a fixed
+ease, since logs carry no recall grade) up to ``REVIEW_MAX_INTERVAL_DAYS``. That makes
+the incremental update in :func:`record_review` and the vectorized rebuild agree.
+"""
+from datetime import date, timedelta
+from typing import Optional
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import delete, func, insert, select, tuple_
+
+from backend.common.cache import SharedCache
+from backend.common.errors import AppError
+from backend.extensions import db
+from backend.modules.knowledge.models import KnowledgeEntry
+from backend.modules.review.models import ReviewState
+from backend.modules.study_log.models import StudyLog
+
+DEFAULT_STABILITY = 2.5
+FIRST_INTERVALS = (1, 6)
+GENERATION_KEY = "review:gen:{user_id}"
+FORECAST_KEY = "review:forecast:{user_id}:{generation}:{start}:{days}"
+
+_cache = SharedCache(local_maxsize=2000)
+
+
+def interval_table(max_repetitions: int, stability: float = DEFAULT_STABILITY) -> np.ndarray:
+    """Interval in days after ``n`` distinct study days, indexed by ``n`` (index 0 unused)."""
+    cap = current_app.config["REVIEW_MAX_INTERVAL_DAYS"]
+    table = np.zeros(max(max_repetitions, len(FIRST_INTERVALS)) + 1, dtype=np.int64)
+    table[1 : len(FIRST_INTERVALS) + 1] = FIRST_INTERVALS
+    for n in range(len(FIRST_INTERVALS) + 1, table.size):
+        table[n] = min(cap, int(round(table[n - 1] * stability)))
+    return table
+
+
+def record_review(user_id: int, entry_id: int, studied_on: date) -> None:
+    """Advance the entry's schedule for a study log added in the current transaction."""
+    state = ReviewState.query.filter_by(user_id=user_id, entry_id=entry_id).first()
+    if state is None:
+        db.session.add(_new_state(user_id, entry_id, 1, studied_on))
+        return
+    if studied_on == state.last_review_on:
+        return
+    if studied_on > state.last_review_on:
+        repetitions, last = state.repetitions + 1, studied_on
+    else:
+        # A backdated log: recount distinct days (the pending log is autoflushed first).
+        repetitions = (
+            db.session.query(func.count(func.distinct(StudyLog.logged_at)))
+            .filter(StudyLog.user_id == user_id, StudyLog.entry_id == entry_id)
+            .scalar()
+        )
+        last = state.last_review_on
+    state.repetitions = repetitions
+    state.interval_days = int(interval_table(repetitions, state.stability)[repetitions])
+    state.last_review_on = last
+    state.next_review_at = last + timedelta(days=state.interval_days)
+
+
+def delete_review_state(entry_id: int) -> None:
+    """Drop the schedule of a deleted entry in the current transaction.
+
+    Not left to ``ondelete="CASCADE"``: SQLite only enforces it with the
+    ``foreign_keys`` pragma enabled.
+    """
+    db.session.execute(delete(ReviewState).where(ReviewState.entry_id == entry_id))
+
+
+def bump_generation(user_id: int) -> int:
+    """Invalidate cached forecasts of ``user_id`` after its schedule changed."""
+    return _cache.incr(GENERATION_KEY.format(user_id=user_id))
+
+
+def forecast(user_id: int, days: int) -> dict:
+    """Projected reviews per day for the next ``days`` days, cached per schedule generation."""
+    if not 1 <= days <= current_app.config["REVIEW_FORECAST_MAX_DAYS"]:
+        raise AppError(code=1001, message="invalid_days", status_code=400)
+    start = date.today()
+    generation = int(_cache.get(GENERATION_KEY.format(user_id=user_id), 0))
+    key = FORECAST_KEY.format(user_id=user_id, generation=generation, start=start.isoformat(), days=days)
+    payload = _cache.get(key)
+    if payload is None:
+        # Entries sharing a due day and repetition count project identically; load them as groups.
+        rows = db.session.execute(
+            select(ReviewState.next_review_at, ReviewState.repetitions, func.count())
+            .where(ReviewState.user_id == user_id)
+            .group_by(ReviewState.next_review_at, ReviewState.repetitions)
+        ).all()
+        next_days = np.fromiter((r[0].toordinal() for r in rows), dtype=np.int64, count=len(rows))
+        repetitions = np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows))
+        weights = np.fromiter((r[2] for r in rows), dtype=np.int64, count=len(rows))
+        counts = project_due_counts(next_days - start.toordinal(), repetitions, days, weights)
+        payload = {
+            "start": start.isoformat(),
+            "days": days,
+            "items": [
+                {"date": (start + timedelta(days=i)).isoformat(), "count": int(c)} for i, c in enumerate(counts)
+            ],
+            "overdue": int(weights[next_days < start.toordinal()].sum()),
+            "total": int(counts.sum()),
+        }
+        _cache.set(
+            key,
+            payload,
+            ttl=current_app.config["REVIEW_FORECAST_CACHE_TTL"],
+            local_ttl=current_app.config["REVIEW_FORECAST_CACHE_LOCAL_TTL"],
+        )
+    return payload
+
+
+def project_due_counts(
+    offsets: np.ndarray, repetitions: np.ndarray, days: int, weights: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Reviews landing on each of the next ``days`` days if every due entry is reviewed on time.
+
+    ``offsets`` are days until each entry (or group of ``weights`` entries) is next due,
+    negative when overdue, which counts as today. Each round reviews everything still
+    inside the horizon and moves it out by its next interval, so the loop runs once
+    per review round, not per entry.
+    """
+    position = np.maximum(offsets, 0)
+    reps = repetitions.copy()
+    weights = np.ones_like(position) if weights is None else weights
+    table = interval_table(int(reps.max(initial=0)) + days + 1)
+    counts = np.zeros(days, dtype=np.int64)
+    active = position < days
+    while active.any():
+        position, reps, weights = position[active], reps[active], weights[active]
+        counts += np.bincount(position, weights=weights, minlength=days).astype(np.int64)
+        reps += 1
+        position = position + table[reps]
+        active = position < days
+    return counts
+
+
+def list_due(user_id: int, on: Optional[date], limit: int) -> tuple[list[dict], bool]:
+    """Entries due on or before ``on`` (default today), most overdue first.
+
+    Returns ``(items, has_more)``; one range scan on ``(user_id, next_review_at)``.
+    """
+    if not 1 <= limit <= current_app.config["REVIEW_DUE_MAX_LIMIT"]:
+        raise AppError(code=1001, message="invalid_limit", status_code=400)
+    on = on or date.today()
+    rows = (
+        db.session.query(ReviewState, KnowledgeEntry.title)
+        .join(KnowledgeEntry, KnowledgeEntry.id == ReviewState.entry_id)
+        .filter(ReviewState.user_id == user_id, ReviewState.next_review_at <= on)
+        .order_by(ReviewState.next_review_at, ReviewState.id)
+        .limit(limit + 1)
+        .all()
+    )
+    items = [
+        {**state.as_dict(), "title": title, "overdue_days": (on - state.next_review_at).days}
+        for state, title in rows[:limit]
+    ]
+    return items, len(rows) > limit
+
+
+def rebuild_review_state(batch_size: int = 1000) -> int:
+    """Recompute every schedule from ``study_logs``, one aggregate query and NumPy pass per batch."""
+    processed, position = 0, (0, 0)
+    while True:
+        rows = db.session.execute(
+            select(
+                StudyLog.user_id,
+                StudyLog.entry_id,
+                func.count(func.distinct(StudyLog.logged_at)),
+                func.max(StudyLog.logged_at),
+            )
+            .where(tuple_(StudyLog.user_id, StudyLog.entry_id) > tuple_(*position))
+            .group_by(StudyLog.user_id, StudyLog.entry_id)
+            .order_by(StudyLog.user_id, StudyLog.entry_id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        user_ids, entry_ids, repetitions, last_days = zip(*rows)
+        repetitions = np.asarray(repetitions, dtype=np.int64)
+        last = np.fromiter((d.toordinal() for d in last_days), dtype=np.int64, count=len(rows))
+        intervals = interval_table(int(repetitions.max()))[repetitions]
+        next_review = last + intervals
+        db.session.execute(delete(ReviewState).where(ReviewState.entry_id.in_(entry_ids)))
+        db.session.execute(
+            insert(ReviewState),
+            [
+                {
+                    "user_id": user_ids[i],
+                    "entry_id": entry_ids[i],
+                    "repetitions": int(repetitions[i]),
+                    "stability": DEFAULT_STABILITY,
+                    "interval_days": int(intervals[i]),
+                    "last_review_on": last_days[i],
+                    "next_review_at": date.fromordinal(int(next_review[i])),
+                }
+                for i in range(len(rows))
+            ],
+        )
+        db.session.commit()
+        for user_id in set(user_ids):
+            bump_generation(user_id)
+        processed += len(rows)
+        position = rows[-1][:2]
+    return processed
+
+
+def _new_state(user_id: int, entry_id: int, repetitions: int, last: date) -> ReviewState:
+    interval = int(interval_table(repetitions)[repetitions])
+    return ReviewState(
+        user_id=user_id,
+        entry_id=entry_id,
+        repetitions=repetitions,
+        stability=DEFAULT_STABILITY,
+        interval_days=interval,
+        last_review_on=last,
+        next_review_at=last + timedelta(days=interval),
+    )
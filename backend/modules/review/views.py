@@ -0,0 +1,37 @@
+import click
+from flask import Blueprint, request
+from flask_jwt_extended import get_jwt_identity
+
+from backend.common.auth import jwt_required
+from backend.common.response import response_ok
+from backend.modules.review.service import forecast, list_due, rebuild_review_state
+from backend.modules.study_log.service import _parse_date
+
+review_bp = Blueprint("review", __name__, url_prefix="/api/review")
+
+
+@review_bp.get("/due")
+@jwt_required()
+def due_list():
+    user_id = int(get_jwt_identity())
+    items, has_more = list_due(
+        user_id,
+        _parse_date(request.args.get("date")),
+        request.args.get("limit", default=50, type=int),
+    )
+    return response_ok({"items": items, "has_more": has_more})
+
+
+@review_bp.get("/forecast")
+@jwt_required()
+def forecast_view():
+    user_id = int(get_jwt_identity())
+    return response_ok(forecast(user_id, request.args.get("days", default=30, type=int)))
+
+
+@review_bp.cli.command("rebuild-state")
+@click.option("--batch-size", type=int, default=1000, help="User/entry pairs processed per transaction.")
+def rebuild_state_command(batch_size):
+    """Recompute review schedules from existing study logs."""
+    count = rebuild_review_state(batch_size=batch_size)
+    click.echo(f"rebuilt review state for {count} entries")
@@ -1,23 +1,54 @@
 from datetime import datetime, date
+from typing import Iterable
 
 from backend.extensions import db
 
 
 class StudyLog(db.Model):
     __tablename__ = "study_logs"
+    __table_args__ = (
+        # Idempotency for retried uploads; NULL keys never collide.
+        db.UniqueConstraint("user_id", "client_key", name="uq_study_logs_user_client_key"),
+        # Serves listing order and keyset pagination.
+        db.Index("ix_study_logs_user_logged", "user_id", "logged_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
     entry_id = db.Column(db.Integer, db.ForeignKey("knowledge_entries.id"), nullable=False, index=True)
     note = db.Column(db.Text, nullable=True)
+    client_key = db.Column(db.String(64), nullable=True)
     logged_at = db.Column(db.Date, default=date.today, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    def as_dict(self) -> dict:
-        return {
+    # Populated only by queries that join it, see ``list_logs(include_title=True)``.
+    entry_title = db.query_expression()
+
+    def as_dict(self, include: Iterable[str] = ()) -> dict:
+        data = {
             "id": self.id,
             "entry_id": self.entry_id,
             "note": self.note,
+            "client_key": self.client_key,
             "logged_at": self.logged_at.isoformat(),
             "created_at": self.created_at.isoformat(),
         }
+        if "entry_title" in include:
+            data["entry_title"] = self.entry_title
+        return data
+
+
+class StudyDailyStat(db.Model):
+    """Per-user, per-day rollup of study logs, maintained by ``create_log``."""
+
+    __tablename__ = "study_daily_stats"
+    __table_args__ = (db.UniqueConstraint("user_id", "day", name="uq_study_daily_stats_user_day"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    log_count = db.Column(db.Integer, nullable=False, default=0)
+    # Distinct entries studied that day.
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+    # Logs per topic id as {"<topic_id>": n}; entries without a topic count under "none".
+    topics = db.Column(db.JSON, nullable=False, default=dict)
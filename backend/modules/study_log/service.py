@@ -1,36 +1,180 @@
 from datetime import date, datetime
-from typing import Iterable, Optional
+from typing import Optional
+
+from flask import current_app
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import with_expression
 
 from backend.common.errors import AppError
+from backend.common.ids import is_valid_id
+from backend.common.pagination import decode_cursor, encode_cursor
 from backend.extensions import db
+from backend.modules.knowledge.models import KnowledgeEntry
 from backend.modules.knowledge.service import _get_entry
+from backend.modules.knowledge.suggest import record_study
+from backend.modules.review.service import bump_generation as bump_review_generation, record_review
 from backend.modules.study_log.models import StudyLog
+from backend.modules.study_log.stats import record_daily_stat
+
+MAX_CLIENT_KEY_LEN = 64
 
 
 def create_log(user_id: int, payload: dict) -> StudyLog:
     entry_id = payload.get("entry_id")
     if not entry_id:
         raise AppError(code=3201, message="missing_entry_id", status_code=400)
-    _get_entry(user_id, entry_id)
+    client_key = _parse_client_key(payload.get("client_key"))
+    if client_key:
+        existing = StudyLog.query.filter_by(user_id=user_id, client_key=client_key).first()
+        if existing:
+            return existing
+    entry = _get_entry(user_id, entry_id)
     logged_at = _parse_date(payload.get("logged_at")) or date.today()
-    log = StudyLog(
-        user_id=user_id,
-        entry_id=entry_id,
-        note=payload.get("note"),
-        logged_at=logged_at,
-    )
-    db.session.add(log)
-    db.session.commit()
+    log = _add_log(user_id, entry, logged_at, payload.get("note"), client_key)
+    _commit_logs(user_id, [log])
     return log
 
 
-def list_logs(user_id: int, start_date: Optional[date], end_date: Optional[date]) -> Iterable[StudyLog]:
+def create_logs_batch(user_id: int, items: list) -> dict:
+    """Insert many logs in one transaction; returns per-item results in request order.
+
+    Entry ownership and client keys are each checked with one ``IN`` query. Items
+    whose ``client_key`` was already stored (or repeats earlier in the batch) are
+    reported as ``duplicate`` with the existing log instead of being inserted.
+    """
+    if not isinstance(items, list) or not items:
+        raise AppError(code=1001, message="missing_items", status_code=400)
+    if len(items) > current_app.config["STUDY_LOG_BATCH_MAX_ITEMS"]:
+        raise AppError(code=1001, message="too_many_items", status_code=400)
+
+    parsed, results = [], [None] * len(items)
+    for index, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise AppError(code=1001, message="invalid_item", status_code=400)
+            entry_id = item.get("entry_id")
+            if entry_id is None:
+                raise AppError(code=3201, message="missing_entry_id", status_code=400)
+            if not is_valid_id(entry_id):
+                raise AppError(code=3201, message="invalid_entry_id", status_code=400)
+            parsed.append(
+                (
+                    index,
+                    entry_id,
+                    _parse_date(item.get("logged_at")) or date.today(),
+                    item.get("note"),
+                    _parse_client_key(item.get("client_key")),
+                )
+            )
+        except AppError as exc:
+            results[index] = {"index": index, "status": "error", "error": exc.message}
+
+    entries = {
+        e.id: e
+        for e in KnowledgeEntry.query.filter(
+            KnowledgeEntry.user_id == user_id, KnowledgeEntry.id.in_({p[1] for p in parsed})
+        )
+    }
+    keys = {p[4] for p in parsed if p[4]}
+    seen = {
+        log.client_key: log
+        for log in (StudyLog.query.filter(StudyLog.user_id == user_id, StudyLog.client_key.in_(keys)) if keys else [])
+    }
+
+    created = []
+    # Oldest first, so review schedules mostly advance instead of recounting.
+    for index, entry_id, logged_at, note, client_key in sorted(parsed, key=lambda p: (p[2], p[0])):
+        if client_key in seen:
+            results[index] = {"index": index, "status": "duplicate", "log": seen[client_key]}
+            continue
+        entry = entries.get(entry_id)
+        if entry is None:
+            results[index] = {"index": index, "status": "error", "error": "entry_not_found"}
+            continue
+        log = _add_log(user_id, entry, logged_at, note, client_key)
+        if client_key:
+            seen[client_key] = log
+        created.append(log)
+        results[index] = {"index": index, "status": "created", "log": log}
+    _commit_logs(user_id, created)
+
+    counts = {"created": 0, "duplicate": 0, "error": 0}
+    for result in results:
+        counts[result["status"]] += 1
+        if "log" in result:
+            result["log"] = result["log"].as_dict()
+    return {"items": results, **counts}
+
+
+def list_logs(
+    user_id: int,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    page_size: int = 50,
+    cursor: Optional[str] = None,
+    with_total: bool = True,
+    include_title: bool = False,
+) -> tuple[Optional[int], list[StudyLog], Optional[str]]:
+    """Return ``(total, items, next_cursor)``, newest first.
+
+    Pages are keyset-paginated on ``(logged_at, id)`` over the ``(user_id, logged_at,
+    id)`` index. ``include_title`` joins the entry title into ``log.entry_title`` in the
+    same query.
+    """
+    if not 1 <= page_size <= current_app.config["STUDY_LOG_MAX_PAGE_SIZE"]:
+        raise AppError(code=1001, message="invalid_page_size", status_code=400)
+    position = decode_cursor(cursor)
     query = StudyLog.query.filter_by(user_id=user_id)
     if start_date:
         query = query.filter(StudyLog.logged_at >= start_date)
     if end_date:
         query = query.filter(StudyLog.logged_at <= end_date)
-    return query.order_by(StudyLog.logged_at.desc(), StudyLog.id.desc()).all()
+    total = query.count() if with_total else None
+    if position:
+        query = query.filter(tuple_(StudyLog.logged_at, StudyLog.id) < tuple_(position[0].date(), position[1]))
+    if include_title:
+        query = query.outerjoin(KnowledgeEntry, KnowledgeEntry.id == StudyLog.entry_id).options(
+            with_expression(StudyLog.entry_title, KnowledgeEntry.title)
+        )
+    # One extra row tells us whether another page exists without counting.
+    items = query.order_by(StudyLog.logged_at.desc(), StudyLog.id.desc()).limit(page_size + 1).all()
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        next_cursor = encode_cursor(items[-1].logged_at, items[-1].id)
+    return total, items, next_cursor
+
+
+def _add_log(
+    user_id: int, entry: KnowledgeEntry, logged_at: date, note: Optional[str], client_key: Optional[str]
+) -> StudyLog:
+    """Stage a log with its rollup and review-state updates in the current transaction."""
+    record_daily_stat(user_id, logged_at, entry.id, entry.topic_id)
+    log = StudyLog(user_id=user_id, entry_id=entry.id, note=note, logged_at=logged_at, client_key=client_key)
+    db.session.add(log)
+    record_review(user_id, entry.id, logged_at)
+    return log
+
+
+def _commit_logs(user_id: int, logs: list[StudyLog]) -> None:
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent retry stored the same client key first; the client can retry safely.
+        db.session.rollback()
+        raise AppError(code=3202, message="duplicate_client_key", status_code=409)
+    if logs:
+        bump_review_generation(user_id)
+        record_study(user_id, [log.entry_id for log in logs])
+
+
+def _parse_client_key(value) -> Optional[str]:
+    if value is None:
+        return None
+    if not isinstance(value, str) or not value.strip() or len(value) > MAX_CLIENT_KEY_LEN:
+        raise AppError(code=1001, message="invalid_client_key", status_code=400)
+    return value.strip()
 
 
 def _parse_date(value):
@@ -38,5 +182,5 @@ def _parse_date(value):
         return None
     try:
         return datetime.fromisoformat(value).date()
-    except ValueError:
+    except (TypeError, ValueError):
         raise AppError(code=1001, message="invalid_date", status_code=400)
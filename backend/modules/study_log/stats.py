@@ -0,0 +1,124 @@
+"""Daily study rollups behind trend charts.
+
+``study_daily_stats`` holds one small row per user and day, upserted in the same
+transaction as each study log, so a year of history is at most 366 rows however
+many logs it contains. Weekly and monthly series are folded from the daily rows.
+"""
+from datetime import date, timedelta
+from typing import Optional
+
+from flask import current_app
+from sqlalchemy import delete, distinct, func, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from backend.common.errors import AppError
+from backend.extensions import db
+from backend.modules.knowledge.models import KnowledgeEntry
+from backend.modules.study_log.models import StudyDailyStat, StudyLog
+
+GRANULARITIES = ("day", "week", "month")
+NO_TOPIC = "none"
+# Default range per granularity when no start_date is given.
+_DEFAULT_SPANS = {"day": 30, "week": 12 * 7, "month": 365}
+
+
+def record_daily_stat(user_id: int, day: date, entry_id: int, topic_id: Optional[int]) -> None:
+    """Count one new log in the day's rollup; call before the log is added to the session."""
+    new_entry = not db.session.query(
+        StudyLog.query.filter_by(user_id=user_id, entry_id=entry_id, logged_at=day).exists()
+    ).scalar()
+    stat = _locked_stat(user_id, day)
+    stat.log_count += 1
+    stat.entry_count += int(new_entry)
+    topic_key = NO_TOPIC if topic_id is None else str(topic_id)
+    # Reassign so the JSON column is flagged dirty.
+    stat.topics = {**stat.topics, topic_key: stat.topics.get(topic_key, 0) + 1}
+
+
+def study_stats(user_id: int, granularity: str, start: Optional[date], end: Optional[date]) -> list[dict]:
+    """Zero-filled series of rollups between ``start`` and ``end`` (inclusive)."""
+    if granularity not in GRANULARITIES:
+        raise AppError(code=1001, message="invalid_granularity", status_code=400)
+    end = end or date.today()
+    start = start or end - timedelta(days=_DEFAULT_SPANS[granularity] - 1)
+    if start > end or (end - start).days >= current_app.config["STUDY_STATS_MAX_DAYS"]:
+        raise AppError(code=1001, message="invalid_date_range", status_code=400)
+
+    buckets: dict[date, dict] = {}
+    day = start
+    while day <= end:
+        period = _period_start(day, granularity)
+        buckets.setdefault(period, {"period": period.isoformat(), "logs": 0, "entry_days": 0, "topics": {}})
+        day += timedelta(days=1)
+    rows = StudyDailyStat.query.filter(
+        StudyDailyStat.user_id == user_id, StudyDailyStat.day >= start, StudyDailyStat.day <= end
+    )
+    for row in rows:
+        bucket = buckets[_period_start(row.day, granularity)]
+        bucket["logs"] += row.log_count
+        bucket["entry_days"] += row.entry_count
+        for topic, count in (row.topics or {}).items():
+            bucket["topics"][topic] = bucket["topics"].get(topic, 0) + count
+    return list(buckets.values())
+
+
+def rebuild_daily_stats(batch_size: int = 500) -> int:
+    """Recompute every rollup from ``study_logs``, ``batch_size`` users per transaction."""
+    processed, last_user = 0, 0
+    while True:
+        user_ids = db.session.scalars(
+            select(StudyLog.user_id)
+            .distinct()
+            .where(StudyLog.user_id > last_user)
+            .order_by(StudyLog.user_id)
+            .limit(batch_size)
+        ).all()
+        if not user_ids:
+            break
+        stats: dict[tuple[int, date], dict] = {}
+        per_day = db.session.execute(
+            select(StudyLog.user_id, StudyLog.logged_at, func.count(StudyLog.id), func.count(distinct(StudyLog.entry_id)))
+            .where(StudyLog.user_id.in_(user_ids))
+            .group_by(StudyLog.user_id, StudyLog.logged_at)
+        )
+        for user_id, day, logs, entries in per_day:
+            stats[(user_id, day)] = {
+                "user_id": user_id, "day": day, "log_count": logs, "entry_count": entries, "topics": {}
+            }
+        per_topic = db.session.execute(
+            select(StudyLog.user_id, StudyLog.logged_at, KnowledgeEntry.topic_id, func.count(StudyLog.id))
+            .outerjoin(KnowledgeEntry, KnowledgeEntry.id == StudyLog.entry_id)
+            .where(StudyLog.user_id.in_(user_ids))
+            .group_by(StudyLog.user_id, StudyLog.logged_at, KnowledgeEntry.topic_id)
+        )
+        for user_id, day, topic_id, logs in per_topic:
+            stats[(user_id, day)]["topics"][NO_TOPIC if topic_id is None else str(topic_id)] = logs
+        db.session.execute(delete(StudyDailyStat).where(StudyDailyStat.user_id.in_(user_ids)))
+        db.session.execute(insert(StudyDailyStat), list(stats.values()))
+        db.session.commit()
+        processed += len(stats)
+        last_user = user_ids[-1]
+    return processed
+
+
+def _locked_stat(user_id: int, day: date) -> StudyDailyStat:
+    query = StudyDailyStat.query.filter_by(user_id=user_id, day=day).with_for_update()
+    stat = query.first()
+    if stat is not None:
+        return stat
+    try:
+        # A concurrent first log of the day may insert the row first; retry as an update.
+        with db.session.begin_nested():
+            stat = StudyDailyStat(user_id=user_id, day=day, log_count=0, entry_count=0, topics={})
+            db.session.add(stat)
+        return stat
+    except IntegrityError:
+        return query.one()
+
+
+def _period_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
@@ -1,12 +1,19 @@
 from datetime import date, timedelta
 
+import click
 from flask import Blueprint, request
-from flask_jwt_extended import get_jwt_identity, jwt_required
+from flask_jwt_extended import get_jwt_identity
 
+from backend.common.auth import jwt_required
+from backend.common.errors import AppError
+from backend.common.pagination import parse_bool
 from backend.common.response import response_ok
-from backend.modules.study_log.service import create_log, list_logs, _parse_date
+from backend.modules.study_log.service import create_log, create_logs_batch, list_logs, _parse_date
+from backend.modules.study_log.stats import rebuild_daily_stats, study_stats
 
-study_log_bp = Blueprint("study_log", __name__, url_prefix="/api/study")
+LOG_INCLUDES = {"entry_title"}
+
+study_log_bp = Blueprint("study_log", __name__, url_prefix="/api/study", cli_group="study")
 
 
 @study_log_bp.post("/logs")
@@ -18,6 +25,14 @@ def create_study_log():
     return response_ok(log.as_dict(), "study_log_created")
 
 
+@study_log_bp.post("/logs:batch")
+@jwt_required()
+def create_study_logs_batch():
+    user_id = int(get_jwt_identity())
+    payload = request.get_json() or {}
+    return response_ok(create_logs_batch(user_id, payload.get("items")), "study_logs_synced")
+
+
 @study_log_bp.get("/logs")
 @jwt_required()
 def list_study_logs():
@@ -27,6 +42,46 @@ def list_study_logs():
     if not start and not end:
         end = date.today()
         start = end - timedelta(days=6)
-    logs = list_logs(user_id, start, end)
-    data = [log.as_dict() for log in logs]
-    return response_ok({"items": data, "total": len(data), "start_date": start.isoformat(), "end_date": end.isoformat()})
+    include = {v.strip() for v in (request.args.get("include") or "").split(",") if v.strip()}
+    if include - LOG_INCLUDES:
+        raise AppError(code=1001, message="invalid_include", status_code=400)
+    total, logs, next_cursor = list_logs(
+        user_id,
+        start,
+        end,
+        page_size=request.args.get("page_size", default=50, type=int),
+        cursor=request.args.get("cursor"),
+        with_total=parse_bool(request.args.get("with_total")),
+        include_title="entry_title" in include,
+    )
+    return response_ok(
+        {
+            "items": [log.as_dict(include) for log in logs],
+            "total": total,
+            "next_cursor": next_cursor,
+            "start_date": start.isoformat() if start else None,
+            "end_date": end.isoformat() if end else None,
+        }
+    )
+
+
+@study_log_bp.get("/stats")
+@jwt_required()
+def study_stats_view():
+    user_id = int(get_jwt_identity())
+    granularity = request.args.get("granularity", default="day")
+    items = study_stats(
+        user_id,
+        granularity,
+        _parse_date(request.args.get("start_date")),
+        _parse_date(request.args.get("end_date")),
+    )
+    return response_ok({"granularity": granularity, "items": items})
+
+
+@study_log_bp.cli.command("rebuild-stats")
+@click.option("--batch-size", type=int, default=500, help="Users processed per transaction.")
+def rebuild_stats_command(batch_size):
+    """Recompute the daily study rollups from existing study logs."""
+    count = rebuild_daily_stats(batch_size=batch_size)
+    click.echo(f"rebuilt {count} daily study rollups")
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from backend.extensions import db
+
+TAG_NAME_MAX_LEN = 64
+
+knowledge_entry_tags = db.Table(
+    "knowledge_entry_tags",
+    db.Column("entry_id", db.Integer, db.ForeignKey("knowledge_entries.id"), primary_key=True),
+    db.Column("tag_id", db.Integer, db.ForeignKey("tags.id"), primary_key=True),
+    # tag -> entries lookups (filtering, counts); the primary key serves entry -> tags.
+    db.Index("ix_knowledge_entry_tags_tag_entry", "tag_id", "entry_id"),
+)
+
+plan_tags = db.Table(
+    "plan_tags",
+    db.Column("plan_id", db.Integer, db.ForeignKey("plans.id"), primary_key=True),
+    db.Column("tag_id", db.Integer, db.ForeignKey("tags.id"), primary_key=True),
+    db.Index("ix_plan_tags_tag_plan", "tag_id", "plan_id"),
+)
+
+
+class Tag(db.Model):
+    __tablename__ = "tags"
+    __table_args__ = (db.UniqueConstraint("user_id", "name", name="uq_tags_user_name"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    name = db.Column(db.String(TAG_NAME_MAX_LEN), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
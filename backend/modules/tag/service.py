@@ -0,0 +1,159 @@
+from typing import Iterable
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from backend.common.errors import AppError
+from backend.extensions import db
+from backend.modules.tag.models import TAG_NAME_MAX_LEN, Tag, knowledge_entry_tags, plan_tags
+
+# Savepointed inserts retried when racing writers keep taking the same tag names.
+_CREATE_ATTEMPTS = 3
+
+
+def normalize_tags(values: Iterable) -> list[str]:
+    """Strip, drop empties and de-duplicate while keeping the caller's order."""
+    seen: dict[str, None] = {}
+    for value in values or []:
+        name = str(value).strip()
+        if name:
+            seen.setdefault(name, None)
+    return list(seen)
+
+
+def parse_tags(values) -> list[str]:
+    """Validate a request's ``tags`` (a list of strings, ``null`` for none) and normalize it."""
+    if values is None:
+        return []
+    if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise AppError(code=1001, message="invalid_tags", status_code=400)
+    names = normalize_tags(values)
+    if any(len(name) > TAG_NAME_MAX_LEN for name in names):
+        raise AppError(code=1001, message="tag_too_long", status_code=400)
+    return names
+
+
+def resolve_tags(user_id: int, names: list[str]) -> list[Tag]:
+    """Return ``Tag`` rows for ``names``, creating missing ones (one IN query)."""
+    if not names:
+        return []
+    existing = _existing_tags(user_id, names)
+    for _ in range(_CREATE_ATTEMPTS):
+        missing = [name for name in names if name not in existing]
+        if not missing:
+            break
+        try:
+            with db.session.begin_nested():
+                created = [Tag(user_id=user_id, name=name) for name in missing]
+                db.session.add_all(created)
+        except IntegrityError:
+            # A concurrent request created some of these first; use its rows.
+            existing = _existing_tags(user_id, names)
+            continue
+        existing.update((tag.name, tag) for tag in created)
+    return [existing[name] for name in names]
+
+
+def _existing_tags(user_id: int, names: list[str]) -> dict[str, Tag]:
+    return {t.name: t for t in Tag.query.filter(Tag.user_id == user_id, Tag.name.in_(names))}
+
+
+def tag_filter(query, association, owner_column, user_id: int, tag: str):
+    """Join ``query`` through the tag index so only rows tagged ``tag`` remain."""
+    return (
+        query.join(association, getattr(association.c, _owner_key(association)) == owner_column)
+        .join(Tag, Tag.id == association.c.tag_id)
+        .filter(Tag.user_id == user_id, Tag.name == tag)
+    )
+
+
+def entry_tag_counts(user_id: int) -> list[tuple[str, int]]:
+    """Per-tag entry counts for one user from a single aggregate query."""
+    count = func.count(knowledge_entry_tags.c.entry_id)
+    rows = (
+        db.session.query(Tag.name, count)
+        .join(knowledge_entry_tags, knowledge_entry_tags.c.tag_id == Tag.id)
+        .filter(Tag.user_id == user_id)
+        .group_by(Tag.id, Tag.name)
+        .order_by(count.desc(), Tag.name)
+        .all()
+    )
+    return [(name, total) for name, total in rows]
+
+
+def backfill_tags(batch_size: int = 500) -> dict:
+    """Populate the tag index from the legacy JSON ``tags`` arrays of entries and plans.
+
+    Legacy tags longer than ``TAG_NAME_MAX_LEN`` cannot be indexed; they are skipped
+    (counted in ``skipped`` and logged) and stay in the row's JSON ``tags`` untouched.
+    """
+    from backend.modules.knowledge.cache import bump_generation
+    from backend.modules.knowledge.models import KnowledgeEntry
+    from backend.modules.plan.models import Plan
+
+    skipped: list[int] = []
+    result = {
+        "entries": _backfill(KnowledgeEntry, knowledge_entry_tags, batch_size, skipped),
+        "plans": _backfill(Plan, plan_tags, batch_size, skipped),
+        "skipped": len(skipped),
+    }
+    if skipped:
+        current_app.logger.warning(
+            "tag backfill skipped %d tags longer than %d characters", len(skipped), TAG_NAME_MAX_LEN
+        )
+    # Tag filters now see rows they did not before; drop cached search pages.
+    for (user_id,) in db.session.query(KnowledgeEntry.user_id).distinct():
+        bump_generation(user_id)
+    return result
+
+
+def _backfill(model, association, batch_size: int, skipped: list) -> int:
+    owner_key = _owner_key(association)
+    owner_column = getattr(association.c, owner_key)
+    processed, last_id = 0, 0
+    while True:
+        rows = db.session.execute(
+            select(model.id, model.user_id, model.tags).where(model.id > last_id).order_by(model.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        # One tag lookup per user in the batch rather than per row.
+        names_by_row = {owner_id: _indexable(owner_id, tags, skipped) for owner_id, _, tags in rows}
+        names_by_user: dict[int, list] = {}
+        for owner_id, user_id, _ in rows:
+            names_by_user.setdefault(user_id, []).extend(names_by_row[owner_id])
+        tags_by_user = {
+            user_id: {tag.name: tag for tag in resolve_tags(user_id, normalize_tags(names))}
+            for user_id, names in names_by_user.items()
+        }
+        db.session.flush()
+        links = [
+            (owner_id, tags_by_user[user_id][name])
+            for owner_id, user_id, _ in rows
+            for name in names_by_row[owner_id]
+        ]
+        db.session.execute(delete(association).where(owner_column.in_([r[0] for r in rows])))
+        if links:
+            db.session.execute(
+                insert(association), [{owner_key: owner_id, "tag_id": tag.id} for owner_id, tag in links]
+            )
+        db.session.commit()
+        processed += len(rows)
+        last_id = rows[-1][0]
+    return processed
+
+
+def _indexable(owner_id: int, tags, skipped: list) -> list[str]:
+    """Names from a legacy ``tags`` array that fit the index; records the owner of each one that does not."""
+    names = []
+    for name in normalize_tags(tags):
+        if len(name) > TAG_NAME_MAX_LEN:
+            skipped.append(owner_id)
+        else:
+            names.append(name)
+    return names
+
+
+def _owner_key(association) -> str:
+    return next(c.name for c in association.columns if c.name != "tag_id")
@@ -1,14 +1,22 @@
 from flask import Blueprint
-from flask_jwt_extended import get_jwt_identity, jwt_required
+from flask_jwt_extended import get_jwt_identity
 
+from backend.common.auth import jwt_required
+from backend.common.etag import conditional
 from backend.common.response import response_ok
+from backend.extensions import db
 from backend.modules.auth.models import User
 
 user_bp = Blueprint("user", __name__, url_prefix="/api/user")
 
 
+def _profile_version():
+    return db.session.query(User.updated_at).filter_by(id=int(get_jwt_identity())).scalar()
+
+
 @user_bp.get("/profile")
 @jwt_required()
+@conditional(_profile_version)
 def profile():
     user_id = int(get_jwt_identity())
     user = User.query.get_or_404(user_id)
@@ -48,3 +48,199 @@ def test_register_and_login_and_refresh_and_logout(client):
     )
     assert post_logout.status_code == HTTPStatus.UNAUTHORIZED
     assert post_logout.json["code"] == 2003
+
+
+def test_revocation_check_is_served_from_cache(client):
+    from sqlalchemy import event
+
+    reg = client.post("/api/auth/register", json={"email": "cache@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {reg.json['data']['tokens']['access']}"}
+    assert client.get("/api/user/profile", headers=headers).status_code == HTTPStatus.OK
+
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _record)
+    try:
+        for _ in range(5):
+            assert client.get("/api/user/profile", headers=headers).status_code == HTTPStatus.OK
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _record)
+    assert not [s for s in statements if "auth_tokens" in s]
+
+    # revocation writes through, so the next request is rejected without a db lookup
+    client.post("/api/auth/logout", headers=headers)
+    resp = client.get("/api/user/profile", headers=headers)
+    assert resp.status_code == HTTPStatus.UNAUTHORIZED
+    assert resp.json["code"] == 2003
+
+
+def test_failed_revocation_write_drops_cached_negative_answer(client, monkeypatch):
+    from redis import RedisError
+
+    import backend.modules.auth.service as auth_service
+
+    class FlakyRedis:
+        """Stores values but fails every write of a revocation."""
+
+        def __init__(self):
+            self.data, self.ttls = {}, {}
+
+        def get(self, key):
+            return self.data.get(key)
+
+        def set(self, key, value, ex=None, nx=False):
+            if value == b"1":
+                raise RedisError("write failed")
+            if not (nx and key in self.data):
+                self.data[key], self.ttls[key] = value, ex
+
+        def delete(self, key):
+            self.data.pop(key, None)
+
+    redis = FlakyRedis()
+    monkeypatch.setattr(auth_service, "get_redis", lambda: redis)
+
+    reg = client.post("/api/auth/register", json={"email": "flaky@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {reg.json['data']['tokens']['access']}"}
+    assert client.get("/api/user/profile", headers=headers).status_code == HTTPStatus.OK
+    assert list(redis.data.values()) == [b"0"]
+    assert all(ttl <= client.application.config["TOKEN_REVOCATION_NEGATIVE_TTL"] for ttl in redis.ttls.values())
+
+    client.post("/api/auth/logout", headers=headers)
+    assert redis.data == {}
+    resp = client.get("/api/user/profile", headers=headers)
+    assert resp.status_code == HTTPStatus.UNAUTHORIZED
+    assert resp.json["code"] == 2003
+
+
+def test_each_request_decodes_and_checks_revocation_once(client, monkeypatch):
+    from flask_jwt_extended import view_decorators
+
+    import backend.modules.auth.views as auth_views
+
+    calls = {"decode": 0, "revoked": 0}
+    real_decode = view_decorators.decode_token
+    real_is_revoked = auth_views.is_token_revoked
+
+    def _decode(*args, **kwargs):
+        calls["decode"] += 1
+        return real_decode(*args, **kwargs)
+
+    def _is_revoked(*args, **kwargs):
+        calls["revoked"] += 1
+        return real_is_revoked(*args, **kwargs)
+
+    monkeypatch.setattr(view_decorators, "decode_token", _decode)
+    monkeypatch.setattr(auth_views, "is_token_revoked", _is_revoked)
+
+    reg = client.post("/api/auth/register", json={"email": "once@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {reg.json['data']['tokens']['access']}"}
+    assert calls == {"decode": 0, "revoked": 0}
+
+    assert client.get("/api/user/profile", headers=headers).status_code == HTTPStatus.OK
+    assert calls == {"decode": 1, "revoked": 1}
+
+    # routes without identity never touch the token
+    assert client.get("/health", headers=headers).status_code == HTTPStatus.OK
+    assert calls == {"decode": 1, "revoked": 1}
+
+
+def test_purge_expired_tokens_in_batches(app):
+    from datetime import datetime, timedelta
+
+    from backend.modules.auth.models import TokenBlocklist
+    from backend.modules.auth.service import create_user, purge_expired_tokens
+
+    user = create_user(email="purge@example.com", password="Secret123!")
+    past = datetime.now() - timedelta(hours=1)
+    future = datetime.now() + timedelta(hours=1)
+    for expires_at in [past] * 5 + [future]:
+        db.session.add(
+            TokenBlocklist(
+                jti=TokenBlocklist.new_jti(), token_type="access", user_id=user.id, revoked=True, expires_at=expires_at
+            )
+        )
+    db.session.commit()
+
+    assert purge_expired_tokens(batch_size=2) == 5
+    assert TokenBlocklist.query.filter(TokenBlocklist.expires_at < datetime.now()).count() == 0
+    assert TokenBlocklist.query.filter_by(user_id=user.id).count() == 1
+
+    result = app.test_cli_runner().invoke(args=["auth", "purge-tokens", "--batch-size", "10"])
+    assert result.exit_code == 0
+    assert "purged 0 expired tokens" in result.output
+
+
+def test_login_is_throttled_per_account(client, app, monkeypatch):
+    from backend.common.ratelimit import reset_memory_store
+
+    reset_memory_store()
+    monkeypatch.setitem(app.config, "LOGIN_MAX_ATTEMPTS_PER_ACCOUNT", 3)
+    client.post("/api/auth/register", json={"email": "throttle@example.com", "password": "Secret123!"})
+    for _ in range(3):
+        resp = client.post("/api/auth/login", json={"account": "throttle@example.com", "password": "wrong"})
+        assert resp.status_code == HTTPStatus.UNAUTHORIZED
+
+    resp = client.post("/api/auth/login", json={"account": "throttle@example.com", "password": "Secret123!"})
+    assert resp.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert resp.json["code"] == 2004
+    reset_memory_store()
+
+
+def test_login_rehashes_when_hash_method_changes(client, app, monkeypatch):
+    from backend.modules.auth.models import User
+
+    client.post("/api/auth/register", json={"email": "rehash@example.com", "password": "Secret123!"})
+    old_hash = User.query.filter_by(email="rehash@example.com").one().password_hash
+    assert old_hash.startswith("pbkdf2:sha256:1000$")
+
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_METHOD", "pbkdf2:sha256:2000")
+    resp = client.post("/api/auth/login", json={"account": "rehash@example.com", "password": "Secret123!"})
+    assert resp.status_code == HTTPStatus.OK
+    new_hash = User.query.filter_by(email="rehash@example.com").one().password_hash
+    assert new_hash.startswith("pbkdf2:sha256:2000$")
+
+
+def test_login_fails_fast_when_hash_pool_is_saturated(client, monkeypatch):
+    import threading
+
+    from backend.common import security
+
+    client.post("/api/auth/register", json={"email": "busy@example.com", "password": "Secret123!"})
+    exhausted = threading.BoundedSemaphore(1)
+    exhausted.acquire()
+    monkeypatch.setattr(security, "_hash_pool", lambda: (None, exhausted))
+    resp = client.post("/api/auth/login", json={"account": "busy@example.com", "password": "Secret123!"})
+    assert resp.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert resp.json["code"] == 2005
+
+
+def test_memory_rate_limit_store_drops_expired_and_caps_keys():
+    from backend.common.ratelimit import MemoryWindowStore
+
+    store = MemoryWindowStore(maxsize=3)
+    for i in range(5):
+        store.hit(f"old{i}", now=0.0, window=10)
+    assert len(store) == 3
+    assert store.hit("old4", now=5.0, window=10) == 2
+    # Once their windows pass, stale keys are dropped by later hits.
+    store.hit("fresh", now=100.0, window=10)
+    assert len(store) == 1
+
+
+def test_needs_rehash_fills_in_default_method_parameters(app, monkeypatch):
+    from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS
+
+    from backend.common.security import needs_rehash
+
+    stored = f"pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}$salt$hash"
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_METHOD", "pbkdf2:sha256")
+    assert needs_rehash(stored) is False
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_METHOD", "pbkdf2")
+    assert needs_rehash(stored) is False
+    assert needs_rehash("scrypt:32768:8:1$salt$hash") is True
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_METHOD", "scrypt")
+    assert needs_rehash("scrypt:32768:8:1$salt$hash") is False
@@ -1,15 +1,21 @@
 from http import HTTPStatus
+from uuid import uuid4
 
 import pytest
 
 
 @pytest.fixture
 def auth_headers(client):
-    resp = client.post("/api/auth/register", json={"email": "k1@example.com", "password": "Secret123!"})
+    email = f"k-{uuid4().hex[:8]}@example.com"
+    resp = client.post("/api/auth/register", json={"email": email, "password": "Secret123!"})
     token = resp.json["data"]["tokens"]["access"]
     return {"Authorization": f"Bearer {token}"}
 
 
+def _current_user_id(client, headers):
+    return client.get("/api/user/profile", headers=headers).json["data"]["id"]
+
+
 def test_topics_and_entries_crud(client, auth_headers):
     # create topic
     t_resp = client.post("/api/knowledge/topics", headers=auth_headers, json={"name": "Math", "desc": "Algebra"})
@@ -47,3 +53,525 @@ def test_topics_and_entries_crud(client, auth_headers):
     # delete entry
     del_resp = client.delete(f"/api/knowledge/entries/{entry_id}", headers=auth_headers)
     assert del_resp.status_code == HTTPStatus.OK
+
+
+def test_keyword_search_uses_full_text_index_and_ranks_by_relevance(client, auth_headers):
+    def _create(title, content):
+        resp = client.post("/api/knowledge/entries", headers=auth_headers, json={"title": title, "content": content})
+        return resp.json["data"]["id"]
+
+    in_title = _create("Fourier transform", "Signals.")
+    in_content = _create("Notes", "Mentions the fourier series once.")
+    _create("Unrelated", "Nothing to see.")
+    cjk = _create("线性代数", "矩阵的特征值分解")
+
+    def _search(keyword, **params):
+        resp = client.get("/api/knowledge/entries", headers=auth_headers, query_string={"keyword": keyword, **params})
+        assert resp.status_code == HTTPStatus.OK
+        return [item["id"] for item in resp.json["data"]["items"]]
+
+    assert sorted(_search("FOURIER")) == sorted([in_title, in_content])
+    assert _search("fourier", sort="relevance") == [in_title, in_content]
+    assert _search("特征值") == [cjk]
+    # short keywords fall back to substring matching
+    assert _search("矩阵") == [cjk]
+
+    # the index follows updates and deletes
+    client.put(f"/api/knowledge/entries/{in_content}", headers=auth_headers, json={"content": "Rewritten."})
+    assert _search("fourier") == [in_title]
+    client.delete(f"/api/knowledge/entries/{in_title}", headers=auth_headers)
+    assert _search("fourier") == []
+
+    bad = client.get("/api/knowledge/entries", headers=auth_headers, query_string={"sort": "random"})
+    assert bad.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_entries_keyset_pagination(client, auth_headers):
+    created = [
+        client.post(
+            "/api/knowledge/entries", headers=auth_headers, json={"title": f"Card {i}", "content": "Body"}
+        ).json["data"]["id"]
+        for i in range(5)
+    ]
+
+    seen, cursor = [], None
+    while True:
+        params = {"page_size": 2, "with_total": "false"}
+        if cursor:
+            params["cursor"] = cursor
+        data = client.get("/api/knowledge/entries", headers=auth_headers, query_string=params).json["data"]
+        assert data["total"] is None
+        seen.extend(item["id"] for item in data["items"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+    assert seen == list(reversed(created))
+
+    # page/page_size keeps working for the existing frontend
+    page2 = client.get("/api/knowledge/entries", headers=auth_headers, query_string={"page": 2, "page_size": 2})
+    assert page2.json["data"]["total"] == 5
+    assert [item["id"] for item in page2.json["data"]["items"]] == seen[2:4]
+
+    bad = client.get("/api/knowledge/entries", headers=auth_headers, query_string={"cursor": "not-a-cursor"})
+    assert bad.status_code == HTTPStatus.BAD_REQUEST
+    for page_size in (0, 101):
+        bad = client.get("/api/knowledge/entries", headers=auth_headers, query_string={"page_size": page_size})
+        assert bad.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_tag_index_filtering_counts_and_backfill(app, client, auth_headers):
+    from backend.extensions import db
+    from backend.modules.knowledge.models import KnowledgeEntry
+
+    def _create(tags):
+        resp = client.post(
+            "/api/knowledge/entries", headers=auth_headers, json={"title": "T", "content": "C", "tags": tags}
+        )
+        return resp.json["data"]
+
+    first = _create(["math", " algebra ", "math"])
+    assert first["tags"] == ["math", "algebra"]
+    second = _create(["math"])
+    client.put(f"/api/knowledge/entries/{second['id']}", headers=auth_headers, json={"tags": ["math", "geometry"]})
+    for bad_tags in ("abc", [1, {"a": 2}], ["x" * 65]):
+        bad = client.post(
+            "/api/knowledge/entries", headers=auth_headers, json={"title": "T", "content": "C", "tags": bad_tags}
+        )
+        assert bad.status_code == HTTPStatus.BAD_REQUEST
+        bad = client.put(f"/api/knowledge/entries/{second['id']}", headers=auth_headers, json={"tags": bad_tags})
+        assert bad.status_code == HTTPStatus.BAD_REQUEST
+
+    def _ids(tag):
+        resp = client.get("/api/knowledge/entries", headers=auth_headers, query_string={"tag": tag})
+        return sorted(item["id"] for item in resp.json["data"]["items"])
+
+    assert _ids("math") == sorted([first["id"], second["id"]])
+    assert _ids("geometry") == [second["id"]]
+
+    counts = client.get("/api/knowledge/tags", headers=auth_headers).json["data"]["items"]
+    assert counts == [{"name": "math", "count": 2}, {"name": "algebra", "count": 1}, {"name": "geometry", "count": 1}]
+
+    # rows written before the tag index existed only have the JSON array
+    # legacy tags too long for the index are skipped and left in the JSON array
+    legacy = KnowledgeEntry(
+        user_id=_current_user_id(client, auth_headers), title="Old", content="C", tags=["legacy", "y" * 80]
+    )
+    db.session.add(legacy)
+    db.session.commit()
+    assert _ids("legacy") == []
+    result = app.test_cli_runner().invoke(args=["knowledge", "backfill-tags", "--batch-size", "2"])
+    assert result.exit_code == 0, result.output
+    assert "skipped 1 tags" in result.output
+    assert _ids("legacy") == [legacy.id]
+    assert db.session.get(KnowledgeEntry, legacy.id).tags == ["legacy", "y" * 80]
+    assert _ids("math") == sorted([first["id"], second["id"]])
+
+
+def test_tag_resolution_survives_concurrent_insert_and_backfill_batches_lookups(app, client, auth_headers, monkeypatch):
+    from sqlalchemy import event
+
+    from backend.extensions import db
+    from backend.modules.knowledge.models import KnowledgeEntry
+    from backend.modules.tag import service as tag_service
+
+    existing = client.post(
+        "/api/knowledge/entries", headers=auth_headers, json={"title": "Race", "content": "C", "tags": ["raced"]}
+    ).json["data"]
+    user_id = db.session.get(KnowledgeEntry, existing["id"]).user_id
+
+    # The first lookup misses "raced", as if another request inserted it right after.
+    real_lookup, calls = tag_service._existing_tags, []
+
+    def stale_lookup(uid, names):
+        calls.append(names)
+        return {} if len(calls) == 1 else real_lookup(uid, names)
+
+    monkeypatch.setattr(tag_service, "_existing_tags", stale_lookup)
+    tags = tag_service.resolve_tags(user_id, ["raced", "fresh-tag"])
+    db.session.commit()
+    assert [t.name for t in tags] == ["raced", "fresh-tag"] and all(t.id for t in tags)
+    monkeypatch.undo()
+
+    statements = []
+
+    def count_tag_selects(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM tags" in statement:
+            statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", count_tag_selects)
+    try:
+        result = app.test_cli_runner().invoke(args=["knowledge", "backfill-tags", "--batch-size", "1000"])
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count_tag_selects)
+    assert result.exit_code == 0, result.output
+    users = db.session.query(KnowledgeEntry.user_id).distinct().count()
+    assert len(statements) <= users + 1  # plans add at most one more lookup
+
+
+def test_search_results_are_cached_per_generation(client, auth_headers):
+    client.post("/api/knowledge/entries", headers=auth_headers, json={"title": "Cached", "content": "Body"})
+
+    first = client.get("/api/knowledge/entries", headers=auth_headers, query_string={"keyword": "cached"})
+    assert first.headers["X-Cache"] == "MISS"
+    second = client.get("/api/knowledge/entries", headers=auth_headers, query_string={"keyword": " CACHED "})
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json["data"] == first.json["data"]
+
+    bypass = client.get(
+        "/api/knowledge/entries",
+        headers={**auth_headers, "X-Cache-Bypass": "1"},
+        query_string={"keyword": "cached"},
+    )
+    assert bypass.headers["X-Cache"] == "BYPASS"
+
+    # any write bumps the user's generation, so the next read misses and sees it
+    client.post("/api/knowledge/entries", headers=auth_headers, json={"title": "Cached too", "content": "Body"})
+    third = client.get("/api/knowledge/entries", headers=auth_headers, query_string={"keyword": "cached"})
+    assert third.headers["X-Cache"] == "MISS"
+    assert third.json["data"]["total"] == 2
+
+
+def test_entries_sparse_fields_and_snippet_skip_content_column(client, auth_headers):
+    from sqlalchemy import event
+
+    from backend.extensions import db
+
+    long_content = "x" * 5000
+    client.post("/api/knowledge/entries", headers=auth_headers, json={"title": "Long", "content": long_content})
+
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _record)
+    try:
+        resp = client.get(
+            "/api/knowledge/entries",
+            headers=auth_headers,
+            query_string={"fields": "title,tags", "snippet_len": 10},
+        )
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _record)
+
+    assert resp.status_code == HTTPStatus.OK
+    item = resp.json["data"]["items"][0]
+    assert set(item) == {"id", "title", "tags", "snippet"}
+    assert item["snippet"] == "x" * 10
+    entry_selects = [s for s in statements if "FROM knowledge_entries" in s and "count(" not in s]
+    assert entry_selects and all("knowledge_entries.content AS" not in s for s in entry_selects)
+
+    bad = client.get("/api/knowledge/entries", headers=auth_headers, query_string={"fields": "password"})
+    assert bad.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_bulk_import_and_streaming_export(client, auth_headers):
+    import json
+
+    topic_id = client.post("/api/knowledge/topics", headers=auth_headers, json={"name": "Imported"}).json["data"]["id"]
+    ndjson = "\n".join(
+        [
+            json.dumps({"title": "One", "content": "First", "tags": ["bulk"], "topic_id": topic_id}),
+            json.dumps({"title": "", "content": "No title"}),
+            "{not json",
+            json.dumps({"title": "Two", "content": "Second", "tags": ["bulk", "extra"]}),
+            json.dumps({"title": "Three", "content": "Third", "topic_id": 999999}),
+        ]
+    )
+    resp = client.post(
+        "/api/knowledge/entries/import",
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"},
+        data=ndjson.encode(),
+    )
+    assert resp.status_code == HTTPStatus.OK
+    result = resp.json["data"]
+    assert result["imported"] == 2
+    assert result["failed"] == 3
+    assert result["errors"] == [
+        {"line": 2, "error": "missing_title_or_content"},
+        {"line": 3, "error": "invalid_json"},
+        {"line": 5, "error": "topic_not_found"},
+    ]
+
+    csv_body = 'title,content,tags\nCsv card,"Multi\nline",bulk;csv\n,missing,\n'
+    resp = client.post(
+        "/api/knowledge/entries/import", headers={**auth_headers, "Content-Type": "text/csv"}, data=csv_body.encode()
+    )
+    assert resp.json["data"]["imported"] == 1
+    assert resp.json["data"]["errors"] == [{"line": 4, "error": "missing_title_or_content"}]
+
+    tagged = client.get("/api/knowledge/entries", headers=auth_headers, query_string={"tag": "bulk"})
+    assert tagged.json["data"]["total"] == 3
+
+    export = client.get("/api/knowledge/entries/export", headers=auth_headers)
+    assert export.status_code == HTTPStatus.OK
+    assert export.mimetype == "application/x-ndjson"
+    rows = [json.loads(line) for line in export.get_data(as_text=True).splitlines()]
+    assert [r["title"] for r in rows] == ["One", "Two", "Csv card"]
+    assert rows[2]["content"] == "Multi\nline"
+    assert rows[2]["tags"] == ["bulk", "csv"]
+
+    unsupported = client.post(
+        "/api/knowledge/entries/import", headers={**auth_headers, "Content-Type": "text/plain"}, data=b"x"
+    )
+    assert unsupported.status_code == HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+
+    mixed = b"\n".join(
+        [
+            b'{"title": "Bad \xff byte", "content": "x"}',
+            json.dumps({"title": "Long tag", "content": "x", "tags": ["t" * 65]}).encode(),
+            json.dumps({"title": "Odd tags", "content": "x", "tags": [1, {"a": 2}]}).encode(),
+            json.dumps({"title": "Odd links", "content": "x", "links": [None]}).encode(),
+            json.dumps({"title": "Fine", "content": "x"}).encode(),
+        ]
+    )
+    resp = client.post(
+        "/api/knowledge/entries/import", headers={**auth_headers, "Content-Type": "application/x-ndjson"}, data=mixed
+    )
+    assert resp.json["data"]["imported"] == 1
+    assert resp.json["data"]["errors"] == [
+        {"line": 1, "error": "invalid_encoding"},
+        {"line": 2, "error": "tag_too_long"},
+        {"line": 3, "error": "invalid_tags_or_links"},
+        {"line": 4, "error": "invalid_tags_or_links"},
+    ]
+    resp = client.post(
+        "/api/knowledge/entries/import",
+        headers={**auth_headers, "Content-Type": "text/csv"},
+        data=b"title,content\nBad \xff,x\nGood csv,y\n",
+    )
+    assert resp.json["data"]["imported"] == 1
+    assert resp.json["data"]["errors"] == [{"line": 2, "error": "invalid_encoding"}]
+
+
+def test_conditional_get_returns_304_until_entry_changes(client, auth_headers):
+    entry_id = client.post(
+        "/api/knowledge/entries", headers=auth_headers, json={"title": "Etag", "content": "Body"}
+    ).json["data"]["id"]
+
+    for url in (f"/api/knowledge/entries/{entry_id}", "/api/knowledge/entries"):
+        first = client.get(url, headers=auth_headers)
+        assert first.status_code == HTTPStatus.OK
+        etag = first.headers["ETag"]
+        again = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+        assert again.status_code == HTTPStatus.NOT_MODIFIED
+        assert again.data == b""
+
+    # a different query string is a different representation
+    sparse = client.get(
+        "/api/knowledge/entries", headers={**auth_headers, "If-None-Match": etag}, query_string={"fields": "title"}
+    )
+    assert sparse.status_code == HTTPStatus.OK
+
+    detail_etag = client.get(f"/api/knowledge/entries/{entry_id}", headers=auth_headers).headers["ETag"]
+    client.put(f"/api/knowledge/entries/{entry_id}", headers=auth_headers, json={"title": "Etag 2"})
+    for url, old in ((f"/api/knowledge/entries/{entry_id}", detail_etag), ("/api/knowledge/entries", etag)):
+        changed = client.get(url, headers={**auth_headers, "If-None-Match": old})
+        assert changed.status_code == HTTPStatus.OK
+        assert changed.headers["ETag"] != old
+
+    missing = client.get("/api/knowledge/entries/999999", headers={**auth_headers, "If-None-Match": "*"})
+    assert missing.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_batch_get_entries(client, auth_headers):
+    ids = [
+        client.post(
+            "/api/knowledge/entries", headers=auth_headers, json={"title": f"Batch {i}", "content": "Body text"}
+        ).json["data"]["id"]
+        for i in range(3)
+    ]
+    other = client.post("/api/auth/register", json={"email": "batch-other@example.com", "password": "Secret123!"})
+    other_headers = {"Authorization": f"Bearer {other.json['data']['tokens']['access']}"}
+    foreign = client.post(
+        "/api/knowledge/entries", headers=other_headers, json={"title": "Not yours", "content": "Body"}
+    ).json["data"]["id"]
+
+    resp = client.get(
+        "/api/knowledge/entries:batch",
+        headers=auth_headers,
+        query_string={"ids": f"{ids[2]},{ids[0]},{foreign},999999", "fields": "title", "snippet_len": 4},
+    )
+    assert resp.status_code == HTTPStatus.OK
+    data = resp.json["data"]
+    assert data["items"] == [
+        {"id": ids[2], "title": "Batch 2", "snippet": "Body"},
+        {"id": ids[0], "title": "Batch 0", "snippet": "Body"},
+    ]
+    assert data["missing"] == [foreign, 999999]
+
+    post = client.post("/api/knowledge/entries:batch", headers=auth_headers, json={"ids": [ids[1]]})
+    assert [item["title"] for item in post.json["data"]["items"]] == ["Batch 1"]
+
+    for raw in ("1,x", str(2**70), "0"):
+        bad = client.get("/api/knowledge/entries:batch", headers=auth_headers, query_string={"ids": raw})
+        assert bad.status_code == HTTPStatus.BAD_REQUEST, raw
+    for body in (
+        {"snippet_len": "10"},
+        {"snippet_len": True},
+        {"fields": ["title", 1]},
+        {"fields": 5},
+        {"ids": "12"},
+        {"ids": [2**70]},
+    ):
+        bad = client.post("/api/knowledge/entries:batch", headers=auth_headers, json={"ids": [ids[1]], **body})
+        assert bad.status_code == HTTPStatus.BAD_REQUEST, body
+
+
+def test_related_entries_follow_content_and_tags(client, auth_headers):
+    def create(title, content, tags=()):
+        resp = client.post(
+            "/api/knowledge/entries",
+            headers=auth_headers,
+            json={"title": title, "content": content, "tags": list(tags)},
+        )
+        return resp.json["data"]["id"]
+
+    base = create("Binary search trees", "Insertion and lookup in a balanced binary search tree", ["algo"])
+    close = create("Balanced search trees", "Lookup in a balanced binary search tree is logarithmic", ["algo"])
+    far = create("French verbs", "Conjugation of irregular verbs in the present tense")
+
+    resp = client.get(f"/api/knowledge/entries/{base}/related", headers=auth_headers, query_string={"k": 2})
+    assert resp.status_code == HTTPStatus.OK
+    items = resp.json["data"]["items"]
+    assert items[0]["id"] == close and items[0]["title"] == "Balanced search trees"
+    assert base not in [item["id"] for item in items]
+    assert all(0 < item["score"] <= 1 for item in items)
+    assert items[0]["score"] > next((i["score"] for i in items if i["id"] == far), 0)
+
+    # Rewriting the far entry makes it the closest match; deleting it drops it.
+    client.put(
+        f"/api/knowledge/entries/{far}",
+        headers=auth_headers,
+        json={"title": "Binary search trees", "content": "Insertion and lookup in a balanced binary search tree",
+              "tags": ["algo"]},
+    )
+    items = client.get(f"/api/knowledge/entries/{base}/related", headers=auth_headers).json["data"]["items"]
+    assert items[0] == {"id": far, "title": "Binary search trees", "topic_id": None, "tags": ["algo"], "score": 1.0}
+
+    client.delete(f"/api/knowledge/entries/{far}", headers=auth_headers)
+    items = client.get(f"/api/knowledge/entries/{base}/related", headers=auth_headers).json["data"]["items"]
+    assert [item["id"] for item in items] == [close]
+
+    assert client.get(f"/api/knowledge/entries/{base}/related?k=0", headers=auth_headers).status_code == 400
+    assert client.get("/api/knowledge/entries/999999/related", headers=auth_headers).status_code == 404
+
+
+def test_backlinks_and_link_graph(client, auth_headers):
+    def create(title, links=()):
+        resp = client.post(
+            "/api/knowledge/entries", headers=auth_headers, json={"title": title, "content": "c", "links": list(links)}
+        )
+        return resp.json["data"]["id"]
+
+    hub = create("Hub")
+    a = create("A", [hub, "https://example.com/x"])
+    b = create("B", [f"entry:{a}", f"https://app.example.com/api/knowledge/entries/{hub}?tab=1"])
+    c = create("C", [str(b), "999999", "entry:99999999999999999999", 2**63])
+
+    resp = client.get(f"/api/knowledge/entries/{hub}/backlinks", headers=auth_headers)
+    assert resp.status_code == HTTPStatus.OK
+    assert [item["id"] for item in resp.json["data"]["items"]] == [a, b]
+
+    graph = client.get(f"/api/knowledge/entries/{hub}/graph", headers=auth_headers).json["data"]
+    assert {n["id"] for n in graph["nodes"]} == {hub, a, b}
+    assert {(e["source"], e["target"]) for e in graph["edges"]} == {(a, hub), (b, hub), (b, a)}
+    graph = client.get(f"/api/knowledge/entries/{hub}/graph?depth=2", headers=auth_headers).json["data"]
+    assert {n["id"] for n in graph["nodes"]} == {hub, a, b, c}
+    assert graph["truncated"] is False
+
+    client.put(f"/api/knowledge/entries/{b}", headers=auth_headers, json={"links": []})
+    backlinks = client.get(f"/api/knowledge/entries/{hub}/backlinks", headers=auth_headers).json["data"]["items"]
+    assert [item["id"] for item in backlinks] == [a]
+
+    client.delete(f"/api/knowledge/entries/{a}", headers=auth_headers)
+    backlinks = client.get(f"/api/knowledge/entries/{hub}/backlinks", headers=auth_headers).json["data"]
+    assert backlinks["total"] == 0
+
+    assert client.get(f"/api/knowledge/entries/{hub}/graph?depth=9", headers=auth_headers).status_code == 400
+
+
+def test_suggest_by_prefix_ranked_by_usage(client, auth_headers):
+    topic_id = client.post("/api/knowledge/topics", headers=auth_headers, json={"name": "Mathematics"}).json["data"]["id"]
+    music_id = client.post("/api/knowledge/topics", headers=auth_headers, json={"name": "Music"}).json["data"]["id"]
+
+    def create(title, tags, topic=None):
+        body = {"title": title, "content": "c", "tags": tags, "topic_id": topic}
+        return client.post("/api/knowledge/entries", headers=auth_headers, json=body).json["data"]["id"]
+
+    def suggest(prefix, kind, **extra):
+        resp = client.get(
+            "/api/knowledge/suggest", headers=auth_headers, query_string={"prefix": prefix, "kind": kind, **extra}
+        )
+        assert resp.status_code == HTTPStatus.OK
+        return resp.json["data"]["items"]
+
+    first = create("Matrix basics", ["matrix", "math"], topic_id)
+    assert suggest("ma", "tag") == [{"value": "math", "count": 1}, {"value": "matrix", "count": 1}]
+
+    # Writes after the index is loaded are applied in place.
+    second = create("Markov chains", ["math"], topic_id)
+    assert suggest("MA", "tag") == [{"value": "math", "count": 2}, {"value": "matrix", "count": 1}]
+    assert suggest("m", "topic") == [
+        {"id": topic_id, "value": "Mathematics", "count": 2},
+        {"id": music_id, "value": "Music", "count": 0},
+    ]
+
+    client.post("/api/study/logs", headers=auth_headers, json={"entry_id": second})
+    assert [item["id"] for item in suggest("ma", "title")] == [second, first]
+
+    client.put(f"/api/knowledge/entries/{first}", headers=auth_headers, json={"title": "Linear maps", "tags": ["la"]})
+    assert suggest("ma", "tag") == [{"value": "math", "count": 1}]
+    assert [item["value"] for item in suggest("lin", "title")] == ["Linear maps"]
+
+    client.delete(f"/api/knowledge/entries/{second}", headers=auth_headers)
+    assert suggest("ma", "tag") == []
+    assert suggest("", "title", limit=5) == [{"id": first, "value": "Linear maps", "count": 0}]
+
+    bad = client.get("/api/knowledge/suggest", headers=auth_headers, query_string={"prefix": "a", "kind": "plan"})
+    assert bad.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_search_hot_words_per_user_and_global(app, client, auth_headers):
+    from backend.modules.knowledge import hotwords
+
+    for keyword in ["Binary Search", "binary  search", "graphs", "binary search"]:
+        client.get("/api/knowledge/entries", headers=auth_headers, query_string={"keyword": keyword})
+    # Later pages of the same search are not counted again.
+    client.get("/api/knowledge/entries", headers=auth_headers, query_string={"keyword": "graphs", "page": 2})
+    hotwords.flush()
+
+    resp = client.get("/api/knowledge/search/hot", headers=auth_headers, query_string={"window": 1})
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.json["data"] == {
+        "window": 1,
+        "items": [{"term": "binary search", "count": 3}, {"term": "graphs", "count": 1}],
+    }
+    week = client.get("/api/knowledge/search/hot", headers=auth_headers, query_string={"limit": 1}).json["data"]
+    assert week["items"] == [{"term": "binary search", "count": 3}]
+
+    # Other users never see global terms; those are for operators via the CLI.
+    other = client.post("/api/auth/register", json={"email": "hot-other@example.com", "password": "Secret123!"})
+    other_headers = {"Authorization": f"Bearer {other.json['data']['tokens']['access']}"}
+    leaked = client.get(
+        "/api/knowledge/search/hot", headers=other_headers, query_string={"scope": "global", "window": 30}
+    ).json["data"]["items"]
+    assert leaked == []
+    result = app.test_cli_runner().invoke(args=["knowledge", "hot-terms", "--window", "30"])
+    assert result.exit_code == 0, result.output
+    counts = dict(reversed(line.split("\t")) for line in result.output.splitlines())
+    assert int(counts["binary search"]) >= 3
+
+    bad = client.get("/api/knowledge/search/hot", headers=auth_headers, query_string={"window": 3})
+    assert bad.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_space_saving_keeps_heavy_hitters_in_fixed_memory():
+    from backend.common.sketch import SpaceSaving
+
+    sketch = SpaceSaving(capacity=5)
+    for i in range(1000):
+        sketch.add("hot")
+        sketch.add(f"noise-{i}")
+    assert len(sketch) == 5
+    assert sketch.top(1) == [("hot", 1000)]
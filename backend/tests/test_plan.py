@@ -24,6 +24,10 @@ def test_plan_crud_and_tasks_flow(client, auth_headers):
     list_resp = client.get("/api/plans", headers=auth_headers)
     assert list_resp.status_code == HTTPStatus.OK
     assert list_resp.json["data"]["total"] == 1
+    tagged = client.get("/api/plans", headers=auth_headers, query_string={"tag": "p0"})
+    assert tagged.json["data"]["total"] == 1
+    untagged = client.get("/api/plans", headers=auth_headers, query_string={"tag": "p1"})
+    assert untagged.json["data"]["total"] == 0
 
     # create task
     task_resp = client.post(
@@ -44,6 +48,23 @@ def test_plan_crud_and_tasks_flow(client, auth_headers):
     assert detail_resp.status_code == HTTPStatus.OK
     assert detail_resp.json["data"]["progress"] == pytest.approx(1.0)
     assert detail_resp.json["data"]["tasks"][0]["status"] == "done"
+    sparse_detail = client.get(f"/api/plans/{plan_id}", headers=auth_headers, query_string={"task_fields": "status"})
+    assert sparse_detail.json["data"]["tasks"] == [{"id": task_id, "status": "done"}]
+    sparse_list = client.get("/api/plans", headers=auth_headers, query_string={"fields": "title,progress"})
+    assert sparse_list.json["data"]["items"] == [{"id": plan_id, "title": "Test Plan", "progress": 1.0}]
+
+    etag = detail_resp.headers["ETag"]
+    not_modified = client.get(f"/api/plans/{plan_id}", headers={**auth_headers, "If-None-Match": etag})
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+    client.put(f"/api/tasks/{task_id}", headers=auth_headers, json={"title": "Task 1 renamed"})
+    modified = client.get(f"/api/plans/{plan_id}", headers={**auth_headers, "If-None-Match": etag})
+    assert modified.status_code == HTTPStatus.OK
+
+    for bad_tags in ("p0", [1]):
+        bad = client.post("/api/plans", headers=auth_headers, json={"title": "Bad", "tags": bad_tags})
+        assert bad.status_code == HTTPStatus.BAD_REQUEST
+        bad = client.put(f"/api/plans/{plan_id}", headers=auth_headers, json={"tags": bad_tags})
+        assert bad.status_code == HTTPStatus.BAD_REQUEST
 
     # update plan
     update_resp = client.put(f"/api/plans/{plan_id}", headers=auth_headers, json={"title": "Plan Updated"})
@@ -53,3 +74,267 @@ def test_plan_crud_and_tasks_flow(client, auth_headers):
     # delete plan
     del_resp = client.delete(f"/api/plans/{plan_id}", headers=auth_headers)
     assert del_resp.status_code == HTTPStatus.OK
+
+
+def test_plan_progress_counters_and_repair(app, client):
+    resp = client.post("/api/auth/register", json={"email": "plan-progress@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {resp.json['data']['tokens']['access']}"}
+    plan_id = client.post("/api/plans", headers=headers, json={"title": "Counters"}).json["data"]["id"]
+
+    task_ids = [
+        client.post(f"/api/plans/{plan_id}/tasks", headers=headers, json={"title": f"T{i}"}).json["data"]["id"]
+        for i in range(3)
+    ]
+    client.post(f"/api/plans/{plan_id}/tasks", headers=headers, json={"title": "Done", "status": "done"})
+    client.post(f"/api/tasks/{task_ids[0]}/complete", headers=headers)
+    client.post(f"/api/tasks/{task_ids[0]}/complete", headers=headers)  # already done: no double count
+    client.put(f"/api/tasks/{task_ids[1]}", headers=headers, json={"status": "done"})
+    client.put(f"/api/tasks/{task_ids[1]}", headers=headers, json={"status": "doing"})
+
+    detail = client.get(f"/api/plans/{plan_id}", headers=headers).json["data"]
+    assert (detail["task_count"], detail["done_count"]) == (4, 2)
+    assert detail["progress"] == pytest.approx(0.5)
+    assert detail["status"] == "in_progress"
+
+    from backend.extensions import db
+    from backend.modules.plan.models import Plan
+
+    plan = db.session.get(Plan, plan_id)
+    plan.task_count, plan.done_count, plan.progress = 9, 0, 0.0
+    db.session.commit()
+    result = app.test_cli_runner().invoke(args=["plan", "repair-progress"])
+    assert result.exit_code == 0, result.output
+    assert "repaired task counters of 1 plans" in result.output
+
+    detail = client.get(f"/api/plans/{plan_id}", headers=headers).json["data"]
+    assert (detail["task_count"], detail["done_count"], detail["progress"]) == (4, 2, 0.5)
+
+
+def test_bulk_task_update(client):
+    resp = client.post("/api/auth/register", json={"email": "plan-bulk@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {resp.json['data']['tokens']['access']}"}
+    plan_id = client.post("/api/plans", headers=headers, json={"title": "Bulk"}).json["data"]["id"]
+    ids = [
+        client.post(f"/api/plans/{plan_id}/tasks", headers=headers, json={"title": f"T{i}"}).json["data"]["id"]
+        for i in range(3)
+    ]
+
+    bulk = client.patch(
+        f"/api/plans/{plan_id}/tasks",
+        headers=headers,
+        json={
+            "items": [
+                {"id": ids[0], "status": "done", "order_no": 2, "tags": ["a"]},
+                {"id": ids[1], "status": "done", "order_no": 0, "due_date": "2026-01-02"},
+                {"id": ids[2], "order_no": 1, "priority": "high", "tags": ["b"]},
+            ]
+        },
+    )
+    assert bulk.status_code == HTTPStatus.OK
+    data = bulk.json["data"]
+    assert data["plan"] == {"id": plan_id, "status": "in_progress", "progress": 0.6667, "task_count": 3, "done_count": 2}
+    by_id = {t["id"]: t for t in data["items"]}
+    assert [by_id[i]["order_no"] for i in ids] == [2, 0, 1]
+    assert [by_id[i]["status"] for i in ids] == ["done", "done", "todo"]
+    assert by_id[ids[1]]["due_date"] == "2026-01-02"
+    assert (by_id[ids[2]]["priority"], by_id[ids[2]]["tags"], by_id[ids[0]]["tags"]) == ("high", ["b"], ["a"])
+
+    # Un-completing one and completing another leaves the count unchanged.
+    swap = client.patch(
+        f"/api/plans/{plan_id}/tasks",
+        headers=headers,
+        json={"items": [{"id": ids[0], "status": "todo"}, {"id": ids[2], "status": "done"}]},
+    )
+    assert swap.json["data"]["plan"]["done_count"] == 2
+
+    other = client.post("/api/auth/register", json={"email": "plan-bulk2@example.com", "password": "Secret123!"})
+    other_headers = {"Authorization": f"Bearer {other.json['data']['tokens']['access']}"}
+    other_plan = client.post("/api/plans", headers=other_headers, json={"title": "Other"}).json["data"]["id"]
+    foreign = client.patch(
+        f"/api/plans/{other_plan}/tasks", headers=other_headers, json={"items": [{"id": ids[0], "status": "done"}]}
+    )
+    assert foreign.status_code == HTTPStatus.NOT_FOUND
+    for change in (
+        {"status": "nope"},
+        {"status": ["done"]},
+        {"due_date": 5},
+        {"priority": ["high"]},
+        {"priority": "urgent"},
+        {"tags": "a"},
+        {"tags": [1]},
+        {"id": 2**70},
+    ):
+        invalid = client.patch(
+            f"/api/plans/{plan_id}/tasks", headers=headers, json={"items": [{"id": ids[0], **change}]}
+        )
+        assert invalid.status_code == HTTPStatus.BAD_REQUEST, change
+    detail = client.get(f"/api/plans/{plan_id}", headers=headers).json["data"]
+    assert [t["status"] for t in detail["tasks"]] == ["todo", "done", "done"]
+
+
+def test_rank_keys_sort_between_neighbours():
+    from backend.modules.plan.rank import rank_between, spaced_ranks
+
+    keys = spaced_ranks(5)
+    assert keys == sorted(keys) and len(set(keys)) == 5
+    for lo, hi in [(None, None), (None, keys[0]), (keys[0], keys[1]), (keys[-1], None), ("a", "a1"), ("1", "2")]:
+        key = rank_between(lo, hi)
+        assert (lo is None or lo < key) and (hi is None or key < hi) and not key.endswith("0")
+    top = keys[0]
+    for _ in range(500):
+        top = rank_between(None, top)
+    assert len(top) < 30
+
+
+def test_move_task_writes_one_rank(app, client):
+    resp = client.post("/api/auth/register", json={"email": "plan-move@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {resp.json['data']['tokens']['access']}"}
+    plan_id = client.post("/api/plans", headers=headers, json={"title": "Order"}).json["data"]["id"]
+    a, b, c, d = (
+        client.post(f"/api/plans/{plan_id}/tasks", headers=headers, json={"title": t}).json["data"]["id"]
+        for t in "abcd"
+    )
+
+    def order():
+        tasks = client.get(f"/api/plans/{plan_id}", headers=headers).json["data"]["tasks"]
+        return [t["id"] for t in tasks]
+
+    assert order() == [a, b, c, d]
+    moved = client.post(f"/api/tasks/{d}/move", headers=headers, json={"before_id": a})
+    assert moved.status_code == HTTPStatus.OK
+    assert order() == [d, a, b, c]
+    client.post(f"/api/tasks/{a}/move", headers=headers, json={"after_id": b, "before_id": c})
+    assert order() == [d, b, a, c]
+    client.post(f"/api/tasks/{d}/move", headers=headers, json={"after_id": c})
+    assert order() == [b, a, c, d]
+
+    from backend.extensions import db
+    from backend.modules.plan.models import Task
+
+    bad = client.post(f"/api/tasks/{a}/move", headers=headers, json={"after_id": d, "before_id": b})
+    assert bad.status_code == HTTPStatus.BAD_REQUEST
+    assert client.post(f"/api/tasks/{a}/move", headers=headers, json={}).status_code == HTTPStatus.BAD_REQUEST
+    for position in ({"after_id": 2**70}, {"before_id": "1"}, {"after_id": 0}):
+        bad = client.post(f"/api/tasks/{a}/move", headers=headers, json=position)
+        assert bad.status_code == HTTPStatus.BAD_REQUEST
+
+    # The plan detail ORDER BY is served by ix_tasks_plan_rank without a sort step.
+    from sqlalchemy import event
+
+    plans = []
+
+    def explain(conn, cursor, statement, parameters, *args):
+        if statement.lstrip().upper().startswith("SELECT") and "ORDER BY tasks.rank" in statement:
+            plans.extend(row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", explain)
+    try:
+        order()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", explain)
+    assert any("ix_tasks_plan_rank" in p for p in plans) and not any("TEMP B-TREE" in p for p in plans)
+
+    # Tasks created before ranks existed are ordered by order_no once rebalanced.
+
+    db.session.execute(db.update(Task).where(Task.plan_id == plan_id).values(rank=None, order_no=Task.id * -1))
+    db.session.commit()
+    assert order() == [d, c, b, a]  # same order before and after the rebalance
+    result = app.test_cli_runner().invoke(args=["plan", "rebalance-ranks"])
+    assert result.exit_code == 0, result.output
+    assert "rebalanced task ranks of 1 plans" in result.output
+    assert order() == [d, c, b, a]
+
+
+def test_mark_overdue_sets_delayed(app, client):
+    resp = client.post("/api/auth/register", json={"email": "plan-overdue@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {resp.json['data']['tokens']['access']}"}
+    late = client.post("/api/plans", headers=headers, json={"title": "Late", "deadline": "2020-01-01"}).json["data"]
+    future = client.post("/api/plans", headers=headers, json={"title": "Later", "deadline": "2999-01-01"}).json["data"]
+    tasks = {
+        name: client.post(f"/api/plans/{future['id']}/tasks", headers=headers, json={"title": name, **extra}).json[
+            "data"
+        ]["id"]
+        for name, extra in {
+            "overdue": {"due_date": "2020-01-01"},
+            "blocked": {"due_date": "2020-01-01", "status": "blocked"},
+            "done": {"due_date": "2020-01-01", "status": "done"},
+            "upcoming": {"due_date": "2999-01-01"},
+            "undated": {},
+        }.items()
+    }
+
+    result = app.test_cli_runner().invoke(args=["plan", "mark-overdue"])
+    assert result.exit_code == 0, result.output
+
+    detail = client.get(f"/api/plans/{future['id']}", headers=headers).json["data"]
+    statuses = {t["id"]: t["status"] for t in detail["tasks"]}
+    assert {name: statuses[task_id] for name, task_id in tasks.items()} == {
+        "overdue": "delayed",
+        "blocked": "delayed",
+        "done": "done",
+        "upcoming": "todo",
+        "undated": "todo",
+    }
+    assert detail["status"] == "in_progress"
+    assert client.get(f"/api/plans/{late['id']}", headers=headers).json["data"]["status"] == "delayed"
+
+    # A delayed plan stays delayed as tasks change, until every task is done.
+    client.post(f"/api/plans/{late['id']}/tasks", headers=headers, json={"title": "one"})
+    task_id = client.post(f"/api/plans/{late['id']}/tasks", headers=headers, json={"title": "two"}).json["data"]["id"]
+    client.post(f"/api/tasks/{task_id}/complete", headers=headers)
+    assert client.get(f"/api/plans/{late['id']}", headers=headers).json["data"]["status"] == "delayed"
+
+
+def test_extending_deadline_clears_delayed_plan(app, client):
+    resp = client.post("/api/auth/register", json={"email": "plan-extend@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {resp.json['data']['tokens']['access']}"}
+    plan_id = client.post("/api/plans", headers=headers, json={"title": "Slipped", "deadline": "2020-01-01"}).json[
+        "data"
+    ]["id"]
+    task_ids = [
+        client.post(f"/api/plans/{plan_id}/tasks", headers=headers, json={"title": t}).json["data"]["id"] for t in "ab"
+    ]
+    client.post(f"/api/tasks/{task_ids[0]}/complete", headers=headers)
+    app.test_cli_runner().invoke(args=["plan", "mark-overdue"])
+    assert client.get(f"/api/plans/{plan_id}", headers=headers).json["data"]["status"] == "delayed"
+
+    # Still in the past: stays delayed.
+    still_late = client.put(f"/api/plans/{plan_id}", headers=headers, json={"deadline": "2021-01-01"})
+    assert still_late.json["data"]["status"] == "delayed"
+
+    extended = client.put(f"/api/plans/{plan_id}", headers=headers, json={"deadline": "2999-01-01"})
+    assert extended.json["data"]["status"] == "in_progress"
+    app.test_cli_runner().invoke(args=["plan", "mark-overdue"])
+    assert client.get(f"/api/plans/{plan_id}", headers=headers).json["data"]["status"] == "in_progress"
+
+
+def test_moving_due_date_forward_reopens_delayed_task(app, client):
+    resp = client.post("/api/auth/register", json={"email": "task-extend@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {resp.json['data']['tokens']['access']}"}
+    plan_id = client.post("/api/plans", headers=headers, json={"title": "Tasks"}).json["data"]["id"]
+    a, b, c, d = (
+        client.post(f"/api/plans/{plan_id}/tasks", headers=headers, json={"title": t, "due_date": "2020-01-01"}).json[
+            "data"
+        ]["id"]
+        for t in "abcd"
+    )
+    app.test_cli_runner().invoke(args=["plan", "mark-overdue"])
+
+    single = client.put(f"/api/tasks/{a}", headers=headers, json={"due_date": "2999-01-01"})
+    assert single.json["data"]["status"] == "todo"
+    still_late = client.put(f"/api/tasks/{b}", headers=headers, json={"due_date": "2021-01-01"})
+    assert still_late.json["data"]["status"] == "delayed"
+
+    resp = client.patch(
+        f"/api/plans/{plan_id}/tasks",
+        headers=headers,
+        json={
+            "items": [
+                {"id": b, "due_date": "2999-01-01"},
+                {"id": c, "due_date": "2021-01-01"},
+                {"id": d, "due_date": "2999-01-01", "status": "delayed"},
+            ]
+        },
+    )
+    assert resp.status_code == HTTPStatus.OK
+    assert {t["id"]: t["status"] for t in resp.json["data"]["items"]} == {b: "todo", c: "delayed", d: "delayed"}
@@ -0,0 +1,95 @@
+from datetime import date, timedelta
+from http import HTTPStatus
+
+import pytest
+
+
+@pytest.fixture
+def auth_headers(client):
+    resp = client.post("/api/auth/register", json={"email": "review@example.com", "password": "Secret123!"})
+    token = resp.json["data"]["tokens"]["access"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_review_schedule_follows_study_logs(app, client, auth_headers):
+    def entry(title):
+        resp = client.post("/api/knowledge/entries", headers=auth_headers, json={"title": title, "content": "c"})
+        return resp.json["data"]["id"]
+
+    def log(entry_id, day):
+        resp = client.post(
+            "/api/study/logs", headers=auth_headers, json={"entry_id": entry_id, "logged_at": day.isoformat()}
+        )
+        assert resp.status_code == HTTPStatus.OK
+
+    def due(day):
+        resp = client.get("/api/review/due", headers=auth_headers, query_string={"date": day.isoformat()})
+        assert resp.status_code == HTTPStatus.OK
+        return {item["entry_id"]: item for item in resp.json["data"]["items"]}
+
+    start = date(2024, 3, 1)
+    first, second = entry("Spaced"), entry("Repetition")
+    log(first, start)
+    log(first, start)  # same day does not count twice
+    log(first, start + timedelta(days=1))
+    log(first, start + timedelta(days=7))
+    log(second, start + timedelta(days=3))
+
+    # Intervals 1, 6, 15: third distinct day 03-08 -> due 03-23.
+    state = due(date(2024, 3, 23))[first]
+    assert (state["repetitions"], state["interval_days"], state["next_review_at"]) == (3, 15, "2024-03-23")
+    assert state["title"] == "Spaced"
+    assert first not in due(date(2024, 3, 22))
+    assert due(date(2024, 3, 6))[second]["overdue_days"] == 1
+
+    # A backdated log recounts distinct days but keeps the latest review date.
+    log(first, start - timedelta(days=5))
+    state = due(date(2024, 5, 1))[first]
+    assert (state["repetitions"], state["interval_days"], state["next_review_at"]) == (4, 38, "2024-04-15")
+
+    result = app.test_cli_runner().invoke(args=["review", "rebuild-state", "--batch-size", "1"])
+    assert result.exit_code == 0, result.output
+    assert due(date(2024, 5, 1))[first] == state
+
+    limited = client.get("/api/review/due", headers=auth_headers, query_string={"date": "2024-05-01", "limit": 1})
+    assert [i["entry_id"] for i in limited.json["data"]["items"]] == [second]
+    assert limited.json["data"]["has_more"] is True
+
+
+def test_forecast_projects_due_counts_and_refreshes_on_new_logs(client):
+    resp = client.post("/api/auth/register", json={"email": "forecast@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {resp.json['data']['tokens']['access']}"}
+    today = date.today()
+    ids = [
+        client.post("/api/knowledge/entries", headers=headers, json={"title": f"F{i}", "content": "c"}).json["data"]["id"]
+        for i in range(2)
+    ]
+    client.post("/api/study/logs", headers=headers, json={"entry_id": ids[0], "logged_at": today.isoformat()})
+
+    data = client.get("/api/review/forecast", headers=headers, query_string={"days": 30}).json["data"]
+    # Reviewed today: due in 1 day, then 6 more, then 15 more (day 22).
+    assert [i for i, item in enumerate(data["items"]) if item["count"]] == [1, 7, 22]
+    assert data["total"] == 3 and data["overdue"] == 0
+    assert data["items"][0]["date"] == today.isoformat()
+
+    client.post("/api/study/logs", headers=headers, json={"entry_id": ids[1], "logged_at": today.isoformat()})
+    data = client.get("/api/review/forecast", headers=headers, query_string={"days": 30}).json["data"]
+    assert data["items"][1]["count"] == 2 and data["total"] == 6
+
+    bad = client.get("/api/review/forecast", headers=headers, query_string={"days": 0})
+    assert bad.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_deleting_entry_drops_its_review_state(client):
+    resp = client.post("/api/auth/register", json={"email": "review-delete@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {resp.json['data']['tokens']['access']}"}
+    entry_id = client.post("/api/knowledge/entries", headers=headers, json={"title": "Gone", "content": "c"}).json[
+        "data"
+    ]["id"]
+    client.post("/api/study/logs", headers=headers, json={"entry_id": entry_id, "logged_at": date.today().isoformat()})
+    assert client.get("/api/review/forecast", headers=headers, query_string={"days": 2}).json["data"]["total"] == 1
+
+    client.delete(f"/api/knowledge/entries/{entry_id}", headers=headers)
+    assert client.get("/api/review/forecast", headers=headers, query_string={"days": 2}).json["data"]["total"] == 0
+    due = client.get("/api/review/due", headers=headers, query_string={"date": "2999-01-01"}).json["data"]
+    assert due["items"] == []
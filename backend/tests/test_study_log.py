@@ -30,3 +30,125 @@ def test_create_and_list_study_logs(client, auth_headers):
     assert list_resp.status_code == HTTPStatus.OK
     assert list_resp.json["data"]["total"] >= 1
     assert any(item["id"] == log_id for item in list_resp.json["data"]["items"])
+
+
+def test_daily_rollup_backs_stats_by_granularity(app, client):
+    resp = client.post("/api/auth/register", json={"email": "stats@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {resp.json['data']['tokens']['access']}"}
+    topic_id = client.post("/api/knowledge/topics", headers=headers, json={"name": "T"}).json["data"]["id"]
+    with_topic = client.post(
+        "/api/knowledge/entries", headers=headers, json={"title": "A", "content": "c", "topic_id": topic_id}
+    ).json["data"]["id"]
+    without_topic = client.post("/api/knowledge/entries", headers=headers, json={"title": "B", "content": "c"}).json[
+        "data"
+    ]["id"]
+    for entry_id, day in [
+        (with_topic, "2024-01-01"),
+        (with_topic, "2024-01-01"),
+        (without_topic, "2024-01-01"),
+        (with_topic, "2024-01-03"),
+        (without_topic, "2024-02-10"),
+    ]:
+        client.post("/api/study/logs", headers=headers, json={"entry_id": entry_id, "logged_at": day})
+
+    def stats(**params):
+        resp = client.get("/api/study/stats", headers=headers, query_string=params)
+        assert resp.status_code == HTTPStatus.OK
+        return resp.json["data"]["items"]
+
+    days = stats(start_date="2024-01-01", end_date="2024-01-03")
+    assert days == [
+        {"period": "2024-01-01", "logs": 3, "entry_days": 2, "topics": {str(topic_id): 2, "none": 1}},
+        {"period": "2024-01-02", "logs": 0, "entry_days": 0, "topics": {}},
+        {"period": "2024-01-03", "logs": 1, "entry_days": 1, "topics": {str(topic_id): 1}},
+    ]
+    months = stats(granularity="month", start_date="2024-01-01", end_date="2024-02-29")
+    assert [(m["period"], m["logs"], m["entry_days"]) for m in months] == [("2024-01-01", 4, 3), ("2024-02-01", 1, 1)]
+    weeks = stats(granularity="week", start_date="2024-01-01", end_date="2024-01-14")
+    assert [(w["period"], w["logs"]) for w in weeks] == [("2024-01-01", 4), ("2024-01-08", 0)]
+
+    result = app.test_cli_runner().invoke(args=["study", "rebuild-stats"])
+    assert result.exit_code == 0, result.output
+    assert stats(start_date="2024-01-01", end_date="2024-01-03") == days
+
+    bad = client.get("/api/study/stats", headers=headers, query_string={"granularity": "year"})
+    assert bad.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_batch_sync_is_idempotent_and_reports_per_item(client):
+    resp = client.post("/api/auth/register", json={"email": "sync@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {resp.json['data']['tokens']['access']}"}
+    entry_id = client.post("/api/knowledge/entries", headers=headers, json={"title": "S", "content": "c"}).json[
+        "data"
+    ]["id"]
+    items = [
+        {"entry_id": entry_id, "logged_at": "2024-05-02", "client_key": "k1"},
+        {"entry_id": entry_id, "logged_at": "2024-05-01", "note": "first", "client_key": "k2"},
+        {"entry_id": 999999, "client_key": "k3"},
+        {"entry_id": entry_id, "logged_at": "not-a-date"},
+        {"entry_id": entry_id, "logged_at": "2024-05-01", "client_key": "k2"},
+        {"entry_id": 2**70},
+    ]
+
+    resp = client.post("/api/study/logs:batch", headers=headers, json={"items": items})
+    assert resp.status_code == HTTPStatus.OK
+    data = resp.json["data"]
+    assert (data["created"], data["duplicate"], data["error"]) == (2, 1, 3)
+    statuses = [item["status"] for item in data["items"]]
+    assert statuses == ["created", "created", "error", "error", "duplicate", "error"]
+    assert data["items"][2]["error"] == "entry_not_found"
+    assert data["items"][3]["error"] == "invalid_date"
+    assert data["items"][4]["log"]["id"] == data["items"][1]["log"]["id"]
+    assert data["items"][5]["error"] == "invalid_entry_id"
+
+    # A retried upload inserts nothing new.
+    retry = client.post("/api/study/logs:batch", headers=headers, json={"items": items[:2]}).json["data"]
+    assert [item["status"] for item in retry["items"]] == ["duplicate", "duplicate"]
+    single = client.post("/api/study/logs", headers=headers, json={"entry_id": entry_id, "client_key": "k1"})
+    assert single.json["data"]["id"] == data["items"][0]["log"]["id"]
+
+    logs = client.get(
+        "/api/study/logs", headers=headers, query_string={"start_date": "2024-05-01", "end_date": "2024-05-02"}
+    ).json["data"]
+    assert logs["total"] == 2
+    stats = client.get(
+        "/api/study/stats", headers=headers, query_string={"start_date": "2024-05-01", "end_date": "2024-05-02"}
+    ).json["data"]["items"]
+    assert [s["logs"] for s in stats] == [1, 1]
+    due = client.get("/api/review/due", headers=headers, query_string={"date": "2024-06-01"}).json["data"]["items"]
+    assert due[0]["repetitions"] == 2 and due[0]["next_review_at"] == "2024-05-08"
+
+    too_many = client.post("/api/study/logs:batch", headers=headers, json={"items": [{"entry_id": entry_id}] * 101})
+    assert too_many.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_logs_keyset_pagination_with_entry_titles(client):
+    resp = client.post("/api/auth/register", json={"email": "pages@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {resp.json['data']['tokens']['access']}"}
+    entry_id = client.post("/api/knowledge/entries", headers=headers, json={"title": "Paged", "content": "c"}).json[
+        "data"
+    ]["id"]
+    items = [{"entry_id": entry_id, "logged_at": f"2023-01-{day:02d}"} for day in (1, 2, 2, 3, 4)]
+    client.post("/api/study/logs:batch", headers=headers, json={"items": items})
+
+    seen, cursor = [], None
+    while True:
+        params = {"start_date": "2020-01-01", "page_size": 2, "include": "entry_title", "with_total": "false"}
+        if cursor:
+            params["cursor"] = cursor
+        data = client.get("/api/study/logs", headers=headers, query_string=params).json["data"]
+        assert data["total"] is None
+        seen.extend(data["items"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+    assert [log["logged_at"] for log in seen] == ["2023-01-04", "2023-01-03", "2023-01-02", "2023-01-02", "2023-01-01"]
+    assert len({log["id"] for log in seen}) == 5
+    assert {log["entry_title"] for log in seen} == {"Paged"}
+    assert data["end_date"] is None
+
+    plain = client.get("/api/study/logs", headers=headers, query_string={"start_date": "2020-01-01"}).json["data"]
+    assert plain["total"] == 5 and "entry_title" not in plain["items"][0]
+
+    assert client.get("/api/study/logs?page_size=1000", headers=headers).status_code == HTTPStatus.BAD_REQUEST
+    assert client.get("/api/study/logs?include=note", headers=headers).status_code == HTTPStatus.BAD_REQUEST
@@ -15,3 +15,8 @@ def test_profile_success(client):
     data = resp.json["data"]
     assert data["email"] == "p1@example.com"
     assert data["roles"] == ["user"]
+
+    cached = client.get(
+        "/api/user/profile", headers={"Authorization": f"Bearer {token}", "If-None-Match": resp.headers["ETag"]}
+    )
+    assert cached.status_code == HTTPStatus.NOT_MODIFIED
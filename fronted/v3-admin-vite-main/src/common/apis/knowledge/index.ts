@@ -62,7 +62,13 @@ export function deleteEntryApi(id: number) {
   })
 }
 
-export function listStudyLogsApi(params?: { start_date?: string; end_date?: string }) {
+export function listStudyLogsApi(params?: {
+  start_date?: string
+  end_date?: string
+  page_size?: number
+  cursor?: string
+  with_total?: boolean
+}) {
   return request<Knowledge.StudyLogListResponse>({
     url: "/study/logs",
     method: "get",
@@ -28,5 +28,11 @@ export type TopicListResponse = ApiResponseData<{ items: Topic[]; total: number
 export type KnowledgeListResponse = ApiResponseData<{ items: KnowledgeEntry[]; total: number; page: number; page_size: number }>
 export type KnowledgeDetailResponse = ApiResponseData<KnowledgeEntry>
 export type KnowledgeMutateResponse = ApiResponseData<KnowledgeEntry>
-export type StudyLogListResponse = ApiResponseData<{ items: StudyLog[]; total: number; start_date: string; end_date: string }>
+export type StudyLogListResponse = ApiResponseData<{
+  items: StudyLog[]
+  total: number | null
+  next_cursor: string | null
+  start_date: string
+  end_date: string
+}>
 export type StudyLogCreateResponse = ApiResponseData<StudyLog>